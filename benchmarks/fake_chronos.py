@@ -0,0 +1,257 @@
+"""An in-process stand-in for the Chronos HTTP API, for benchmarks.
+
+Serves the endpoints ChronosClient uses, with and without the /v1 prefix,
+from an in-memory job store. Latency and failures can be injected into
+every request.
+"""
+
+import json
+import random
+import socket
+import threading
+import time
+import zlib
+
+from chronos.compression import gzip_body
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs, urlsplit
+    from urllib import unquote
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, unquote, urlsplit
+
+
+def make_job(index, parents_every=5):
+    """A job definition shaped like the ones Chronos returns; every `parents_every`th job is a dependent job."""
+    job = {
+        'name': 'bench-job-%06d' % index,
+        'command': 'echo "benchmark job %d" && sleep 1' % index,
+        'owner': 'team-%d@example.com' % (index % 50),
+        'ownerName': '',
+        'description': 'Benchmark job %d' % index,
+        'disabled': False,
+        'async': False,
+        'shell': True,
+        'softError': False,
+        'highPriority': False,
+        'dataProcessingJobType': False,
+        'epsilon': 'PT60S',
+        'retries': 2,
+        'cpus': 0.25,
+        'mem': 1024.0,
+        'disk': 256.0,
+        'successCount': index % 700,
+        'errorCount': index % 3,
+        'errorsSinceLastSuccess': 0,
+        'lastSuccess': '2015-12-18T10:30:09.755Z',
+        'lastError': '2015-12-17T10:30:09.755Z' if index % 10 == 0 else '',
+        'executor': '',
+        'executorFlags': '',
+        'runAsUser': 'root',
+        'scheduleTimeZone': 'null',
+        'container': {
+            'type': 'docker', 'image': 'registry.example.com:443/team-%d/image:%d' % (index % 50, index % 7),
+            'network': 'BRIDGE', 'volumes': [],
+        },
+        'environmentVariables': [{'name': 'JOB_INDEX', 'value': str(index)}],
+        'arguments': [],
+        'uris': ['file:///root/.dockercfg'],
+        'constraints': [],
+    }
+    if parents_every and index % parents_every and index >= parents_every:
+        job['parents'] = ['bench-job-%06d' % (index - index % parents_every)]
+    else:
+        job['schedule'] = 'R/2015-12-18T%02d:%02d:00.000Z/PT1H' % (index % 24, index % 60)
+    return job
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    # the client opens connections from many worker threads at once
+    request_queue_size = 128
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        # headers and body are written separately; with Nagle's algorithm, keep-alive requests stall on delayed ACKs
+        BaseHTTPRequestHandler.setup(self)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, True)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def _handle(self, method):
+        chronos = self.server.chronos
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        if self.headers.get('Content-Encoding') == 'gzip':
+            if chronos.gzip_requests:
+                body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+                chronos.gzipped_requests += 1
+            else:
+                body = None
+        if body is None:
+            status, content_type, payload = 415, 'text/plain', b'Unsupported Content-Encoding'
+        else:
+            status, content_type, payload = chronos.respond(method, self.path, body)
+        encoding = None
+        if payload and chronos.compress and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            encoding, payload = 'gzip', gzip_body(payload)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class FakeChronos(object):
+    """A fake Chronos server on 127.0.0.1, holding `jobs` generated jobs.
+
+    Each request is delayed by `latency` seconds and fails with a 503 with
+    probability `failure_rate`. Responses are gzipped for clients that
+    accept it if `compress` is set; gzipped request bodies are accepted
+    unless `gzip_requests` is False, when they get a 415. Use as a context
+    manager, or call start() and stop(); `address` is the host:port to
+    connect to.
+    """
+
+    def __init__(self, jobs=1000, latency=0.0, failure_rate=0.0, seed=0, compress=False, gzip_requests=True):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.compress = compress
+        self.gzip_requests = gzip_requests
+        self.gzipped_requests = 0
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._jobs = dict((job['name'], job) for job in (make_job(i) for i in range(jobs)))
+        self._listing = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def address(self):
+        return '%s:%d' % self._server.server_address[:2]
+
+    def start(self):
+        self._server = _Server(('127.0.0.1', 0), _Handler)
+        self._server.chronos = self
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.01})
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def job_count(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def respond(self, method, path, body):
+        """Return (status, content type, payload bytes) for one request."""
+        with self._lock:
+            self.requests += 1
+            fail = self.failure_rate and self._random.random() < self.failure_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            return self._json({'message': 'injected failure'}, 503)
+        parts = urlsplit(path)
+        route = unquote(parts.path)
+        if route.startswith('/v1/'):
+            route = route[3:]
+        query = parse_qs(parts.query)
+
+        if route == '/scheduler/jobs' and method == 'GET':
+            return 200, 'application/json', self._job_listing()
+        if route == '/scheduler/jobs/search' and method == 'GET':
+            name = query.get('name', [''])[0]
+            with self._lock:
+                return self._json([job for job in self._jobs.values() if name in job['name']])
+        if route in ('/scheduler/iso8601', '/scheduler/dependency') and method in ('POST', 'PUT'):
+            job = json.loads(body.decode('utf-8'))
+            with self._lock:
+                stored = self._jobs.get(job['name'], {})
+                stored.update(job)
+                self._jobs[job['name']] = stored
+                self._listing = None
+            return 204, 'application/json', b''
+        if route.startswith('/scheduler/job/stat/') and method == 'GET':
+            return self._json({'histogram': {'75thPercentile': 1.0, '99thPercentile': 2.5, 'count': 10}})
+        if route.startswith('/scheduler/job/') and method in ('PUT', 'DELETE'):
+            name = route[len('/scheduler/job/'):]
+            with self._lock:
+                if name not in self._jobs:
+                    return self._json({'message': 'no such job'}, 400)
+                if method == 'DELETE':
+                    del self._jobs[name]
+                    self._listing = None
+            return 204, 'application/json', b''
+        if route.startswith('/scheduler/stats/') and method == 'GET':
+            return self._json(self._timings(route[len('/scheduler/stats/'):]))
+        if route.startswith('/scheduler/task/kill/') and method == 'DELETE':
+            return 204, 'application/json', b''
+        if route == '/scheduler/graph/csv' and method == 'GET':
+            return 200, 'text/plain', self._graph()
+        if route == '/scheduler/leader' and method == 'GET':
+            return self._json({'leader': self.address})
+        if route == '/metrics' and method == 'GET':
+            return self._json({'version': '3.0.0', 'gauges': {'jvm.memory.heap.used': {'value': 1}}})
+        return self._json({'message': 'not found: %s %s' % (method, route)}, 404)
+
+    def _job_listing(self):
+        with self._lock:
+            if self._listing is None:
+                self._listing = json.dumps(list(self._jobs.values())).encode('utf-8')
+            return self._listing
+
+    def _timings(self, stat):
+        scale = {'99thPercentile': 4.0, '98thPercentile': 3.5, '95thPercentile': 3.0, '75thPercentile': 2.0}
+        with self._lock:
+            return [
+                {'jobNameLabel': name, 'time': scale.get(stat, 1.0) * (index % 97)}
+                for index, name in enumerate(sorted(self._jobs))
+            ]
+
+    def _graph(self):
+        lines = []
+        with self._lock:
+            for job in self._jobs.values():
+                lines.append('node,%s,success,idle' % job['name'])
+                for parent in job.get('parents', ()):
+                    lines.append('link,%s,%s' % (parent, job['name']))
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+    @staticmethod
+    def _json(payload, status=200):
+        return status, 'application/json', json.dumps(payload).encode('utf-8')
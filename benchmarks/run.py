@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+"""Benchmarks for chronos-python against an in-process fake Chronos.
+
+Prints one JSON document with the results; with --output, also appends it
+as a line to that file so runs can be compared over time:
+
+    python benchmarks/run.py --jobs 20000 --output bench.jsonl
+    python benchmarks/run.py --jobs 1000 --latency 0.005 --failure-rate 0.05 --only bulk
+"""
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import chronos  # noqa: E402
+from benchmarks.fake_chronos import FakeChronos, make_job  # noqa: E402
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# fields Chronos adds to a job; job files don't have them
+SERVER_FIELDS = ('successCount', 'errorCount', 'errorsSinceLastSuccess', 'lastSuccess', 'lastError')
+
+
+def timed(func, repeat=1):
+    """Best wall-clock time of `repeat` calls to func()."""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def peak_memory(func):
+    """Peak bytes allocated by func(), or None where tracemalloc isn't available."""
+    if tracemalloc is None:
+        return None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def job_definition(index):
+    job = make_job(index)
+    for field in SERVER_FIELDS:
+        job.pop(field)
+    return job
+
+
+def fake(args, jobs=None, **kwargs):
+    options = dict(latency=args.latency, failure_rate=args.failure_rate)
+    options.update(kwargs)
+    return FakeChronos(args.jobs if jobs is None else jobs, **options)
+
+
+def closed_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def bench_list(args):
+    """list() and iter_jobs() throughput and peak memory."""
+    with fake(args) as server:
+        client = chronos.connect(server.address)
+        client.list()
+        seconds = timed(client.list, args.repeat)
+        iter_seconds = timed(lambda: sum(1 for _ in client.iter_jobs()), args.repeat)
+        records_seconds = timed(lambda: client.list(as_records=True), args.repeat)
+        result = OrderedDict([
+            ('jobs', args.jobs),
+            ('list_seconds', seconds),
+            ('list_jobs_per_second', args.jobs / seconds),
+            ('list_peak_bytes', peak_memory(client.list)),
+            ('iter_jobs_seconds', iter_seconds),
+            ('iter_jobs_peak_bytes', peak_memory(lambda: sum(1 for _ in client.iter_jobs()))),
+            ('records_seconds', records_seconds),
+            ('records_peak_bytes', peak_memory(lambda: client.list(as_records=True))),
+        ])
+        client.close()
+    return result
+
+
+def bench_codec(args):
+    """list() time and peak memory with each JSON codec that is installed."""
+    result = OrderedDict([('jobs', args.jobs)])
+    with fake(args) as server:
+        for name in sorted(chronos.CODECS):
+            try:
+                client = chronos.connect(server.address, codec=name)
+            except ImportError:
+                continue
+            client.list()
+            result['%s_list_seconds' % name] = timed(client.list, args.repeat)
+            result['%s_list_peak_bytes' % name] = peak_memory(client.list)
+            client.close()
+    return result
+
+
+def bench_bulk(args):
+    """add_many() and update_many() throughput."""
+    jobs = [job_definition(i) for i in range(args.bulk_jobs)]
+    with fake(args, jobs=0) as server:
+        client = chronos.connect(server.address)
+        start = time.time()
+        added = client.add_many(jobs, max_workers=args.workers).failed
+        add_seconds = time.time() - start
+        for job in jobs:
+            job['command'] = 'true'
+        start = time.time()
+        updated = client.update_many(jobs, max_workers=args.workers).failed
+        update_seconds = time.time() - start
+        client.close()
+        requests = server.requests
+    return OrderedDict([
+        ('jobs', len(jobs)),
+        ('workers', args.workers),
+        ('add_seconds', add_seconds),
+        ('add_jobs_per_second', len(jobs) / add_seconds),
+        ('add_failures', len(added)),
+        ('update_seconds', update_seconds),
+        ('update_jobs_per_second', len(jobs) / update_seconds),
+        ('update_failures', len(updated)),
+        ('requests', requests),
+    ])
+
+
+def bench_failover(args):
+    """Latency of calls when the first server refuses connections or answers 503."""
+    calls = 20
+    result = OrderedDict()
+    with fake(args, jobs=10) as good, fake(args, jobs=10, failure_rate=1.0) as bad:
+        for name, first in (('refused', '127.0.0.1:%d' % closed_port()), ('unavailable', bad.address)):
+            client = chronos.connect([first, good.address], retry_policy=chronos.RetryPolicy(jitter=False))
+            result['%s_first_call_seconds' % name] = timed(client.metrics)
+            result['%s_later_call_seconds' % name] = timed(lambda: [client.metrics() for _ in range(calls)]) / calls
+            client.close()
+        client = chronos.connect(good.address)
+        client.metrics()
+        result['healthy_call_seconds'] = timed(lambda: [client.metrics() for _ in range(calls)]) / calls
+        client.close()
+    return result
+
+
+def bench_stats(args):
+    """scheduler_stats() against the six percentile calls and metrics() one after another."""
+    with fake(args) as server:
+        client = chronos.connect(server.address)
+        calls = (
+            client.scheduler_stat_99th, client.scheduler_stat_98th, client.scheduler_stat_95th,
+            client.scheduler_stat_75th, client.scheduler_stat_median, client.scheduler_stat_mean, client.metrics,
+        )
+        sequential = timed(lambda: [call() for call in calls], args.repeat)
+        concurrent = timed(client.scheduler_stats, args.repeat)
+        stats = client.scheduler_stats()
+        rank = timed(lambda: stats.top(10), args.repeat)
+        client.close()
+    return OrderedDict([
+        ('jobs', args.jobs),
+        ('sequential_seconds', sequential),
+        ('scheduler_stats_seconds', concurrent),
+        ('top_10_seconds', rank),
+    ])
+
+
+def bench_schedule(args):
+    """Parsing every schedule and finding stalled jobs, with and without numpy."""
+    jobs = [make_job(index) for index in range(args.jobs)]
+    result = OrderedDict([('jobs', args.jobs)])
+    for backend, use_numpy in (('python', False), ('numpy', True)):
+        try:
+            table = chronos.ScheduleTable.from_jobs(jobs, use_numpy=use_numpy)
+        except ImportError:
+            continue
+        result['%s_parse_seconds' % backend] = timed(
+            lambda: chronos.ScheduleTable.from_jobs(jobs, use_numpy=use_numpy), args.repeat,
+        )
+        result['%s_overdue_seconds' % backend] = timed(table.overdue, args.repeat)
+    return result
+
+
+STARTUP_CODE = '''
+import json, sys, time
+start = time.time()
+import chronos
+imported = time.time()
+client = chronos.connect(sys.argv[1], transport=sys.argv[2])
+client.leader()
+print(json.dumps([imported - start, time.time() - imported]))
+'''
+
+
+def bench_startup(args):
+    """Interpreter startup, `import chronos` and the first request of a fresh process, per transport."""
+    result = OrderedDict()
+    env = dict(os.environ)
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    result['python_seconds'] = timed(lambda: subprocess.check_call([sys.executable, '-c', 'pass']), args.repeat)
+    with fake(args, jobs=10) as server:
+        for transport in sorted(chronos.TRANSPORTS):
+            runs = []
+            for _ in range(args.repeat):
+                with open(os.devnull, 'w') as devnull:
+                    try:
+                        output = subprocess.check_output(
+                            [sys.executable, '-c', STARTUP_CODE, server.address, transport], env=env, stderr=devnull,
+                        )
+                    except subprocess.CalledProcessError:
+                        break
+                runs.append(json.loads(output.decode('utf-8')))
+            if runs:
+                result['%s_import_seconds' % transport] = min(run[0] for run in runs)
+                result['%s_first_request_seconds' % transport] = min(run[1] for run in runs)
+    return result
+
+
+def run_script(name, *argv):
+    env = dict(os.environ)
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    start = time.time()
+    with open(os.devnull, 'w') as devnull:
+        code = subprocess.call([sys.executable, os.path.join(ROOT, 'bin', name)] + list(argv), stdout=devnull, env=env)
+    return time.time() - start, code
+
+
+def bench_scripts(args):
+    """End-to-end runtimes of chronos-sync-jobs.py and chronos-nagios.py."""
+    result = OrderedDict()
+    tmpdir = tempfile.mkdtemp()
+    try:
+        jobs_dir = os.path.join(tmpdir, 'jobs')
+        for index in range(args.sync_jobs):
+            directory = os.path.join(jobs_dir, 'team-%d' % (index % 50))
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            with open(os.path.join(directory, 'job-%06d.json' % index), 'w') as f:
+                json.dump(job_definition(index), f, indent=4)
+        state = os.path.join(tmpdir, 'state.json')
+        with fake(args, jobs=0) as server:
+            sync = ['--hostname', server.address, '--sync', jobs_dir]
+            result['sync_jobs'] = args.sync_jobs
+            result['sync_add_seconds'], _ = run_script('chronos-sync-jobs.py', *(sync + ['--parallel', '16']))
+            result['sync_noop_seconds'], _ = run_script('chronos-sync-jobs.py', *sync)
+            result['sync_state_first_seconds'], _ = run_script('chronos-sync-jobs.py', *(sync + ['--state', state]))
+            result['sync_state_noop_seconds'], _ = run_script('chronos-sync-jobs.py', *(sync + ['--state', state]))
+            result['sync_jobs_on_server'] = server.job_count()
+        with fake(args) as server:
+            result['nagios_jobs'] = args.jobs
+            result['nagios_seconds'], _ = run_script('chronos-nagios.py', '--hostname', server.address)
+            result['nagios_prefix_seconds'], _ = run_script(
+                'chronos-nagios.py', '--hostname', server.address,
+                '--prefix', 'bench-job-00', '--exclude', 'bench-job-001',
+            )
+    finally:
+        shutil.rmtree(tmpdir)
+    return result
+
+
+BENCHMARKS = OrderedDict([
+    ('list', bench_list),
+    ('codec', bench_codec),
+    ('bulk', bench_bulk),
+    ('failover', bench_failover),
+    ('stats', bench_stats),
+    ('schedule', bench_schedule),
+    ('startup', bench_startup),
+    ('scripts', bench_scripts),
+])
+
+
+def git_revision():
+    try:
+        with open(os.devnull, 'w') as devnull:
+            output = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, stderr=devnull)
+        return output.decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark chronos-python against a fake Chronos server")
+    parser.add_argument("--jobs", type=int, default=1000, help="jobs on the fake server for list and nagios runs")
+    parser.add_argument("--bulk-jobs", type=int, default=1000, help="jobs to add and update in the bulk benchmark")
+    parser.add_argument("--sync-jobs", type=int, default=500, help="job files for the chronos-sync-jobs.py runs")
+    parser.add_argument("--workers", type=int, default=16, help="max_workers for bulk calls")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every fake server response")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="fraction of fake server responses that are 503s")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per measurement; the best is reported")
+    parser.add_argument("--only", action="append", choices=list(BENCHMARKS),
+                        help="run only this benchmark (may be repeated)")
+    parser.add_argument("--output", metavar="FILE", help="append the results as a JSON line to FILE")
+    args = parser.parse_args(argv)
+
+    report = OrderedDict([
+        ('timestamp', time.time()),
+        ('revision', git_revision()),
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('options', OrderedDict((key, value) for key, value in sorted(vars(args).items()) if key != 'output')),
+        ('results', OrderedDict()),
+    ])
+    for name in args.only or BENCHMARKS:
+        report['results'][name] = BENCHMARKS[name](args)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'a') as f:
+            f.write(json.dumps(report) + '\n')
+    return report
+
+
+if __name__ == '__main__':
+    # failovers are expected here; keep their error logs out of the report
+    logging.getLogger('chronos').setLevel(logging.CRITICAL)
+    main()
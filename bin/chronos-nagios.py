@@ -26,7 +26,28 @@ import sys
 import re
 import argparse
 import logging
-import chronos
+import os
+import signal
+import socket
+import stat
+import threading
+import time
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn, UnixStreamServer
+    from urllib import urlencode
+    from urlparse import parse_qs, urlsplit
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn, UnixStreamServer
+    from urllib.parse import parse_qs, urlencode, urlsplit
+
+# chronos is imported where it's used, so --daemon checks don't pay for importing the client
+
+REGEX_CHARS = set('.^$*+?{}[]\\|()')
+
+UNKNOWN = 3
 
 
 def match_prefix(prefixes=[], job=''):
@@ -36,9 +57,283 @@ def match_prefix(prefixes=[], job=''):
     return False
 
 
+def names_matching(catalog, prefixes):
+    """Names of the jobs in `catalog` starting with any of `prefixes`.
+
+    Plain prefixes are looked up in the catalog's index; ones using regular
+    expression syntax fall back to scanning every name.
+    """
+    names = set()
+    for prefix in prefixes:
+        if REGEX_CHARS.intersection(prefix):
+            names.update(name for name in catalog if match_prefix([prefix], name))
+        else:
+            names.update(catalog.names_with_prefix(prefix))
+    return names
+
+
+class JobSnapshot(object):
+    """One job listing, indexed for checks unless `index` is False.
+
+    The index pays off in the daemon, which answers many checks from one
+    listing; a single check is cheaper as a scan of the listing.
+    """
+
+    def __init__(self, cjobs, index=True):
+        self.jobs = cjobs
+        self.catalog = None
+        if index:
+            import chronos
+            self.catalog = chronos.JobCatalog(cjobs)
+            self.positions = dict((job['name'], position) for position, job in enumerate(cjobs))
+        self.taken = time.time()
+        self._schedules = None
+        self._stalled = {}
+        self._lock = threading.Lock()
+
+    def stalled(self, grace):
+        """Names of the jobs that missed a scheduled run by more than epsilon + `grace` seconds when this was taken."""
+        with self._lock:
+            stalled = self._stalled.get(grace)
+            if stalled is None:
+                if self._schedules is None:
+                    import chronos
+                    self._schedules = chronos.ScheduleTable.from_jobs(self.jobs)
+                stalled = self._stalled[grace] = set(self._schedules.overdue(self.taken, grace))
+        return stalled
+
+    def check(self, prefix=None, exclude=None, warn=1, crit=1, stalled=None):
+        """Return (exit code, Nagios output) for the jobs selected by `prefix` and `exclude`.
+
+        With `stalled` (seconds of grace), jobs that stopped running on schedule count as failed too.
+        """
+        fails = []
+        ok = []
+        unknown = []
+        late = self.stalled(float(stalled)) if stalled is not None else ()
+        stuck = 0
+
+        for job in self.select(prefix, exclude):
+            name = job['name']
+            if job['disabled']:
+                continue
+
+            if job['lastError'] > job['lastSuccess']:
+                fails.append(job['name'].encode('ascii'))
+            elif name in late:
+                fails.append(job['name'].encode('ascii'))
+                stuck += 1
+            elif job['lastSuccess']:
+                ok.append(job['name'].encode('ascii'))
+            else:
+                unknown.append(job['name'].encode('ascii'))
+
+        if len(unknown) > 0:
+            umsg = "(%d waiting for execution or with no data)" % len(unknown)
+        else:
+            umsg = ''
+        if stuck:
+            umsg = "(%d stalled) %s" % (stuck, umsg)
+
+        if len(fails) == 0:
+            return 0, "OK: %d jobs succeeded on last run %s" % (len(ok), umsg)
+        elif len(fails) >= int(crit):
+            return 2, "CRITICAL: %d failed jobs: %s %s" % (len(fails), str(fails).strip('[]'), umsg)
+        elif len(fails) >= int(warn):
+            return 1, "WARNING: %d failed jobs: %s %s" % (len(fails), str(fails).strip('[]'), umsg)
+        return 0, None
+
+    def select(self, prefix=None, exclude=None):
+        """The jobs matching any of `prefix` (all if None) and none of `exclude`, in listing order."""
+        catalog = self.catalog
+        if catalog is None:
+            return [
+                job for job in self.jobs
+                if (not isinstance(prefix, list) or match_prefix(prefix, job['name']))
+                and not (isinstance(exclude, list) and match_prefix(exclude, job['name']))
+            ]
+        names = names_matching(catalog, prefix) if isinstance(prefix, list) else set(catalog)
+        if isinstance(exclude, list):
+            names -= names_matching(catalog, exclude)
+        return [catalog.get(name) for name in sorted(names, key=self.positions.get)]
+
+
+def fetch_snapshot(client, index=True):
+    cjobs = client.list()
+    if not isinstance(cjobs, list):
+        return None
+    return JobSnapshot(cjobs, index)
+
+
+class CheckDaemon(object):
+    """Keeps a refreshed JobSnapshot and answers checks against it.
+
+    The listing is fetched every `refresh` seconds over one client. If no
+    listing could be fetched for `max_age` seconds, checks return UNKNOWN.
+    """
+
+    def __init__(self, client, refresh=30.0, max_age=None):
+        self.client = client
+        self.refresh = refresh
+        self.max_age = refresh * 3 if max_age is None else max_age
+        self.snapshot = None
+        self._stopped = threading.Event()
+
+    def update(self):
+        try:
+            snapshot = fetch_snapshot(self.client)
+        except Exception as e:
+            logging.warning("Error refreshing the job listing: %s", e)
+            return
+        if snapshot is not None:
+            self.snapshot = snapshot
+
+    def run(self):
+        while not self._stopped.wait(self.refresh):
+            self.update()
+
+    def start(self):
+        self.update()
+        thread = threading.Thread(target=self.run)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def check(self, **kwargs):
+        snapshot = self.snapshot
+        if snapshot is None or time.time() - snapshot.taken > self.max_age:
+            return UNKNOWN, "UNKNOWN: error querying chronos"
+        return snapshot.check(**kwargs)
+
+
+class CheckHandler(BaseHTTPRequestHandler):
+    """GET /check?prefix=..&exclude=..&warn=..&crit=.. answers with the Nagios output and X-Nagios-Code."""
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path != '/check':
+            self.respond(404, UNKNOWN, "UNKNOWN: no such endpoint %s" % parts.path)
+            return
+        query = parse_qs(parts.query)
+        code, output = self.server.daemon.check(
+            prefix=query.get('prefix'), exclude=query.get('exclude'),
+            warn=query.get('warn', [1])[0], crit=query.get('crit', [1])[0], stalled=query.get('stalled', [None])[0],
+        )
+        self.respond(200, code, output)
+
+    def respond(self, status, code, output):
+        body = ('' if output is None else output).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Nagios-Code', str(code))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else 'local'
+
+    def log_message(self, format, *args):
+        logging.debug(format, *args)
+
+
+class TCPCheckServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class UnixCheckServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def is_unix_address(address):
+    return address.startswith('/') or address.startswith('.')
+
+
+def remove_socket(path):
+    """Remove the Unix socket at `path`, if any. Returns False, leaving it alone, if something else is there."""
+    if not os.path.lexists(path):
+        return True
+    if not stat.S_ISSOCK(os.stat(path).st_mode):
+        return False
+    os.unlink(path)
+    return True
+
+
+def check_server(address, daemon):
+    """An HTTP server for `daemon` on a Unix socket path or a host:port.
+
+    Raises ValueError if the socket path is taken by something other than a socket.
+    """
+    if is_unix_address(address):
+        if not remove_socket(address):
+            raise ValueError("%s exists and is not a socket; not replacing it" % address)
+        server = UnixCheckServer(address, CheckHandler)
+    else:
+        host, _, port = address.rpartition(':')
+        server = TCPCheckServer((host or '127.0.0.1', int(port)), CheckHandler)
+    server.daemon = daemon
+    return server
+
+
+def serve(args):
+    import chronos
+    daemon = CheckDaemon(chronos.connect(args.hostname), refresh=args.refresh)
+    try:
+        server = check_server(args.serve, daemon)
+    except ValueError as e:
+        sys.exit("chronos-nagios.py: %s" % e)
+    daemon.start()
+    # exit through the cleanup below on SIGTERM too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    logging.warning("Serving checks for %s on %s", args.hostname, args.serve)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+        server.server_close()
+        if is_unix_address(args.serve) and not remove_socket(args.serve):
+            logging.warning("Not removing %s, which is no longer a socket", args.serve)
+
+
+def query_daemon(address, params, timeout=10.0):
+    """Ask the daemon at `address` for a check; return (exit code, output)."""
+    if is_unix_address(address):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        target = address
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        host, _, port = address.rpartition(':')
+        target = (host or '127.0.0.1', int(port))
+    sock.settimeout(timeout)
+    try:
+        sock.connect(target)
+        sock.sendall(('GET /check?%s HTTP/1.0\r\n\r\n' % urlencode(params, doseq=True)).encode('ascii'))
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        sock.close()
+    head, _, body = b''.join(chunks).partition(b'\r\n\r\n')
+    code = UNKNOWN
+    for line in head.decode('latin-1').split('\r\n')[1:]:
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'x-nagios-code':
+            code = int(value)
+    return code, body.decode('utf-8') or None
+
+
 def main():
     parser = argparse.ArgumentParser(description="Monitor the status of Chronos Jobs")
-    parser.add_argument("--hostname", metavar="<host:port>", required=True,
+    parser.add_argument("--hostname", metavar="<host:port>", required=False,
                         help="hostname and port of the Chronos instance")
     parser.add_argument("--prefix", metavar="job-prefix", required=False, action="append",
                         help="if set, only check jobs matching this prefix")
@@ -48,52 +343,45 @@ def main():
                         help="warn if at least this number of jobs are currently failed")
     parser.add_argument("--crit", metavar="#", default=1,
                         help="critical if at least this number of jobs are currently failed")
+    parser.add_argument("--stalled", metavar="SECONDS", type=float, default=None,
+                        help="count jobs that missed a scheduled run by more than their epsilon plus SECONDS as failed")
+    parser.add_argument("--serve", metavar="<socket path or host:port>",
+                        help="run as a daemon answering checks from a job listing refreshed every --refresh seconds")
+    parser.add_argument("--refresh", metavar="SECONDS", type=float, default=30.0,
+                        help="with --serve, how often to fetch the job listing (default: 30)")
+    parser.add_argument("--daemon", metavar="<socket path or host:port>",
+                        help="ask a chronos-nagios.py --serve daemon instead of querying Chronos")
     args = parser.parse_args()
 
-    fails = []
-    ok = []
-    unknown = []
+    if args.serve:
+        if not args.hostname:
+            parser.error("--serve requires --hostname")
+        serve(args)
+        return
 
-    c = chronos.connect(args.hostname)
-    cjobs = c.list()
-
-    if not isinstance(cjobs, list):
-        print("UNKNOWN: error querying chronos")
-        sys.exit(3)
-
-    for job in cjobs:
-        if job['disabled']:
-            continue
-
-        if isinstance(args.prefix, list):
-            if not match_prefix(args.prefix, job['name']):
-                continue
-
-        if isinstance(args.exclude, list):
-            if match_prefix(args.exclude, job['name']):
-                continue
-
-        if job['lastError'] > job['lastSuccess']:
-            fails.append(job['name'].encode('ascii'))
-        elif job['lastSuccess']:
-            ok.append(job['name'].encode('ascii'))
+    if args.daemon:
+        params = [('warn', args.warn), ('crit', args.crit)]
+        if args.stalled is not None:
+            params.append(('stalled', args.stalled))
+        params.extend(('prefix', prefix) for prefix in args.prefix or ())
+        params.extend(('exclude', exclude) for exclude in args.exclude or ())
+        try:
+            code, output = query_daemon(args.daemon, params)
+        except (OSError, socket.error) as e:
+            code, output = UNKNOWN, "UNKNOWN: error querying chronos-nagios daemon: %s" % e
+    else:
+        if not args.hostname:
+            parser.error("--hostname or --daemon is required")
+        import chronos
+        snapshot = fetch_snapshot(chronos.connect(args.hostname), index=False)
+        if snapshot is None:
+            code, output = UNKNOWN, "UNKNOWN: error querying chronos"
         else:
-            unknown.append(job['name'].encode('ascii'))
+            code, output = snapshot.check(args.prefix, args.exclude, args.warn, args.crit, args.stalled)
 
-    if len(unknown) > 0:
-        umsg = "(%d waiting for execution or with no data)" % len(unknown)
-    else:
-        umsg = ''
-
-    if len(fails) == 0:
-        print("OK: %d jobs succeeded on last run %s" % (len(ok), umsg))
-        sys.exit(0)
-    elif len(fails) >= int(args.crit):
-        print("CRITICAL: %d failed jobs: %s %s" % (len(fails), str(fails).strip('[]'), umsg))
-        sys.exit(2)
-    elif len(fails) >= int(args.warn):
-        print("WARNING: %d failed jobs: %s %s" % (len(fails), str(fails).strip('[]'), umsg))
-        sys.exit(1)
+    if output is not None:
+        print(output)
+    sys.exit(code)
 
 
 if __name__ == "__main__":
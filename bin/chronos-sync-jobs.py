@@ -24,43 +24,153 @@ from __future__ import print_function
 
 import os
 import sys
-import re
 import argparse
 import json
 import logging
 import chronos
-
-
-def read_job_file(path):
-    f = open(path, "r")
-    try:
-        job = json.loads(f.read())
-        if "name" in job:
-            return job
-    except:
-        print("Error: failed to decode %s" % path)
+from chronos.diff import diff_job, format_changes
+from chronos.sync import JobFileLoader, SyncState, dependency_waves, fetch_jobs, find_job_files, push_waves
 
 
 def find_json_files(path):
     """find /path -name *.json"""
-    job_files = []
-    for root, dirs, files in os.walk(path):
-        for file in files:
-            if re.search(r"json$", file):
-                job_files.append(root + '/' + file)
-    return sorted(job_files)
+    return list(find_job_files(path))
+
+
+def print_skipped(file, errors):
+    if file in errors:
+        print("Skipping %s: %s" % (file, errors[file]))
+    else:
+        print("Skipping %s" % file)
 
 
 def check_update(jobs, job):
-    """Return True if the job definition on Chronos != local json config"""
-    on_chronos = jobs[job['name']]
-    for key in job.keys():
-        if key in on_chronos:
-            if on_chronos[key] != job[key]:
-                return True
+    """Return the changes between the job definition on Chronos and the local json config (empty if none)"""
+    return diff_job(job, jobs[job['name']])
+
+
+def sync_parallel(c, jobs, loaded, workers, dry_run, errors=None):
+    """Push changed jobs concurrently, in waves ordered by their parents.
+
+    Returns the names of the jobs that failed to sync, with the reasons.
+    """
+    if errors is None:
+        errors = {}
+    pending = []
+    updates = set()
+    for file, job in loaded:
+        if not job:
+            print_skipped(file, errors)
+        elif job['name'] in jobs:
+            changes = check_update(jobs, job)
+            if changes:
+                print("Updating job %s from file %s" % (job['name'], file))
+                print(format_changes(changes))
+                pending.append(job)
+                updates.add(job['name'])
+            else:
+                print("Job %s defined in %s is up-to-date on Chronos" % (job['name'], file))
         else:
-            return True
-    return False
+            print("Adding job %s from file %s" % (job['name'], file))
+            pending.append(job)
+
+    waves, failed = dependency_waves(pending, existing=jobs)
+    if dry_run:
+        for number, wave in enumerate(waves, 1):
+            print("Wave %d: %s" % (number, ", ".join(job['name'] for job in wave)))
+    else:
+        for item in push_waves(c, waves, updates, max_workers=workers):
+            if item.ok:
+                print("Synced job %s" % item.name)
+            else:
+                failed[item.name] = item.exception
+
+    if failed:
+        print("Failed Jobs:")
+        for name in sorted(failed):
+            print("  %s: %s" % (name, failed[name]))
+    return failed
+
+
+def sync_serial(c, jobs, loaded, dry_run, errors=None):
+    """Push changed jobs one at a time, retrying failures. Returns the names of the jobs that failed."""
+    if errors is None:
+        errors = {}
+    retry = {'update': [], 'add': []}
+    for file, job in loaded:
+        if not job:
+            print_skipped(file, errors)
+        else:
+            if job['name'] in jobs:
+                changes = check_update(jobs, job)
+                if changes:
+                    print("Updating job %s from file %s" % (job['name'], file))
+                    print(format_changes(changes))
+                    if not dry_run:
+                        try:
+                            c.update(job)
+                        except:
+                            retry['update'].append(job)
+                else:
+                    print(
+                        "Job %s defined in %s is up-to-date on Chronos"
+                        % (job['name'], file)
+                    )
+            else:
+                print("Adding job %s from file %s" % (job['name'], file))
+                if not dry_run:
+                    try:
+                        c.add(job)
+                    except:
+                        retry['add'].append(job)
+
+    attempt = 0
+    while (len(retry['update']) > 0 or len(retry['add']) > 0) and attempt < 10:
+        attempt += 1
+        if len(retry['update']) > 0:
+            job = retry['update'].pop(0)
+            try:
+                print("Retry %d for job %s" % (attempt, job['name']))
+                c.update(job)
+            except:
+                retry['update'].append(job)
+
+        if len(retry['add']) > 0:
+            job = retry['add'].pop(0)
+            try:
+                print("Retry %d for job %s" % (attempt, job['name']))
+                c.add(job)
+            except:
+                retry['add'].append(job)
+
+    failed = retry['update'] + retry['add']
+    if len(failed) > 0:
+        print("Failed Jobs: %s" % sorted(failed, key=lambda job: job['name']))
+    return set(job['name'] for job in failed)
+
+
+def validate_loaded(c, loaded, workers=1):
+    """Check every loaded job before anything is synced. Returns the loaded jobs as a list and whether all are valid."""
+    loaded = list(loaded)
+    invalid = c.validate_many([job for file, job in loaded if job], max_workers=workers)
+    for job, error in invalid:
+        print("Invalid job %s: %s" % (job.get('name'), error))
+    return loaded, not invalid
+
+
+def sync_incremental(c, state, job_files, full, workers):
+    """Load only the job files that changed since they were last synced, and the jobs they need from Chronos."""
+    loaded = state.scan(job_files, full, max_workers=workers)
+    if full:
+        print("Reconciling all %d job files with Chronos" % len(job_files))
+        return dict((job['name'], job) for job in c.list()), loaded
+    print("%d of %d job files changed since the last sync" % (len(loaded), len(job_files)))
+    names = set()
+    for file, job in loaded:
+        if job:
+            names.add(job['name'])
+            names.update(job.get('parents') or [])
+    return fetch_jobs(c, names), loaded
 
 
 def main():
@@ -74,73 +184,69 @@ def main():
     group.add_argument("--list", action="store_true", help="list jobs on chronos")
     parser.add_argument("-n", action="store_true", default=False,
                         help="dry-run, don't actually push anything to chronos")
+    parser.add_argument("--parallel", metavar="N", type=int, default=None,
+                        help="push up to N jobs concurrently, adding dependent jobs only after their parents")
+    parser.add_argument("--state", metavar="/path/to/state.json",
+                        help="only sync job files that changed since the last run, as recorded in this file")
+    parser.add_argument("--reconcile-every", metavar="SECONDS", type=float, default=None,
+                        help="with --state, check every job against Chronos if the last full check is this old")
+    parser.add_argument("--full", action="store_true", default=False,
+                        help="with --state, check every job against Chronos now")
+    parser.add_argument("--load-workers", metavar="N", type=int, default=8,
+                        help="read and decode up to N job files at once")
+    parser.add_argument("--validate", action="store_true", default=False,
+                        help="check every job file first, and sync nothing if any job is invalid")
+    parser.add_argument("--validate-workers", metavar="N", type=int, default=1,
+                        help="with --validate, check the jobs in N processes (for many thousands of jobs)")
+    parser.add_argument("--strict", action="store_true", default=False,
+                        help="also check job field types and the syntax of schedule and epsilon")
     args = parser.parse_args()
 
-    c = chronos.connect(args.hostname)
-    cjobs = c.list()
+    c = chronos.connect(args.hostname, strict_validation=args.strict)
 
     if args.list:
+        cjobs = c.list()
         # cjobs isn't json but this still gets us the pretty
         print(json.dumps(cjobs, sort_keys=True, indent=4))
         sys.exit(0)
 
     if args.sync:
-        jobs = {}
-        retry = {'update': [], 'add': []}
-        for job in cjobs:
-            jobs[job["name"]] = job
-
         if not os.path.isdir(args.sync):
             raise Exception("%s must be a directory" % args.sync)
 
-        job_files = find_json_files(args.sync)
-        for file in job_files:
-            job = read_job_file(file)
-            if not job:
-                print("Skipping %s" % file)
-            else:
-                if job['name'] in jobs:
-                    if check_update(jobs, job):
-                        print("Updating job %s from file %s" % (job['name'], file))
-                        if not args.n:
-                            try:
-                                c.update(job)
-                            except:
-                                retry['update'].append(job)
-                    else:
-                        print(
-                            "Job %s defined in %s is up-to-date on Chronos"
-                            % (job['name'], file)
-                        )
-                else:
-                    print("Adding job %s from file %s" % (job['name'], file))
-                    if not args.n:
-                        try:
-                            c.add(job)
-                        except:
-                            retry['add'].append(job)
-
-        attempt = 0
-        while (len(retry['update']) > 0 or len(retry['add']) > 0) and attempt < 10:
-            attempt += 1
-            if len(retry['update']) > 0:
-                job = retry['update'].pop(0)
-                try:
-                    print("Retry %d for job %s" % (attempt, job['name']))
-                    c.update(job)
-                except:
-                    retry['update'].append(job)
-
-            if len(retry['add']) > 0:
-                job = retry['add'].pop(0)
-                try:
-                    print("Retry %d for job %s" % (attempt, job['name']))
-                    c.add(job)
-                except:
-                    retry['add'].append(job)
-
-        if len(retry['update']) > 0 or len(retry['add']) > 0:
-            print("Failed Jobs: %s" % sorted((retry['update'] + retry['add'])))
+        if args.state:
+            state = SyncState.load(args.state)
+            full = args.full or state.reconcile_due(args.reconcile_every)
+            jobs, loaded = sync_incremental(c, state, find_json_files(args.sync), full, args.load_workers)
+            errors = state.errors
+        else:
+            jobs = dict((job['name'], job) for job in c.list())
+            # jobs are diffed and pushed as they load
+            loader = JobFileLoader(args.load_workers)
+            loaded = loader.load(find_job_files(args.sync))
+            errors = loader.errors
+
+        if args.validate:
+            loaded, valid = validate_loaded(c, loaded, args.validate_workers)
+            if not valid:
+                sys.exit(1)
+
+        if args.parallel:
+            failed = sync_parallel(c, jobs, loaded, args.parallel, args.n, errors)
+        else:
+            failed = sync_serial(c, jobs, loaded, args.n, errors)
+
+        if args.state and not args.n:
+            for file, job in loaded:
+                if job and job['name'] not in failed:
+                    state.mark_synced(file, job)
+            if full:
+                state.mark_full()
+            state.save()
+
+        # in every mode, any job file that couldn't be loaded or synced fails the run
+        if failed or errors:
+            sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -22,10 +22,18 @@
 # IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN
 # CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
-import httplib2
-import socket
-import json
+import importlib
 import logging
+import sys
+import time
+import weakref
+
+from chronos import validation
+from chronos.job import ChronosJob, as_dict
+from chronos.pool import ConnectionPool
+from chronos.retry import RetryPolicy
+from chronos.routing import ServerRouter
+from chronos.validation import JobValidator, Problem, compile_validator  # noqa: F401
 
 # Python 3 changed the submodule for quote
 try:
@@ -39,8 +47,50 @@ try:
 except ImportError:
     from urllib.parse import urlencode
 
+try:
+    from urlparse import urlsplit
+except ImportError:
+    from urllib.parse import urlsplit
+
 SCHEDULER_API_VERSIONS = ('v1',)
 
+# names re-exported from the optional subsystems, by module; each is imported
+# on first use, so importing chronos costs only what list() and add() need
+_LAZY = dict(
+    [(name, 'cache') for name in ('ResponseCache',)]
+    + [(name, 'catalog') for name in ('JobCatalog',)]
+    + [(name, 'codec') for name in ('CODECS', 'JSONCodec', 'make_codec')]
+    + [(name, 'graph') for name in ('JobGraph',)]
+    + [(name, 'instrumentation') for name in ('Instrumentation', 'MetricsCollector', 'endpoint_label')]
+    + [(name, 'metrics') for name in ('MetricsDelta', 'MetricsHistory', 'MetricsSnapshot', 'MetricTable')]
+    + [(name, 'schedule') for name in ('Schedule', 'ScheduleTable', 'parse_schedule')]
+    + [(name, 'stats') for name in ('STAT_PATHS', 'JobTimings', 'SchedulerStats')]
+    + [(name, 'transport') for name in ('TRANSPORTS', 'Transport', 'make_transport')]
+    + [(name, 'watch') for name in ('JobEvent', 'JobWatcher')]
+)
+
+
+def _import_lazy(name):
+    value = getattr(importlib.import_module('chronos.' + _LAZY[name]), name)
+    globals()[name] = value
+    return value
+
+
+if sys.version_info < (3, 7):
+    # no module __getattr__; keep chronos.httplib2 and the re-exports available the eager way
+    import httplib2  # noqa: F401
+    for _name in _LAZY:
+        _import_lazy(_name)
+else:
+    def __getattr__(name):
+        # chronos.httplib2 used to be imported here; import it only when asked for
+        if name == 'httplib2':
+            import httplib2 as module
+            return module
+        if name in _LAZY:
+            return _import_lazy(name)
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
 
 class ChronosError(Exception):
     pass
@@ -55,7 +105,11 @@ class UnauthorizedError(ChronosAPIError):
 
 
 class ChronosValidationError(ChronosError):
-    pass
+    """An invalid job definition; `problems` lists everything wrong with it as Problem tuples."""
+
+    def __init__(self, message='', problems=()):
+        super(ChronosValidationError, self).__init__(message)
+        self.problems = list(problems)
 
 
 class MissingFieldError(ChronosValidationError):
@@ -66,6 +120,10 @@ class OneOfViolationError(ChronosValidationError):
     pass
 
 
+class InvalidFieldError(ChronosValidationError):
+    pass
+
+
 class ChronosClient(object):
     _user = None
     _password = None
@@ -73,7 +131,10 @@ class ChronosClient(object):
     def __init__(
         self, servers, proto="http", username=None, password=None,
         extra_headers=None, scheduler_api_version='v1',
-        validate_ssl_certificates=True,
+        validate_ssl_certificates=True, pool_size=10, pool_idle_timeout=60.0,
+        pool_max_lifetime=600.0, breaker_threshold=3, breaker_reset_timeout=30.0,
+        probe_interval=None, retry_policy=None, cache=None, instrumentation=None, transport='httplib2',
+        codec='json', compress_requests=None, strict_validation=False,
     ):
         server_list = servers if isinstance(servers, list) else [servers]
         self.servers = ["%s://%s" % (proto, server) for server in server_list]
@@ -89,11 +150,100 @@ class ChronosClient(object):
                 raise ChronosAPIError('scheduler_api_version not supported yet: %s' % scheduler_api_version)
             self._prefix = "/%s" % (scheduler_api_version,)
         self.scheduler_api_version = scheduler_api_version
+        from chronos.codec import make_codec
+        from chronos.metrics import MetricTable
+        from chronos.transport import make_transport
         self.disable_ssl_certificate_validation = not validate_ssl_certificates
-
-    def list(self):
-        """List all jobs on Chronos."""
-        return self._call("/scheduler/jobs", "GET")
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.codec = make_codec(codec)
+        self.compress_requests = compress_requests
+        self.strict_validation = strict_validation
+        # servers that rejected a gzipped request body
+        self._plain_servers = set()
+        self.transport = make_transport(
+            transport, timeout=self.retry_policy.read_timeout, connect_timeout=self.retry_policy.connect_timeout,
+            validate_ssl_certificates=validate_ssl_certificates,
+            credentials=(self._user, self._password) if self._user and self._password else None,
+        )
+        if cache is True:
+            from chronos.cache import ResponseCache
+            cache = ResponseCache()
+        self.cache = cache
+        self.instrumentation = instrumentation
+        self._catalogs = weakref.WeakSet()
+        self._metric_table = MetricTable()
+        self.pool = ConnectionPool(
+            self._new_connection, maxsize=pool_size, idle_timeout=pool_idle_timeout,
+            max_lifetime=pool_max_lifetime,
+        )
+        self.router = ServerRouter(
+            self.servers, failure_threshold=breaker_threshold, reset_timeout=breaker_reset_timeout,
+        )
+        if probe_interval:
+            self.start_health_probe(probe_interval)
+
+    def close(self):
+        """Stop health probing and close all idle pooled connections."""
+        self.stop_health_probe()
+        self.pool.clear()
+
+    def start_health_probe(self, interval=10.0):
+        """Probe every server in the background to rank them by leadership and latency."""
+        self.router.start_probing(self._probe, interval)
+
+    def stop_health_probe(self):
+        self.router.stop_probing()
+
+    def pool_stats(self):
+        """Connection pool counters: hits, new_connections, evictions and idle connections per server."""
+        return self.pool.stats()
+
+    def list(self, as_records=False):
+        """List all jobs on Chronos.
+
+        With `as_records`, jobs are returned as ChronosJob records instead of dicts.
+        """
+        jobs = self._cached(('list',), self._call, "/scheduler/jobs", "GET")
+        if as_records:
+            return self._then(jobs, ChronosJob.from_list)
+        return jobs
+
+    def iter_jobs(self, fields=None, chunk_size=65536, as_records=False):
+        """Yield jobs one at a time, decoding /scheduler/jobs as it downloads.
+
+        Unlike list(), memory use doesn't grow with the number of jobs.
+        `fields`, if given, cuts each job down to those keys.
+        """
+        from chronos.stream import iter_json_array
+        try:
+            for job in iter_json_array(self._stream("/scheduler/jobs", chunk_size), fields):
+                yield ChronosJob(job) if as_records else job
+        except ValueError as e:
+            raise ChronosAPIError('Invalid job listing from Chronos: %s' % e)
+
+    def watch_jobs(self, interval=5.0, max_interval=None, coalesce=1.0, initial=False):
+        """Poll the job listing and yield a JobEvent for each change, forever.
+
+        Events are ADDED, REMOVED, CHANGED (definition), SUCCEEDED and
+        FAILED (``lastSuccess``/``lastError`` advanced) and ERRORS
+        (``errorsSinceLastSuccess`` changed). The listing is streamed with
+        iter_jobs() and only a small state per job is kept between polls.
+        Polls slow down from `interval` to `max_interval` (4 * `interval`
+        by default) while nothing changes, and a burst of changes is
+        coalesced by re-polling every `coalesce` seconds until it settles.
+        With `initial`, the jobs of the first listing are reported as ADDED.
+        """
+        from chronos.watch import JobWatcher
+        watcher = JobWatcher(interval, max_interval, coalesce, initial=initial)
+        return watcher.watch(self.iter_jobs)
+
+    def catalog(self, as_records=False):
+        """Build a JobCatalog of all jobs, indexed for fast lookups.
+
+        The catalog is kept up to date as jobs are added, updated or deleted
+        through this client.
+        """
+        return self._then(self.list(as_records), lambda jobs: self._track_catalog(jobs, as_records))
 
     def search(self, name=None, command=None):
         """Searches for jobs that match the criteria."""
@@ -104,27 +254,56 @@ class ChronosClient(object):
         if command:
             params['command'] = command
 
-        return self._call('/scheduler/jobs/search', 'GET', params=params)
+        return self._cached(('search', name, command), self._call, '/scheduler/jobs/search', 'GET', params=params)
 
     def delete(self, name):
         """Delete a job by name"""
         path = "/scheduler/job/%s" % name
-        return self._call(path, "DELETE")
+        response = self._mutate(name, True, path, "DELETE")
+        return self._then(response, lambda response: self._catalog_remove(name, response))
 
     def delete_tasks(self, name):
         """Terminate all tasks for a running/stuck job"""
         path = "/scheduler/task/kill/%s" % name
-        return self._call(path, "DELETE")
+        return self._mutate(name, False, path, "DELETE")
 
     def run(self, name):
         """Run a job by name"""
         path = "/scheduler/job/%s" % name
-        return self._call(path, "PUT")
+        return self._mutate(name, False, path, "PUT")
 
     def add(self, job_def, update=False):
         """Schedule a new job"""
-        path = "/scheduler/iso8601"
+        job_def = as_dict(job_def)
         self._check_fields(job_def)
+        return self._send_job(job_def, update)
+
+    def update(self, job_def):
+        """Update an existing job by name"""
+        return self.add(job_def, update=True)
+
+    def add_many(self, job_defs, max_workers=8):
+        """Schedule many new jobs concurrently.
+
+        Every definition is validated before anything is sent; invalid ones
+        are reported as failed. Returns a BulkResult.
+        """
+        return self._bulk_jobs(job_defs, False, max_workers)
+
+    def update_many(self, job_defs, max_workers=8):
+        """Update many existing jobs concurrently. Returns a BulkResult."""
+        return self._bulk_jobs(job_defs, True, max_workers)
+
+    def delete_many(self, names, max_workers=8):
+        """Delete many jobs by name concurrently. Returns a BulkResult."""
+        return self._bulk(self.delete, names, max_workers)
+
+    def run_many(self, names, max_workers=8):
+        """Run many jobs by name concurrently. Returns a BulkResult."""
+        return self._bulk(self.run, names, max_workers)
+
+    def _send_job(self, job_def, update=False):
+        path = "/scheduler/iso8601"
         if "parents" in job_def:
             path = "/scheduler/dependency"
         # Cool story: chronos >= 3.0 ditched PUT and only allows POST here,
@@ -135,19 +314,55 @@ class ChronosClient(object):
                 method = "PUT"
             else:
                 method = "POST"
-        return self._call(path, method, json.dumps(job_def))
+        response = self._mutate(job_def['name'], False, path, method, self.codec.dumps(job_def))
+        return self._then(response, lambda response: self._catalog_add(job_def, response))
+
+    def validate_many(self, job_defs, max_workers=1):
+        """Check many job definitions without sending any; returns ``[(job_def, ChronosValidationError)]``.
+
+        Use it to reject a whole batch before a sync begins. `max_workers`
+        above 1 spreads very large batches over that many processes.
+        """
+        job_defs = [as_dict(job_def) for job_def in job_defs]
+        results = self._validator().problems_many(job_defs, max_workers)
+        return [(job_def, validation_error(problems)) for job_def, problems in zip(job_defs, results) if problems]
+
+    def _bulk_jobs(self, job_defs, update, max_workers):
+        valid = []
+        rejected = []
+        for job_def in job_defs:
+            job_def = as_dict(job_def)
+            try:
+                self._check_fields(job_def)
+            except ChronosValidationError as e:
+                rejected.append((job_def, e))
+            else:
+                valid.append(job_def)
+        return self._bulk(lambda job_def: self._send_job(job_def, update), valid, max_workers, rejected)
 
-    def update(self, job_def):
-        """Update an existing job by name"""
-        return self.add(job_def, update=True)
+    def _bulk(self, func, items, max_workers, rejected=None):
+        from chronos import bulk
+        return bulk.submit(func, items, max_workers, rejected)
 
     def job_stat(self, name):
         """ List stats for a job """
-        return self._call('/scheduler/job/stat/%s' % name, "GET")
+        return self._cached(('job_stat', name), self._call, '/scheduler/job/stat/%s' % name, "GET")
 
     def scheduler_graph(self):
         return self._call('/scheduler/graph/csv', 'GET')
 
+    def job_graph(self, from_jobs=False):
+        """A JobGraph of job dependencies, parsed from scheduler_graph() or, with `from_jobs`, built from list()."""
+        from chronos.graph import JobGraph
+        if from_jobs:
+            return self._then(self.list(), JobGraph.from_jobs)
+        return self._then(self.scheduler_graph(), JobGraph.from_csv)
+
+    def job_schedules(self, use_numpy=None):
+        """A ScheduleTable of every job, for next run times and finding jobs that stopped running."""
+        from chronos.schedule import ScheduleTable
+        return self._then(self.list(), lambda jobs: ScheduleTable.from_jobs(jobs, use_numpy))
+
     def scheduler_stat_99th(self):
         return self._call('/scheduler/stats/99thPercentile', 'GET')
 
@@ -166,11 +381,289 @@ class ChronosClient(object):
     def scheduler_stat_mean(self):
         return self._call('/scheduler/stats/mean', 'GET')
 
+    def scheduler_stats(self, metrics=True):
+        """All scheduler percentiles, the median and the mean, fetched concurrently, as a SchedulerStats.
+
+        With `metrics`, /metrics is fetched alongside them into `.metrics`.
+        A ResponseCache with a ``scheduler_stats`` TTL serves repeated calls
+        from the cache.
+        """
+        return self._cached(('scheduler_stats', metrics), self._fetch_scheduler_stats, metrics)
+
+    def _fetch_scheduler_stats(self, metrics):
+        from chronos.stats import STAT_PATHS, SchedulerStats
+        calls = [lambda path=path: self._call('/scheduler/stats/%s' % path, 'GET') for path in STAT_PATHS.values()]
+        if metrics:
+            calls.append(self.metrics)
+
+        def merge(responses):
+            return SchedulerStats.from_responses(
+                dict(zip(STAT_PATHS, responses)), responses[len(STAT_PATHS)] if metrics else None,
+            )
+        return self._then(self._gather(calls), merge)
+
+    def _gather(self, calls):
+        """Run the calls concurrently and return their results in order."""
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(calls)) as executor:
+            futures = [executor.submit(call) for call in calls]
+            return [future.result() for future in futures]
+
     def metrics(self):
         # for some reason, /metrics is not prefixed with the version
         return self._call('/metrics', 'GET', prefix=False)
 
+    def metrics_snapshot(self, history=None):
+        """metrics() as a MetricsSnapshot; with a MetricsHistory, the snapshot is also added to it.
+
+        Snapshots from one client share a MetricTable, so any two can be compared with delta().
+        """
+        from chronos.metrics import MetricsSnapshot
+        if history is not None:
+            return self._then(self.metrics(), history.add)
+        return self._then(self.metrics(), lambda metrics: MetricsSnapshot.from_response(metrics, self._metric_table))
+
+    def leader(self):
+        """The host:port of the current leader."""
+        return self._then(self._call('/scheduler/leader', 'GET'), lambda response: response['leader'])
+
+    def _then(self, response, func):
+        """Return func(response); AsyncChronosClient applies func once the response has arrived."""
+        return func(response)
+
+    def _cached(self, key, fetch, *args, **kwargs):
+        """Return fetch(*args, **kwargs) through the response cache, if enabled."""
+        if self.cache is None or not self.cache.enabled(key):
+            return fetch(*args, **kwargs)
+        hit, response = self.cache.get(key)
+        if not hit:
+            response = fetch(*args, **kwargs)
+            self.cache.set(key, response)
+        return response
+
+    def _mutate(self, name, deleted, *args):
+        """_call for a request that changes job `name`, keeping the response cache in step."""
+        if self.cache is None:
+            return self._call(*args)
+        try:
+            response = self._call(*args)
+        except Exception:
+            self.cache.invalidate_job(name)
+            raise
+        if deleted:
+            self.cache.remove_job(name)
+        else:
+            self.cache.invalidate_job(name)
+        return response
+
+    def _track_catalog(self, jobs, as_records):
+        from chronos.catalog import JobCatalog
+        catalog = JobCatalog(jobs, as_records)
+        self._catalogs.add(catalog)
+        return catalog
+
+    def _catalog_add(self, job_def, response):
+        for catalog in list(self._catalogs):
+            catalog.add(ChronosJob(job_def) if catalog.as_records else job_def)
+        return response
+
+    def _catalog_remove(self, name, response):
+        for catalog in list(self._catalogs):
+            catalog.remove(name)
+        return response
+
     def _call(self, url, method="GET", body=None, headers={}, prefix=True, params={}):
+        _url, hdrs = self._prepare_request(url, method, body, headers, prefix)
+        target = self._request_target(_url, method, params)
+
+        policy = self.retry_policy
+        inst = self.instrumentation
+        packed = self._compressed(body)
+        if inst is not None:
+            from chronos.instrumentation import endpoint_label
+            label = endpoint_label(method, url)
+            sent = len(packed if packed is not None else body or '')
+        deadline = policy.start()
+        attempt = 1
+        tried = False
+        while True:
+            for server in self.router.order():
+                if tried and policy.expired(deadline):
+                    break
+                tried = True
+                endpoint = "%s%s" % (server, target)
+                if inst is not None:
+                    start = time.time()
+                try:
+                    self.logger.debug("Fetch %s %s", endpoint, method)
+                    with self.pool.connection(server) as conn:
+                        if deadline is not None:
+                            self.transport.set_timeout(conn, policy.timeout(deadline))
+                        resp, content = self._request(conn, server, endpoint, method, body, hdrs, packed)
+                except self.transport.errors as e:
+                    self.router.failure(server)
+                    if inst is not None:
+                        inst.request(label, server, None, time.time() - start, sent, 0)
+                    if isinstance(e, self.transport.timeouts) and not policy.can_resend(method):
+                        raise ChronosAPIError(
+                            '%s %s timed out; not sent again, it may have taken effect' % (method, endpoint)
+                        )
+                    self.logger.error('Error while calling %s: %s. Retrying', endpoint, str(e))
+                    if inst is not None:
+                        inst.failover(label, server)
+                    continue
+                if inst is not None:
+                    self._record_response(inst, label, server, resp, content, time.time() - start, sent)
+                try:
+                    response = self._check(resp, content)
+                except ChronosAPIError as e:
+                    self.logger.error('Error while calling %s: %s', endpoint, str(e))
+                    if policy.is_retryable(resp.status):
+                        self.router.failure(server)
+                    elif policy.raises(resp.status):
+                        raise
+                    if inst is not None:
+                        inst.failover(label, server)
+                    continue
+                self.router.success(server)
+                return response
+            if not policy.can_resend(method):
+                break
+            delay = policy.delay(attempt, deadline)
+            if delay is None:
+                break
+            if inst is not None:
+                inst.retry(label, attempt, delay)
+            policy.sleep(delay)
+            attempt += 1
+
+        raise ChronosAPIError('No remaining Chronos servers to try')
+
+    def _compressed(self, body):
+        """`body` gzipped if it is at least `compress_requests` bytes long, else None."""
+        if not body or self.compress_requests is None or len(body) < self.compress_requests:
+            return None
+        from chronos.compression import gzip_body
+        return gzip_body(body)
+
+    def _request(self, conn, server, uri, method, body, hdrs, packed):
+        """conn.request, with the gzipped body `packed` for servers that haven't rejected one.
+
+        A server that refuses a gzipped body (a 415, or a 400 about the
+        encoding) gets the plain body; if that succeeds, it only gets plain
+        bodies from then on.
+        """
+        if packed is None or server in self._plain_servers:
+            return conn.request(uri, method, body=body, headers=hdrs)
+        from chronos.compression import rejects_gzip
+        gzipped = dict(hdrs)
+        gzipped['Content-Encoding'] = 'gzip'
+        resp, content = conn.request(uri, method, body=packed, headers=gzipped)
+        if not rejects_gzip(resp.status, content):
+            return resp, content
+        resp, content = conn.request(uri, method, body=body, headers=hdrs)
+        if resp.status < 400:
+            self._plain_servers.add(server)
+        return resp, content
+
+    def _record_response(self, inst, label, server, resp, content, latency, sent):
+        from chronos.compression import wire_bytes
+        received = len(content or b'')
+        inst.request(label, server, resp.status, latency, sent, received)
+        wire = wire_bytes(resp, content)
+        if wire is not None:
+            inst.transfer(label, server, wire, received)
+
+    def _stream(self, url, chunk_size=65536, prefix=True):
+        """GET `url` and yield the response body in chunks as it arrives.
+
+        Uses its own, unpooled connection, since a streamed response can be
+        abandoned half read.
+        """
+        import socket
+        import zlib
+        from chronos.compression import ACCEPT_ENCODING, decompress, iter_decompressed
+        from chronos.stream import Response
+        from chronos.transport import http_client
+
+        _url, hdrs = self._prepare_request(url, 'GET', None, {}, prefix)
+        target = self._request_target(_url, 'GET', {})
+        authorization = self.transport.authorization()
+        if authorization:
+            hdrs['Authorization'] = authorization
+        hdrs['Accept-Encoding'] = ACCEPT_ENCODING
+        for server in self.router.order():
+            endpoint = "%s%s" % (server, target)
+            conn = self._stream_connection(server)
+            try:
+                self.logger.debug("Stream %s", endpoint)
+                conn.connect()
+                conn.sock.settimeout(self.retry_policy.read_timeout)
+                conn.request('GET', target, headers=hdrs)
+                resp = conn.getresponse()
+            except (socket.error, http_client.HTTPException) as e:
+                conn.close()
+                self.logger.error('Error while calling %s: %s. Retrying', endpoint, str(e))
+                self.router.failure(server)
+                continue
+            if resp.status >= 400:
+                headers = Response(resp.status, resp.reason)
+                headers.update((name.lower(), value) for name, value in resp.getheaders())
+                content = decompress(resp.read(), headers.get('content-encoding'))
+                conn.close()
+                try:
+                    self._check(headers, content)
+                except ChronosAPIError as e:
+                    self.logger.error('Error while calling %s: %s', endpoint, str(e))
+                    if self.retry_policy.raises(resp.status):
+                        raise
+                    if self.retry_policy.is_retryable(resp.status):
+                        self.router.failure(server)
+                    continue
+            self.router.success(server)
+            chunks = iter(lambda: resp.read(chunk_size), b'')
+            try:
+                for chunk in iter_decompressed(chunks, resp.getheader('content-encoding')):
+                    yield chunk
+                return
+            except (socket.error, http_client.HTTPException, zlib.error) as e:
+                raise ChronosAPIError('Error while streaming %s: %s' % (endpoint, e))
+            finally:
+                conn.close()
+
+        raise ChronosAPIError('No remaining Chronos servers to try')
+
+    def _stream_connection(self, server):
+        from chronos.transport import http_client
+        parts = urlsplit(server)
+        timeout = self.retry_policy.connect_timeout
+        if parts.scheme != 'https':
+            return http_client.HTTPConnection(parts.netloc, timeout=timeout)
+        context = self.transport.ssl_context()
+        return http_client.HTTPSConnection(parts.netloc, timeout=timeout, context=context)
+
+    def _probe(self, server):
+        """Return (latency, is_leader) for `server`, or None if it didn't answer."""
+        endpoint = "%s%s" % (server, quote('%s/scheduler/leader' % self._prefix))
+        start = time.time()
+        try:
+            with self.pool.connection(server) as conn:
+                resp, content = conn.request(endpoint, 'GET')
+        except self.transport.errors:
+            return None
+        return self._probe_result(server, resp, content, time.time() - start)
+
+    def _probe_result(self, server, resp, content, latency):
+        if resp.status >= 500:
+            return None
+        try:
+            leader = self.codec.loads(content).get('leader')
+        except (ValueError, AttributeError):
+            leader = None
+        return latency, server.split('://', 1)[-1] == leader
+
+    def _prepare_request(self, url, method, body, headers, prefix):
+        """Return the versioned path and the full header dict for a request."""
         hdrs = {}
         if body:
             hdrs['Content-Type'] = "application/json"
@@ -179,41 +672,28 @@ class ChronosClient(object):
             _url = '%s%s' % (self._prefix, url, )
         else:
             _url = url
-        self.logger.debug("Calling: %s %s" % (method, _url))
+        self.logger.debug("Calling: %s %s", method, _url)
         if body:
-            self.logger.debug("Body: %s" % body)
-        conn = httplib2.Http(disable_ssl_certificate_validation=self.disable_ssl_certificate_validation)
-        if self._user and self._password:
-            conn.add_credentials(self._user, self._password)
+            self.logger.debug("Body: %s", body)
         if self.extra_headers:
             hdrs.update(self.extra_headers)
+        return _url, hdrs
 
-        response = None
-        servers = list(self.servers)
-        while servers:
-            server = servers.pop(0)
-            endpoint = "%s%s" % (server, quote(_url))
-            if params and method == 'GET':
-                # usually you'd urlencode the params in the body, but we're
-                # already sending the body in a different argument...
-                endpoint += '?%s' % (urlencode(params))
-            try:
-                self.logger.debug("Fetch %s %s" % (endpoint, method, ))
-                resp, content = conn.request(endpoint, method, body=body, headers=hdrs)
-            except (socket.error, httplib2.ServerNotFoundError) as e:
-                self.logger.error('Error while calling %s: %s. Retrying', endpoint, str(e))
-                continue
-            try:
-                response = self._check(resp, content)
-                return response
-            except ChronosAPIError as e:
-                self.logger.error('Error while calling %s: %s', endpoint, str(e))
+    def _request_target(self, _url, method, params):
+        """Quote the path and append the query string, if any."""
+        target = quote(_url)
+        if params and method == 'GET':
+            # usually you'd urlencode the params in the body, but we're
+            # already sending the body in a different argument...
+            target += '?%s' % (urlencode(params))
+        return target
 
-        raise ChronosAPIError('No remaining Chronos servers to try')
+    def _new_connection(self, server):
+        return self.transport.connect(server)
 
     def _check(self, resp, content):
         status = resp.status
-        self.logger.debug("status: %d" % status)
+        self.logger.debug("status: %d", status)
         payload = None
 
         if status == 401:
@@ -221,7 +701,7 @@ class ChronosClient(object):
 
         if content:
             try:
-                payload = json.loads(content.decode('utf-8'))
+                payload = self.codec.loads(content)
             except ValueError:
                 if resp['content-type'] == "application/json":
                     self.logger.error("Response not valid json: %s" % content)
@@ -242,48 +722,37 @@ class ChronosClient(object):
 
         return payload
 
-    def _check_fields(self, job):
+    def _validator(self):
         fields = ChronosJob.fields
         if self.scheduler_api_version is None:
-            fields.extend(ChronosJob.legacy_fields)
-        for k in fields:
-            if k not in job:
-                raise MissingFieldError("missing required field %s" % k)
-
-        if any(field in job for field in ChronosJob.one_of):
-            if len([field for field in ChronosJob.one_of if field in job]) > 1:
-                raise OneOfViolationError("Job must only include 1 of %s" % ChronosJob.one_of)
-        else:
-            raise MissingFieldError("Job must include one of %s" % ChronosJob.one_of)
-
-        if "container" in job:
-            container = job["container"]
-            for k in ChronosJob.container_fields:
-                if k not in container:
-                    raise MissingFieldError("missing required container field %s" % k)
+            fields = list(fields) + list(ChronosJob.legacy_fields)
+        return compile_validator(fields, ChronosJob.one_of, ChronosJob.container_fields, self.strict_validation)
 
+    def _check_fields(self, job):
+        problems = self._validator().problems(job)
+        if problems:
+            raise validation_error(problems)
         return True
 
 
-class ChronosJob(object):
-    fields = [
-        "command",
-        "name",
-        "owner",
-        "disabled"
-    ]
-    legacy_fields = [
-        "async",
-    ]
-    one_of = ["schedule", "parents"]
-    container_fields = [
-        "type",
-        "image"
-    ]
-
-
-def connect(servers, proto="http", username=None, password=None, extra_headers=None, scheduler_api_version='v1'):
+VALIDATION_ERRORS = {
+    validation.MISSING: MissingFieldError,
+    validation.ONE_OF: OneOfViolationError,
+    validation.TYPE: InvalidFieldError,
+    validation.SYNTAX: InvalidFieldError,
+}
+
+
+def validation_error(problems):
+    """The exception for a list of Problems: the type of the first one, with every message."""
+    error_class = VALIDATION_ERRORS[problems[0].kind]
+    return error_class('; '.join(problem.message for problem in problems), problems)
+
+
+def connect(
+    servers, proto="http", username=None, password=None, extra_headers=None, scheduler_api_version='v1', **kwargs
+):
     return ChronosClient(
         servers, proto=proto, username=username, password=password,
-        extra_headers=extra_headers, scheduler_api_version=scheduler_api_version
+        extra_headers=extra_headers, scheduler_api_version=scheduler_api_version, **kwargs
     )
@@ -0,0 +1,498 @@
+"""asyncio client for Chronos.
+
+``AsyncChronosClient`` has the same API as ``ChronosClient`` but every call
+returns an awaitable::
+
+    >>> client = AsyncChronosClient(["chronos1:4400", "chronos2:4400"])
+    >>> jobs = await client.list()
+
+It speaks HTTP/1.1 directly over asyncio streams and keeps connections to
+each server open between calls, so it needs nothing beyond the standard
+library.
+"""
+
+import asyncio
+import base64
+import ssl
+import time
+import zlib
+
+from chronos import ChronosAPIError, ChronosClient, ChronosJob, quote
+from chronos.bulk import BulkItemResult, BulkResult
+from chronos.compression import ACCEPT_ENCODING, decompress, decompressor, rejects_gzip
+from chronos.instrumentation import endpoint_label
+from chronos.stream import JSONArrayParser, Response
+from chronos.watch import JobWatcher
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+
+class AsyncHTTPConnection(object):
+    """A single keep-alive HTTP/1.1 connection to one server."""
+
+    def __init__(self, server, ssl_context=None, credentials=None, connect_timeout=None):
+        parts = urlsplit(server)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.netloc = parts.netloc
+        self.ssl_context = ssl_context
+        self.credentials = credentials
+        self.connect_timeout = connect_timeout
+        self._reader = None
+        self._writer = None
+
+    @property
+    def connected(self):
+        return self._writer is not None and not self._writer.is_closing() and not self._reader.at_eof()
+
+    async def connect(self):
+        self.close()
+        self._reader, self._writer = await asyncio.wait_for(asyncio.open_connection(
+            self.host, self.port, ssl=self.ssl_context if self.scheme == 'https' else None,
+        ), self.connect_timeout)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def request(self, target, method, body=None, headers=None):
+        """Send a request and return ``(response, content)``.
+
+        A reused connection that turns out to have been closed by the server
+        is reopened and the request is sent once more.
+        """
+        reused = self.connected
+        if not reused:
+            await self.connect()
+        try:
+            return await self._request(target, method, body, headers)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            self.close()
+            if not reused:
+                raise ConnectionError(str(e) or e.__class__.__name__)
+        await self.connect()
+        return await self._request(target, method, body, headers)
+
+    async def stream(self, target, headers=None):
+        """Send a GET and return the response once its headers have arrived.
+
+        Read the body with `iter_body`.
+        """
+        if not self.connected:
+            await self.connect()
+        await self._send(target, 'GET', None, headers)
+        return await self._read_head()
+
+    async def _request(self, target, method, body, headers):
+        await self._send(target, method, body, headers)
+        resp = await self._read_head()
+        content = b''.join([chunk async for chunk in self.iter_body(resp, method)])
+        resp.wire_bytes = len(content)
+        return resp, decompress(content, resp.get('content-encoding'))
+
+    async def _send(self, target, method, body, headers):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        lines = ['%s %s HTTP/1.1' % (method, target), 'Host: %s' % self.netloc]
+        hdrs = {
+            'Connection': 'keep-alive', 'Content-Length': str(len(body or b'')), 'Accept-Encoding': ACCEPT_ENCODING,
+        }
+        if self.credentials:
+            token = base64.b64encode(('%s:%s' % self.credentials).encode('utf-8')).decode('ascii')
+            hdrs['Authorization'] = 'Basic %s' % token
+        hdrs.update(headers or {})
+        lines.extend('%s: %s' % (name, value) for name, value in hdrs.items())
+        self._writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        if body:
+            self._writer.write(body)
+        await self._writer.drain()
+
+    async def _read_head(self):
+        line = await self._reader.readline()
+        if not line:
+            raise ConnectionResetError('connection closed by server')
+        try:
+            version, status, reason = (line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+            resp = Response(int(status), reason)
+        except ValueError:
+            raise ConnectionError('malformed status line: %r' % line)
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            resp[name.strip().lower()] = value.strip()
+        resp.keep_alive = version == 'HTTP/1.1' and resp.get('connection', '').lower() != 'close'
+        return resp
+
+    async def iter_body(self, resp, method='GET', chunk_size=65536):
+        """Yield the body of `resp` in chunks of at most `chunk_size` bytes."""
+        reader = self._reader
+        if method == 'HEAD' or resp.status in (204, 304) or resp.status < 200:
+            pass
+        elif resp.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await reader.readline()).split(b';', 1)[0].strip() or b'0', 16)
+                if size == 0:
+                    # skip any trailers up to the terminating blank line
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                while size:
+                    chunk = await reader.readexactly(min(size, chunk_size))
+                    size -= len(chunk)
+                    yield chunk
+                await reader.readexactly(2)
+        elif 'content-length' in resp:
+            remaining = int(resp['content-length'])
+            while remaining:
+                chunk = await reader.readexactly(min(remaining, chunk_size))
+                remaining -= len(chunk)
+                yield chunk
+        else:
+            resp.keep_alive = False
+            while True:
+                chunk = await reader.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        if not resp.keep_alive:
+            self.close()
+
+    async def iter_content(self, resp, chunk_size=65536):
+        """Like `iter_body`, with a gzip or deflate body decompressed as it arrives."""
+        decoder = decompressor(resp.get('content-encoding'))
+        async for chunk in self.iter_body(resp, chunk_size=chunk_size):
+            if decoder is not None:
+                chunk = decoder.decompress(chunk)
+            if chunk:
+                yield chunk
+        if decoder is not None:
+            chunk = decoder.flush()
+            if chunk:
+                yield chunk
+
+
+class AsyncBulkResult(BulkResult):
+    """BulkResult for AsyncChronosClient.
+
+    Use ``async for`` to get items as they finish, or ``await`` it to wait
+    for the whole batch before reading `succeeded`, `failed` or `exceptions`.
+    """
+
+    def __init__(self, func, items, max_workers, rejected=None):
+        semaphore = asyncio.Semaphore(max_workers)
+        self._done = asyncio.Queue()
+        self._tasks = []
+        self.items = []
+
+        async def call(item):
+            async with semaphore:
+                return await func(item)
+
+        rejected = rejected or []
+        for item, exception in rejected:
+            self._done.put_nowait(BulkItemResult(item, exception=exception))
+        for item in items:
+            task = asyncio.ensure_future(call(item))
+            task.add_done_callback(lambda task, item=item: self._finished(task, item))
+            self._tasks.append(task)
+        self._total = len(rejected) + len(self._tasks)
+
+    def _finished(self, task, item):
+        if task.cancelled():
+            result = BulkItemResult(item, exception=asyncio.CancelledError())
+        elif task.exception() is not None:
+            result = BulkItemResult(item, exception=task.exception())
+        else:
+            result = BulkItemResult(item, result=task.result())
+        self._done.put_nowait(result)
+
+    def __iter__(self):
+        return iter(self.wait().items)
+
+    def __len__(self):
+        return self._total
+
+    async def __aiter__(self):
+        index = 0
+        while index < self._total:
+            if index == len(self.items):
+                self.items.append(await self._done.get())
+            yield self.items[index]
+            index += 1
+
+    def __await__(self):
+        return self._wait().__await__()
+
+    async def _wait(self):
+        async for _ in self:
+            pass
+        return self
+
+    def wait(self):
+        if len(self.items) < self._total:
+            raise RuntimeError('await the bulk result before reading it')
+        return self
+
+    def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+
+
+class AsyncChronosClient(ChronosClient):
+    """ChronosClient whose API methods are coroutines.
+
+    Server failover, error handling and job validation are shared with
+    ChronosClient; only the transport differs.
+    """
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def _then(self, response, func):
+        async def then():
+            return func(await response)
+        return then()
+
+    async def _cached(self, key, fetch, *args, **kwargs):
+        if self.cache is None or not self.cache.enabled(key):
+            return await fetch(*args, **kwargs)
+        hit, response = self.cache.get(key)
+        if not hit:
+            response = await fetch(*args, **kwargs)
+            self.cache.set(key, response)
+        return response
+
+    async def _mutate(self, name, deleted, *args):
+        if self.cache is None:
+            return await self._call(*args)
+        try:
+            response = await self._call(*args)
+        except Exception:
+            self.cache.invalidate_job(name)
+            raise
+        if deleted:
+            self.cache.remove_job(name)
+        else:
+            self.cache.invalidate_job(name)
+        return response
+
+    async def _call(self, url, method="GET", body=None, headers={}, prefix=True, params={}):
+        _url, hdrs = self._prepare_request(url, method, body, headers, prefix)
+        target = self._request_target(_url, method, params)
+
+        policy = self.retry_policy
+        inst = self.instrumentation
+        packed = self._compressed(body)
+        if inst is not None:
+            label = endpoint_label(method, url)
+            sent = len(packed if packed is not None else body or '')
+        deadline = policy.start()
+        attempt = 1
+        tried = False
+        while True:
+            for server in self.router.order():
+                if tried and policy.expired(deadline):
+                    break
+                tried = True
+                endpoint = "%s%s" % (server, target)
+                if inst is not None:
+                    start = time.time()
+                try:
+                    self.logger.debug("Fetch %s %s", endpoint, method)
+                    with self.pool.connection(server) as conn:
+                        resp, content = await asyncio.wait_for(
+                            self._request(conn, server, target, method, body, hdrs, packed), policy.timeout(deadline),
+                        )
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                    self.router.failure(server)
+                    if inst is not None:
+                        inst.request(label, server, None, time.time() - start, sent, 0)
+                    if isinstance(e, asyncio.TimeoutError) and not policy.can_resend(method):
+                        raise ChronosAPIError(
+                            '%s %s timed out; not sent again, it may have taken effect' % (method, endpoint)
+                        )
+                    self.logger.error('Error while calling %s: %s. Retrying', endpoint, str(e))
+                    if inst is not None:
+                        inst.failover(label, server)
+                    continue
+                if inst is not None:
+                    self._record_response(inst, label, server, resp, content, time.time() - start, sent)
+                try:
+                    response = self._check(resp, content)
+                except ChronosAPIError as e:
+                    self.logger.error('Error while calling %s: %s', endpoint, str(e))
+                    if policy.is_retryable(resp.status):
+                        self.router.failure(server)
+                    elif policy.raises(resp.status):
+                        raise
+                    if inst is not None:
+                        inst.failover(label, server)
+                    continue
+                self.router.success(server)
+                return response
+            if not policy.can_resend(method):
+                break
+            delay = policy.delay(attempt, deadline)
+            if delay is None:
+                break
+            if inst is not None:
+                inst.retry(label, attempt, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        raise ChronosAPIError('No remaining Chronos servers to try')
+
+    async def _request(self, conn, server, target, method, body, hdrs, packed):
+        if packed is None or server in self._plain_servers:
+            return await conn.request(target, method, body=body, headers=hdrs)
+        gzipped = dict(hdrs)
+        gzipped['Content-Encoding'] = 'gzip'
+        resp, content = await conn.request(target, method, body=packed, headers=gzipped)
+        if not rejects_gzip(resp.status, content):
+            return resp, content
+        resp, content = await conn.request(target, method, body=body, headers=hdrs)
+        if resp.status < 400:
+            self._plain_servers.add(server)
+        return resp, content
+
+    async def iter_jobs(self, fields=None, chunk_size=65536, as_records=False):
+        """Async generator version of ChronosClient.iter_jobs."""
+        parser = JSONArrayParser(fields)
+        try:
+            async for chunk in self._stream("/scheduler/jobs", chunk_size):
+                for job in parser.feed(chunk):
+                    yield ChronosJob(job) if as_records else job
+            for job in parser.close():
+                yield ChronosJob(job) if as_records else job
+        except ValueError as e:
+            raise ChronosAPIError('Invalid job listing from Chronos: %s' % e)
+
+    async def watch_jobs(self, interval=5.0, max_interval=None, coalesce=1.0, initial=False):
+        """Async generator version of ChronosClient.watch_jobs."""
+        watcher = JobWatcher(interval, max_interval, coalesce, initial=initial)
+
+        async def observe():
+            state, changed = {}, {}
+            async for job in self.iter_jobs():
+                watcher.track(state, changed, job)
+            return state, changed
+
+        for event in watcher.begin(*await observe()):
+            yield event
+        while True:
+            await asyncio.sleep(watcher.delay)
+            state, changed = await observe()
+            for _ in range(watcher.burst_polls() if watcher.differs(state, changed) else 0):
+                await asyncio.sleep(watcher.coalesce)
+                later, later_changed = await observe()
+                if later == state:
+                    break
+                state, changed = later, later_changed
+            for event in watcher.commit(state, changed):
+                yield event
+
+    async def _stream(self, url, chunk_size=65536, prefix=True):
+        _url, hdrs = self._prepare_request(url, 'GET', None, {}, prefix)
+        target = self._request_target(_url, 'GET', {})
+        policy = self.retry_policy
+        for server in self.router.order():
+            endpoint = "%s%s" % (server, target)
+            conn = self._new_connection(server)
+            try:
+                self.logger.debug("Stream %s", endpoint)
+                resp = await asyncio.wait_for(conn.stream(target, hdrs), policy.read_timeout)
+                if resp.status >= 400:
+                    content = b''.join([chunk async for chunk in conn.iter_content(resp)])
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+                conn.close()
+                self.logger.error('Error while calling %s: %s. Retrying', endpoint, str(e))
+                self.router.failure(server)
+                continue
+            if resp.status >= 400:
+                conn.close()
+                try:
+                    self._check(resp, content)
+                except ChronosAPIError as e:
+                    self.logger.error('Error while calling %s: %s', endpoint, str(e))
+                    if policy.raises(resp.status):
+                        raise
+                    if policy.is_retryable(resp.status):
+                        self.router.failure(server)
+                    continue
+            self.router.success(server)
+            try:
+                async for chunk in conn.iter_content(resp, chunk_size=chunk_size):
+                    yield chunk
+            except (OSError, asyncio.IncompleteReadError, zlib.error) as e:
+                raise ChronosAPIError('Error while streaming %s: %s' % (endpoint, e))
+            finally:
+                conn.close()
+            return
+
+        raise ChronosAPIError('No remaining Chronos servers to try')
+
+    def start_health_probe(self, interval=10.0):
+        """Probe every server from a task on the running event loop."""
+        if getattr(self, '_probe_task', None) is not None:
+            return
+
+        async def run():
+            while True:
+                results = await asyncio.gather(*[self._probe(server) for server in self.servers])
+                self.router.record_probes(zip(self.servers, results))
+                await asyncio.sleep(interval)
+
+        self._probe_task = asyncio.ensure_future(run())
+
+    def stop_health_probe(self):
+        if getattr(self, '_probe_task', None) is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+
+    async def _probe(self, server):
+        target = quote('%s/scheduler/leader' % self._prefix)
+        start = time.time()
+        try:
+            with self.pool.connection(server) as conn:
+                resp, content = await asyncio.wait_for(conn.request(target, 'GET'), self.retry_policy.read_timeout)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return None
+        return self._probe_result(server, resp, content, time.time() - start)
+
+    def _gather(self, calls):
+        return asyncio.gather(*[call() for call in calls])
+
+    def _bulk(self, func, items, max_workers, rejected=None):
+        return AsyncBulkResult(func, items, max_workers, rejected)
+
+    def _new_connection(self, server):
+        ssl_context = None
+        if server.startswith('https://'):
+            ssl_context = ssl.create_default_context()
+            if self.disable_ssl_certificate_validation:
+                ssl_context.check_hostname = False
+                ssl_context.verify_mode = ssl.CERT_NONE
+        credentials = (self._user, self._password) if self._user and self._password else None
+        return AsyncHTTPConnection(
+            server, ssl_context=ssl_context, credentials=credentials,
+            connect_timeout=self.retry_policy.connect_timeout,
+        )
+
+
+def connect(
+    servers, proto="http", username=None, password=None, extra_headers=None, scheduler_api_version='v1', **kwargs
+):
+    return AsyncChronosClient(
+        servers, proto=proto, username=username, password=password,
+        extra_headers=extra_headers, scheduler_api_version=scheduler_api_version, **kwargs
+    )
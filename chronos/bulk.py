@@ -0,0 +1,115 @@
+"""Results of bulk job mutations (ChronosClient.add_many and friends)."""
+
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+
+class BulkItemResult(object):
+    """Outcome of one call in a bulk operation."""
+
+    __slots__ = ('item', 'result', 'exception')
+
+    def __init__(self, item, result=None, exception=None):
+        self.item = item
+        self.result = result
+        self.exception = exception
+
+    @property
+    def ok(self):
+        return self.exception is None
+
+    @property
+    def name(self):
+        """The job name, whether the item is a job definition or a bare name."""
+        return self.item.get('name') if isinstance(self.item, dict) else self.item
+
+    def __repr__(self):
+        if self.ok:
+            return '<BulkItemResult %s ok>' % (self.name,)
+        return '<BulkItemResult %s failed: %r>' % (self.name, self.exception)
+
+
+class BulkResult(object):
+    """Per-item results of a bulk operation.
+
+    Iterating yields a BulkItemResult for each item as soon as its call
+    finishes, so progress can be reported while the batch is running.
+    `succeeded`, `failed` and `exceptions` wait for the whole batch.
+    """
+
+    def __init__(self, futures):
+        self._futures = futures
+        self._pending = as_completed(futures)
+        self.items = []
+
+    def __iter__(self):
+        index = 0
+        while True:
+            if index < len(self.items):
+                yield self.items[index]
+                index += 1
+                continue
+            try:
+                future = next(self._pending)
+            except StopIteration:
+                return
+            item = self._futures[future]
+            try:
+                self.items.append(BulkItemResult(item, result=future.result()))
+            except Exception as e:
+                self.items.append(BulkItemResult(item, exception=e))
+
+    def __len__(self):
+        return len(self._futures)
+
+    def wait(self):
+        """Block until every call has finished."""
+        for _ in self:
+            pass
+        return self
+
+    def cancel(self):
+        """Cancel calls that haven't started yet."""
+        for future in self._futures:
+            future.cancel()
+
+    @property
+    def succeeded(self):
+        return [item for item in self.wait().items if item.ok]
+
+    @property
+    def failed(self):
+        return [item for item in self.wait().items if not item.ok]
+
+    @property
+    def exceptions(self):
+        return dict((item.name, item.exception) for item in self.failed)
+
+    @property
+    def ok(self):
+        return not self.failed
+
+
+def failed_future(exception):
+    future = Future()
+    future.set_exception(exception)
+    return future
+
+
+def submit(func, items, max_workers, rejected=None):
+    """Call `func(item)` for every item on a pool of `max_workers` threads.
+
+    `rejected` is a list of (item, exception) pairs for items that must not
+    be sent; they are reported as failed with that exception. Returns a
+    BulkResult straight away; calls keep running in the background until
+    they are done or cancelled.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {}
+    try:
+        for item, exception in (rejected or []):
+            futures[failed_future(exception)] = item
+        for item in items:
+            futures[executor.submit(func, item)] = item
+    finally:
+        executor.shutdown(wait=False)
+    return BulkResult(futures)
@@ -0,0 +1,85 @@
+"""Opt-in read-through cache for ChronosClient listings and job stats."""
+
+import threading
+import time
+from collections import OrderedDict
+
+CACHED_ENDPOINTS = ('list', 'search', 'job_stat', 'scheduler_stats')
+
+
+class ResponseCache(object):
+    """Size-bounded LRU cache of API responses with a TTL per endpoint.
+
+    `ttl` applies to every cached endpoint (``list``, ``search``,
+    ``job_stat`` and ``scheduler_stats``) unless `ttls` overrides it; a TTL
+    of 0 or None turns caching off for that endpoint. Cached responses are shared between
+    callers and must not be modified.
+    """
+
+    def __init__(self, ttl=10.0, ttls=None, maxsize=256, clock=time.time):
+        self.ttls = dict((endpoint, ttl) for endpoint in CACHED_ENDPOINTS)
+        self.ttls.update(ttls or {})
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = dict((endpoint, 0) for endpoint in CACHED_ENDPOINTS)
+        self.misses = dict((endpoint, 0) for endpoint in CACHED_ENDPOINTS)
+        self.evictions = 0
+
+    def enabled(self, key):
+        return bool(self.ttls.get(key[0]))
+
+    def get(self, key):
+        """Return ``(True, value)`` on a fresh hit, ``(False, None)`` otherwise."""
+        endpoint = key[0]
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry[0] > now:
+                self._entries[key] = entry
+                self.hits[endpoint] += 1
+                return True, entry[1]
+            self.misses[endpoint] += 1
+            return False, None
+
+    def set(self, key, value):
+        expires = self._clock() + self.ttls[key[0]]
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires, value)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_job(self, name):
+        """Forget everything that may include the state of job `name`."""
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] in ('list', 'search') or key == ('job_stat', name):
+                    del self._entries[key]
+
+    def remove_job(self, name):
+        """Patch cached listings after job `name` has been deleted."""
+        with self._lock:
+            entry = self._entries.get(('list',))
+            for key in list(self._entries):
+                if key[0] == 'search' or key == ('job_stat', name):
+                    del self._entries[key]
+            if entry is not None and isinstance(entry[1], list):
+                jobs = [job for job in entry[1] if job.get('name') != name]
+                self._entries[('list',)] = (entry[0], jobs)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(
+                (endpoint, {'hits': self.hits[endpoint], 'misses': self.misses[endpoint]})
+                for endpoint in CACHED_ENDPOINTS
+            )
+            stats['size'] = len(self._entries)
+            stats['evictions'] = self.evictions
+        return stats
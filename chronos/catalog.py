@@ -0,0 +1,180 @@
+"""In-memory index of a Chronos job listing."""
+
+import threading
+
+# key marking the end of a name in a trie node; real keys are single characters
+_END = ''
+
+
+def _owners(job):
+    owner = job.get('owner') or ''
+    return set(part.strip() for part in owner.split(',') if part.strip())
+
+
+def _image(job):
+    container = job.get('container')
+    if isinstance(container, dict):
+        return container.get('image')
+    return None
+
+
+def _parents(job):
+    return set(job.get('parents') or ())
+
+
+class JobCatalog(object):
+    """Jobs indexed by name, name prefix, owner, container image and parent.
+
+    Lookups by name, owner, image or parent cost the same however many jobs
+    there are, and prefix queries only visit the names under the prefix.
+    Owners are split on commas, as Chronos does for notifications.
+
+    A catalog from `ChronosClient.catalog()` is kept up to date as jobs are
+    added, updated or deleted through that client; changes made elsewhere
+    need `add`/`remove` or a fresh catalog. Jobs may be dicts or, with
+    `as_records`, ChronosJob records.
+    """
+
+    def __init__(self, jobs=(), as_records=False):
+        self.as_records = as_records
+        self._jobs = {}
+        self._trie = {}
+        self._by_owner = {}
+        self._by_image = {}
+        self._children = {}
+        self._lock = threading.RLock()
+        for job in jobs:
+            self.add(job)
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def __contains__(self, name):
+        return name in self._jobs
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._jobs))
+
+    def __getitem__(self, name):
+        return self._jobs[name]
+
+    def get(self, name, default=None):
+        return self._jobs.get(name, default)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def add(self, job):
+        """Add `job`, replacing any job with the same name."""
+        name = job['name']
+        with self._lock:
+            old = self._jobs.get(name)
+            if old is not None:
+                self._unindex(name, old)
+            else:
+                self._trie_insert(name)
+            self._jobs[name] = job
+            for owner in _owners(job):
+                self._by_owner.setdefault(owner, set()).add(name)
+            image = _image(job)
+            if image is not None:
+                self._by_image.setdefault(image, set()).add(name)
+            for parent in _parents(job):
+                self._children.setdefault(parent, set()).add(name)
+
+    def remove(self, name):
+        """Remove job `name`, returning it, or None if it isn't in the catalog."""
+        with self._lock:
+            job = self._jobs.pop(name, None)
+            if job is not None:
+                self._unindex(name, job)
+                self._trie_remove(name)
+            return job
+
+    def names_with_prefix(self, prefix):
+        """Sorted names of the jobs whose name starts with `prefix`."""
+        with self._lock:
+            node = self._trie
+            for char in prefix:
+                node = node.get(char)
+                if node is None:
+                    return []
+            names = []
+            stack = [node]
+            while stack:
+                node = stack.pop()
+                if _END in node:
+                    names.append(node[_END])
+                stack.extend(node[char] for char in sorted(node, reverse=True) if char != _END)
+            return names
+
+    def with_prefix(self, prefix):
+        return self._lookup(self.names_with_prefix(prefix))
+
+    def owned_by(self, owner):
+        return self._lookup(self._by_owner.get(owner, ()))
+
+    def using_image(self, image):
+        return self._lookup(self._by_image.get(image, ()))
+
+    def children(self, name):
+        """Jobs that list `name` as a parent."""
+        return self._lookup(self._children.get(name, ()))
+
+    def find(self, prefix=None, owner=None, image=None, parent=None):
+        """Jobs matching all of the given criteria, sorted by name."""
+        with self._lock:
+            candidates = []
+            if prefix is not None:
+                candidates.append(self.names_with_prefix(prefix))
+            if owner is not None:
+                candidates.append(self._by_owner.get(owner, ()))
+            if image is not None:
+                candidates.append(self._by_image.get(image, ()))
+            if parent is not None:
+                candidates.append(self._children.get(parent, ()))
+            if not candidates:
+                return self._lookup(self._jobs)
+            candidates.sort(key=len)
+            names = set(candidates[0])
+            for other in candidates[1:]:
+                names.intersection_update(other)
+            return self._lookup(names)
+
+    def _lookup(self, names):
+        with self._lock:
+            return [self._jobs[name] for name in sorted(names)]
+
+    def _unindex(self, name, job):
+        for owner in _owners(job):
+            self._discard(self._by_owner, owner, name)
+        self._discard(self._by_image, _image(job), name)
+        for parent in _parents(job):
+            self._discard(self._children, parent, name)
+
+    @staticmethod
+    def _discard(index, key, name):
+        names = index.get(key)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del index[key]
+
+    def _trie_insert(self, name):
+        node = self._trie
+        for char in name:
+            node = node.setdefault(char, {})
+        node[_END] = name
+
+    def _trie_remove(self, name):
+        path = [self._trie]
+        for char in name:
+            path.append(path[-1][char])
+        del path[-1][_END]
+        # prune the nodes left empty, deepest first
+        for depth in range(len(name), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][name[depth - 1]]
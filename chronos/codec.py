@@ -0,0 +1,105 @@
+"""JSON codecs for request and response bodies.
+
+A codec decodes the bytes (or memoryview) a transport returns and
+encodes request bodies. Only orjson parses them in place, without a
+decoded str copy of a large response held next to the parsed one; the
+stdlib and ujson codecs still decode to a str first. The stdlib codec is
+the default; orjson and ujson are used when asked for, or with
+``codec='auto'`` when they are installed.
+"""
+
+import json
+import sys
+
+PY2 = sys.version_info[0] == 2
+# json.loads takes bytes from Python 3.6 on (it still decodes them to a str itself)
+LOADS_BYTES = sys.version_info >= (3, 6)
+
+# tried in this order by codec='auto'
+AUTO_ORDER = ('orjson', 'ujson', 'json')
+
+
+class JSONCodec(object):
+    """The stdlib json module.
+
+    json.loads decodes bytes to a str before parsing, so this holds a
+    decoded copy of each response for as long as it parses it. dumps()
+    returns an ASCII-only str, exactly the body earlier releases sent;
+    every transport accepts either str or bytes.
+    """
+
+    name = 'json'
+
+    def loads(self, data):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        elif PY2 and isinstance(data, bytearray):
+            data = bytes(data)
+        if isinstance(data, (bytes, bytearray)) and not PY2 and not LOADS_BYTES:
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+    def dumps(self, obj):
+        return json.dumps(obj)
+
+
+class OrjsonCodec(JSONCodec):
+    """orjson, which parses bytes and memoryviews in place and encodes straight to bytes."""
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._loads = orjson.loads
+        self._dumps = orjson.dumps
+
+    def loads(self, data):
+        return self._loads(data)
+
+    def dumps(self, obj):
+        return self._dumps(obj)
+
+
+class UjsonCodec(JSONCodec):
+    """ujson."""
+
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self._loads = ujson.loads
+        self._dumps = ujson.dumps
+
+    def loads(self, data):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        elif isinstance(data, bytearray):
+            data = bytes(data)
+        return self._loads(data)
+
+    def dumps(self, obj):
+        return self._dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+
+
+CODECS = {
+    'json': JSONCodec,
+    'orjson': OrjsonCodec,
+    'ujson': UjsonCodec,
+}
+
+
+def make_codec(codec='json'):
+    """A codec from one, the name of one of CODECS, or ``'auto'`` for the fastest one installed."""
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec == 'auto':
+        for name in AUTO_ORDER:
+            try:
+                return CODECS[name]()
+            except ImportError:
+                pass
+    try:
+        factory = CODECS[codec]
+    except KeyError:
+        raise ValueError('unknown codec %r; use one of auto, %s' % (codec, ', '.join(sorted(CODECS))))
+    return factory()
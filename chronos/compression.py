@@ -0,0 +1,114 @@
+"""gzip/deflate content coding for Chronos requests and responses."""
+
+import gzip
+import io
+import zlib
+
+ACCEPT_ENCODING = 'gzip, deflate'
+
+# words in a 400 body that blame the request's Content-Encoding rather than the job
+_ENCODING_PROBLEMS = (b'gzip', b'encoding', b'compress')
+
+
+class Decompressor(object):
+    """Incrementally decodes a response body with Content-Encoding `encoding`.
+
+    ``deflate`` is accepted both zlib-wrapped, as the RFC says, and raw,
+    as some servers send it.
+    """
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        self._raw_deflate = False
+        self._started = False
+        self._obj = zlib.decompressobj(16 + zlib.MAX_WBITS if encoding == 'gzip' else zlib.MAX_WBITS)
+
+    def decompress(self, data):
+        if not data:
+            return b''
+        if self.encoding == 'deflate' and not self._started:
+            self._started = True
+            try:
+                return self._obj.decompress(data)
+            except zlib.error:
+                self._raw_deflate = True
+                self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._obj.decompress(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+def decompressor(content_encoding):
+    """A Decompressor for a Content-Encoding header value, or None if the body isn't compressed."""
+    encoding = (content_encoding or '').strip().lower()
+    if encoding in ('gzip', 'x-gzip'):
+        return Decompressor('gzip')
+    if encoding == 'deflate':
+        return Decompressor('deflate')
+    return None
+
+
+def decompress(content, content_encoding):
+    """The decoded body of a complete response."""
+    decoder = decompressor(content_encoding)
+    if decoder is None or not content:
+        return content
+    return decoder.decompress(content) + decoder.flush()
+
+
+def iter_decompressed(chunks, content_encoding):
+    """Decode a body read in chunks, yielding decoded chunks as they become available."""
+    decoder = decompressor(content_encoding)
+    if decoder is None:
+        for chunk in chunks:
+            yield chunk
+        return
+    for chunk in chunks:
+        data = decoder.decompress(chunk)
+        if data:
+            yield data
+    data = decoder.flush()
+    if data:
+        yield data
+
+
+def gzip_body(body, level=6):
+    """`body` (str or bytes) gzipped, for a request sent with ``Content-Encoding: gzip``."""
+    if not isinstance(body, bytes):
+        body = body.encode('utf-8')
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=level, mtime=0) as f:
+        f.write(body)
+    return buf.getvalue()
+
+
+def rejects_gzip(status, content):
+    """Whether a response with `status` and body `content` refused a gzipped request body.
+
+    That is a 415, or a 400 whose body complains about the encoding; any
+    other 400 is about the job itself and would fail uncompressed too.
+    """
+    if status == 415:
+        return True
+    if status != 400 or not content:
+        return False
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    content = content.lower()
+    return any(word in content for word in _ENCODING_PROBLEMS)
+
+
+def wire_bytes(resp, content):
+    """How many body bytes `resp` took on the wire, or None if the transport doesn't say.
+
+    Every transport records the size as received in `resp.wire_bytes`.
+    Without it, a response httplib2 decompressed keeps only the decoded
+    length, so this is None for those.
+    """
+    wire = getattr(resp, 'wire_bytes', None)
+    if isinstance(wire, int):
+        return wire
+    if isinstance(resp, dict) and '-content-encoding' in resp:
+        return None
+    return len(content or b'')
@@ -0,0 +1,213 @@
+"""Field-level comparison of a local job definition with the job on Chronos."""
+
+import json
+
+from chronos.iso8601 import parse_datetime, parse_duration, parse_duration_parts
+
+# fields Chronos maintains itself; a local value for them is never pushed as a change
+SERVER_FIELDS = frozenset([
+    'successCount', 'errorCount', 'lastSuccess', 'lastError', 'errorsSinceLastSuccess',
+])
+
+# values Chronos fills in for fields a job definition leaves out
+DEFAULTS = {
+    'async': False, 'shell': True, 'softError': False, 'highPriority': False, 'dataProcessingJobType': False,
+    'concurrent': False, 'disabled': False, 'retries': 2, 'epsilon': 'PT60S', 'executor': '', 'executorFlags': '',
+    'description': '', 'ownerName': '', 'runAsUser': 'root', 'environmentVariables': [], 'arguments': [],
+    'uris': [], 'fetch': [], 'constraints': [], 'parents': [], 'scheduleTimeZone': '',
+}
+
+NUMERIC_FIELDS = frozenset(['cpus', 'mem', 'disk', 'retries', 'maxCompletionTime'])
+
+
+class FieldChange(object):
+    """One field whose local value differs from the value on Chronos.
+
+    `remote` is None when the field isn't set on Chronos.
+    """
+
+    __slots__ = ('key', 'local', 'remote')
+
+    def __init__(self, key, local, remote):
+        self.key = key
+        self.local = local
+        self.remote = remote
+
+    def __eq__(self, other):
+        if not isinstance(other, FieldChange):
+            return NotImplemented
+        return (self.key, self.local, self.remote) == (other.key, other.local, other.remote)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<FieldChange %s: %r -> %r>' % (self.key, self.remote, self.local)
+
+    def __str__(self):
+        return '%s: %s -> %s' % (self.key, _show(self.remote), _show(self.local))
+
+
+def diff_job(local, remote):
+    """The changes that pushing `local` would make to `remote`, sorted by field.
+
+    Only fields set in `local` are compared. Both sides are compared as
+    Chronos means them rather than as written: list fields whose order
+    doesn't matter are compared as sets, numbers as floats, timestamps and
+    durations by their value, and a field missing on Chronos by its default.
+    A schedule whose start time (and repeat count) Chronos has moved on by
+    whole periods since it was pushed is unchanged.
+    """
+    changes = []
+    for key in sorted(local):
+        if key in SERVER_FIELDS:
+            continue
+        if key in remote:
+            remote_value = remote[key]
+        elif key in DEFAULTS:
+            remote_value = DEFAULTS[key]
+        else:
+            changes.append(FieldChange(key, local[key], None))
+            continue
+        if not same_value(key, local[key], remote_value):
+            changes.append(FieldChange(key, local[key], remote.get(key)))
+    return changes
+
+
+def same_value(key, local, remote):
+    """True if `local` and `remote` mean the same for job field `key`."""
+    compare = _COMPARE.get(key)
+    if compare is not None:
+        try:
+            return compare(local, remote)
+        except (TypeError, ValueError, AttributeError):
+            pass
+    else:
+        canonical = _CANONICAL.get(key)
+        if key in NUMERIC_FIELDS:
+            canonical = _number
+        if canonical is not None:
+            try:
+                return canonical(local) == canonical(remote)
+            except (TypeError, ValueError, AttributeError):
+                pass
+    return local == remote
+
+
+def format_changes(changes, indent='  '):
+    """One line per change, e.g. ``  cpus: 0.5 -> 1.0`` (the value on Chronos, then the local one)."""
+    return '\n'.join(indent + str(change) for change in changes)
+
+
+def _show(value):
+    if value is None:
+        return '(unset)'
+    return json.dumps(value, sort_keys=True)
+
+
+def _number(value):
+    return float(value)
+
+
+def _empty_as_none(value):
+    if value in ('', 'null'):
+        return None
+    return value
+
+
+def _unordered(values):
+    return sorted(_json(value) for value in values or [])
+
+
+def _json(value):
+    return json.dumps(value, sort_keys=True)
+
+
+def _name_values(values):
+    return sorted((item['name'], item.get('value')) for item in values or [])
+
+
+def _owners(value):
+    return sorted(part.strip() for part in (value or '').split(',') if part.strip())
+
+
+def _duration(value):
+    parts = parse_duration_parts(value)
+    if 'years' in parts or 'months' in parts:
+        return parts
+    return parse_duration(value)
+
+
+def _timestamp(value):
+    return parse_datetime(value) if value else None
+
+
+def _same_container(local, remote):
+    """Only the keys set locally are compared; Chronos fills in the rest."""
+    if not isinstance(local, dict) or not isinstance(remote, dict):
+        return local == remote
+    for key, value in local.items():
+        other = remote.get(key, _CONTAINER_DEFAULTS.get(key))
+        canonical = _CONTAINER_CANONICAL.get(key)
+        if canonical is not None:
+            value, other = canonical(value), canonical(other)
+        if value != other:
+            return False
+    return True
+
+
+def _parse_schedule(schedule):
+    repeat, start, period = schedule.split('/')
+    if not repeat.startswith('R'):
+        raise ValueError('invalid schedule %r' % schedule)
+    count = int(repeat[1:]) if repeat[1:] not in ('', '-1') else None
+    return count, _timestamp(start), _duration(period)
+
+
+def _same_schedule(local, remote):
+    """Compare ISO8601 repeating intervals, allowing for Chronos moving the start on after each run."""
+    count, start, period = _parse_schedule(local)
+    remote_count, remote_start, remote_period = _parse_schedule(remote)
+    if period != remote_period:
+        return False
+    if start is None or remote_start is None or start == remote_start:
+        return (count, start) == (remote_count, remote_start)
+    if isinstance(period, dict) or not period:
+        return False
+    seconds = period.total_seconds()
+    elapsed = round((remote_start - start).total_seconds(), 3)
+    if elapsed < 0 or elapsed % seconds:
+        return False
+    if count is None:
+        return remote_count is None
+    return remote_count == count - int(elapsed // seconds)
+
+
+_CONTAINER_DEFAULTS = {
+    'network': 'HOST', 'volumes': [], 'parameters': [], 'forcePullImage': False,
+}
+
+_CONTAINER_CANONICAL = {
+    'network': lambda value: (value or '').upper(),
+    'volumes': _unordered,
+    'parameters': _unordered,
+}
+
+_CANONICAL = {
+    'epsilon': _duration,
+    'scheduleTimeZone': _empty_as_none,
+    'environmentVariables': _name_values,
+    'constraints': _unordered,
+    'uris': _unordered,
+    'fetch': _unordered,
+    'parents': _unordered,
+    'owner': _owners,
+}
+
+_COMPARE = {
+    'schedule': _same_schedule,
+    'container': _same_container,
+}
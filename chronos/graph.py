@@ -0,0 +1,221 @@
+"""Job dependency graph built from /scheduler/graph/csv or the jobs' `parents`."""
+
+import csv
+from collections import deque
+
+
+class JobGraph(object):
+    """A DAG of jobs, each pointing at the jobs that depend on it.
+
+    Jobs are numbered as they are added and edges are kept as lists of those
+    numbers, so traversals don't hash names. Ancestor and descendant sets
+    are computed on first use and cached until the graph changes.
+
+    Jobs that are named as parents but don't exist are still nodes, so the
+    jobs waiting on them can be found.
+    """
+
+    def __init__(self):
+        self._names = []
+        self._index = {}
+        self._children = []
+        self._parents = []
+        self._info = []
+        self._cache = {}
+
+    @classmethod
+    def from_jobs(cls, jobs):
+        """Build the graph from job definitions, e.g. the output of list()."""
+        graph = cls()
+        for job in jobs:
+            graph.add_job(job['name'], job.get('parents') or ())
+        return graph
+
+    @classmethod
+    def from_csv(cls, text):
+        """Build the graph from the output of scheduler_graph().
+
+        ``node,<name>,<last status>,<state>`` lines add jobs and
+        ``link,<parent>,<child>`` lines add dependencies.
+        """
+        if isinstance(text, bytes) and not isinstance(text, str):
+            text = text.decode('utf-8')
+        graph = cls()
+        for row in csv.reader(text.splitlines()):
+            if len(row) >= 2 and row[0] == 'node':
+                graph._info[graph._node(row[1])] = tuple(row[2:])
+            elif len(row) == 3 and row[0] == 'link':
+                graph._link(graph._node(row[1]), graph._node(row[2]))
+        graph._cache.clear()
+        return graph
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(list(self._index))
+
+    def status(self, name):
+        """(last run status, state) from the CSV, e.g. ``('success', 'idle')``, or () if unknown."""
+        return self._info[self._index[name]]
+
+    def add_job(self, name, parents=()):
+        """Add job `name`, or replace its parents if it's already in the graph."""
+        node = self._node(name)
+        for parent in self._parents[node]:
+            self._children[parent].remove(node)
+        self._parents[node] = []
+        for parent in parents:
+            self._link(self._node(parent), node)
+        self._cache.clear()
+
+    def remove_job(self, name):
+        """Remove job `name`; jobs depending on it keep it as a (missing) parent."""
+        node = self._index[name]
+        for parent in self._parents[node]:
+            self._children[parent].remove(node)
+        self._parents[node] = []
+        if self._children[node]:
+            self._info[node] = ()
+        else:
+            del self._index[name]
+        self._cache.clear()
+
+    def parents(self, name):
+        return set(self._names[node] for node in self._parents[self._index[name]])
+
+    def children(self, name):
+        return set(self._names[node] for node in self._children[self._index[name]])
+
+    def ancestors(self, name):
+        """Every job `name` depends on, directly or not."""
+        return self._named(self._closure(self._index[name], self._parents, 'ancestors'))
+
+    def descendants(self, name):
+        """Every job depending on `name`, directly or not."""
+        return self._named(self._closure(self._index[name], self._children, 'descendants'))
+
+    def impact(self, names):
+        """The blast radius of jobs `names` failing: every job that depends on any of them."""
+        nodes = set()
+        for name in names:
+            nodes.update(self._closure(self._index[name], self._children, 'descendants'))
+        return self._named(nodes)
+
+    def roots(self):
+        """Jobs without parents."""
+        return set(self._names[node] for node in self._index.values() if not self._parents[node])
+
+    def topological_order(self):
+        """Job names ordered so that every job comes after all of its parents.
+
+        Raises ValueError if the graph has a cycle.
+        """
+        order = self._cache.get('order')
+        if order is None:
+            pending = [len(parents) for parents in self._parents]
+            ready = deque(node for node in self._index.values() if not pending[node])
+            nodes = []
+            while ready:
+                node = ready.popleft()
+                nodes.append(node)
+                for child in self._children[node]:
+                    pending[child] -= 1
+                    if not pending[child]:
+                        ready.append(child)
+            if len(nodes) < len(self._index):
+                cyclic = sorted(name for cycle in self.cycles() for name in cycle)
+                raise ValueError('dependency cycle between jobs: %s' % ', '.join(cyclic))
+            order = self._cache['order'] = [self._names[position] for position in nodes]
+        return list(order)
+
+    def cycles(self):
+        """The groups of jobs that depend on each other in a loop, as lists of names."""
+        cycles = self._cache.get('cycles')
+        if cycles is None:
+            cycles = self._cache['cycles'] = [
+                sorted(self._names[node] for node in component)
+                for component in self._components()
+                if len(component) > 1 or component[0] in self._children[component[0]]
+            ]
+        return [list(cycle) for cycle in cycles]
+
+    def _node(self, name):
+        node = self._index.get(name)
+        if node is None:
+            node = self._index[name] = len(self._names)
+            self._names.append(name)
+            self._children.append([])
+            self._parents.append([])
+            self._info.append(())
+        return node
+
+    def _link(self, parent, child):
+        if parent not in self._parents[child]:
+            self._parents[child].append(parent)
+            self._children[parent].append(child)
+
+    def _named(self, nodes):
+        names = self._names
+        return set(names[node] for node in nodes)
+
+    def _closure(self, start, edges, kind):
+        key = (kind, start)
+        nodes = self._cache.get(key)
+        if nodes is None:
+            seen = bytearray(len(self._names))
+            stack = list(edges[start])
+            found = []
+            while stack:
+                node = stack.pop()
+                if not seen[node]:
+                    seen[node] = 1
+                    found.append(node)
+                    stack.extend(edges[node])
+            nodes = self._cache[key] = frozenset(found)
+        return nodes
+
+    def _components(self):
+        """Strongly connected components (Tarjan's algorithm, without recursion)."""
+        index = {}
+        low = {}
+        on_stack = set()
+        stack = []
+        components = []
+        counter = 0
+        for root in self._index.values():
+            if root in index:
+                continue
+            work = [(root, 0)]
+            while work:
+                node, position = work.pop()
+                if position == 0:
+                    index[node] = low[node] = counter
+                    counter += 1
+                    stack.append(node)
+                    on_stack.add(node)
+                children = self._children[node]
+                if position < len(children):
+                    work.append((node, position + 1))
+                    child = children[position]
+                    if child not in index:
+                        work.append((child, 0))
+                    elif child in on_stack:
+                        low[node] = min(low[node], index[child])
+                    continue
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+        return components
@@ -0,0 +1,233 @@
+"""Hooks for measuring ChronosClient requests, and an in-memory collector for them."""
+
+import bisect
+import threading
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# paths whose last segment is a job name, longest first
+_JOB_PATHS = ('/scheduler/job/stat/', '/scheduler/task/kill/', '/scheduler/job/')
+
+
+def endpoint_label(method, url):
+    """``GET /scheduler/job/{name}`` for ``GET /scheduler/job/foo``, so job names don't become labels."""
+    for path in _JOB_PATHS:
+        if url.startswith(path):
+            return '%s %s{name}' % (method, path)
+    return '%s %s' % (method, url)
+
+
+class Instrumentation(object):
+    """Receives a call for every request a ChronosClient makes.
+
+    Subclass it and override what you need; pass an instance as
+    ``ChronosClient(instrumentation=...)``. Without one, the client skips
+    all of these calls. Hooks run on the calling thread (or event loop), so
+    they should be quick.
+    """
+
+    def request(self, endpoint, server, status, latency, sent, received):
+        """One request to one server. `status` is None if no response arrived."""
+
+    def failover(self, endpoint, server):
+        """A request to `server` failed and the call moved on to the next server."""
+
+    def retry(self, endpoint, attempt, delay):
+        """Every server failed; the call sleeps `delay` seconds before round `attempt` + 1."""
+
+    def transfer(self, endpoint, server, wire, decoded):
+        """A response body took `wire` bytes on the wire and `decoded` once decompressed.
+
+        Called after request(), for transports that know the wire size.
+        """
+
+
+class Histogram(object):
+    """Cumulative-bucket latency histogram, as Prometheus exposes them."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """``[(upper bound, observations <= bound)]``, ending with ``+Inf``."""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        result.append((float('inf'), self.count))
+        return result
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': dict((_bound(bound), count) for bound, count in self.cumulative()),
+        }
+
+
+class MetricsCollector(Instrumentation):
+    """Keeps request metrics in memory.
+
+    Latency histograms are kept per endpoint and per server, next to
+    counters of responses by status, failovers, retries and bytes sent and
+    received, both decoded and as they came over the wire. `snapshot()`
+    returns them as a dict and `prometheus()` in the Prometheus text
+    exposition format.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, namespace='chronos_client'):
+        self.buckets = tuple(buckets)
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._endpoint_latency = {}
+            self._server_latency = {}
+            self._responses = {}
+            self._failovers = {}
+            self._retries = {}
+            self._sent = {}
+            self._received = {}
+            self._wire = {}
+            self._decoded = {}
+
+    def request(self, endpoint, server, status, latency, sent, received):
+        status = 'error' if status is None else str(status)
+        with self._lock:
+            self._histogram(self._endpoint_latency, endpoint).observe(latency)
+            self._histogram(self._server_latency, server).observe(latency)
+            key = (endpoint, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+            self._sent[server] = self._sent.get(server, 0) + sent
+            self._received[server] = self._received.get(server, 0) + received
+
+    def failover(self, endpoint, server):
+        with self._lock:
+            self._failovers[server] = self._failovers.get(server, 0) + 1
+
+    def retry(self, endpoint, attempt, delay):
+        with self._lock:
+            self._retries[endpoint] = self._retries.get(endpoint, 0) + 1
+
+    def transfer(self, endpoint, server, wire, decoded):
+        with self._lock:
+            self._wire[endpoint] = self._wire.get(endpoint, 0) + wire
+            self._decoded[endpoint] = self._decoded.get(endpoint, 0) + decoded
+
+    def snapshot(self):
+        with self._lock:
+            responses = {}
+            for (endpoint, status), count in self._responses.items():
+                responses.setdefault(endpoint, {})[status] = count
+            return {
+                'endpoints': dict((key, hist.snapshot()) for key, hist in self._endpoint_latency.items()),
+                'servers': dict((key, hist.snapshot()) for key, hist in self._server_latency.items()),
+                'responses': responses,
+                'failovers': dict(self._failovers),
+                'retries': dict(self._retries),
+                'bytes_sent': dict(self._sent),
+                'bytes_received': dict(self._received),
+                'wire_bytes': dict(self._wire),
+                'decoded_bytes': dict(self._decoded),
+            }
+
+    def prometheus(self):
+        """The metrics in the Prometheus text format, ready to be served from /metrics."""
+        ns = self.namespace
+        lines = []
+        with self._lock:
+            _histogram_lines(
+                lines, ns + '_request_duration_seconds', 'Chronos API request latency by endpoint.',
+                self._endpoint_latency, _endpoint_labels,
+            )
+            _histogram_lines(
+                lines, ns + '_server_request_duration_seconds', 'Chronos API request latency by server.',
+                self._server_latency, lambda server: [('server', server)],
+            )
+            _counter_lines(
+                lines, ns + '_responses_total', 'Chronos API responses by status ("error" if none arrived).',
+                self._responses, lambda key: _endpoint_labels(key[0]) + [('status', key[1])],
+            )
+            _counter_lines(
+                lines, ns + '_failovers_total', 'Requests that failed over to another server.',
+                self._failovers, lambda server: [('server', server)],
+            )
+            _counter_lines(
+                lines, ns + '_retries_total', 'Backoff rounds after every server failed.',
+                self._retries, _endpoint_labels,
+            )
+            _counter_lines(
+                lines, ns + '_sent_bytes_total', 'Request body bytes sent.',
+                self._sent, lambda server: [('server', server)],
+            )
+            _counter_lines(
+                lines, ns + '_received_bytes_total', 'Response body bytes received.',
+                self._received, lambda server: [('server', server)],
+            )
+            _counter_lines(
+                lines, ns + '_response_wire_bytes_total', 'Response body bytes as received, before decompression.',
+                self._wire, _endpoint_labels,
+            )
+            _counter_lines(
+                lines, ns + '_response_decoded_bytes_total', 'Response body bytes after decompression.',
+                self._decoded, _endpoint_labels,
+            )
+        return '\n'.join(lines) + '\n'
+
+    def _histogram(self, histograms, key):
+        hist = histograms.get(key)
+        if hist is None:
+            hist = histograms[key] = Histogram(self.buckets)
+        return hist
+
+
+def _histogram_lines(lines, name, help_text, histograms, labels):
+    lines.append('# HELP %s %s' % (name, help_text))
+    lines.append('# TYPE %s histogram' % name)
+    for key in sorted(histograms):
+        hist = histograms[key]
+        key_labels = labels(key)
+        for bound, count in hist.cumulative():
+            lines.append('%s_bucket%s %d' % (name, _labels(key_labels + [('le', _bound(bound))]), count))
+        lines.append('%s_sum%s %r' % (name, _labels(key_labels), hist.sum))
+        lines.append('%s_count%s %d' % (name, _labels(key_labels), hist.count))
+
+
+def _counter_lines(lines, name, help_text, counters, labels):
+    lines.append('# HELP %s %s' % (name, help_text))
+    lines.append('# TYPE %s counter' % name)
+    for key in sorted(counters):
+        lines.append('%s%s %d' % (name, _labels(labels(key)), counters[key]))
+
+
+def _endpoint_labels(endpoint):
+    method, path = endpoint.split(' ', 1)
+    return [('method', method), ('endpoint', path)]
+
+
+def _labels(pairs):
+    return '{%s}' % ','.join('%s="%s"' % (key, _escape(value)) for key, value in pairs)
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _bound(bound):
+    return '+Inf' if bound == float('inf') else repr(float(bound))
@@ -0,0 +1,96 @@
+"""The subset of ISO8601 Chronos uses for timestamps and durations."""
+
+import re
+from datetime import datetime, timedelta
+
+try:
+    from datetime import timezone
+    UTC = timezone.utc
+except ImportError:
+    from datetime import tzinfo
+
+    class _UTC(tzinfo):
+        def utcoffset(self, dt):
+            return timedelta(0)
+
+        def tzname(self, dt):
+            return 'UTC'
+
+        def dst(self, dt):
+            return timedelta(0)
+
+    UTC = _UTC()
+
+_DATETIME = re.compile(
+    r'^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,9}))?)?'
+    r'(Z|[+-]\d{2}(?::?\d{2})?)?$'
+)
+_DURATION = re.compile(
+    r'^P(?:(?P<years>\d+(?:\.\d+)?)Y)?(?:(?P<months>\d+(?:\.\d+)?)M)?(?:(?P<weeks>\d+(?:\.\d+)?)W)?'
+    r'(?:(?P<days>\d+(?:\.\d+)?)D)?'
+    r'(?:T(?:(?P<hours>\d+(?:\.\d+)?)H)?(?:(?P<minutes>\d+(?:\.\d+)?)M)?(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?$'
+)
+
+
+def parse_datetime(value):
+    """Parse a timestamp like ``2015-12-18T10:30:09.755Z`` into an aware datetime.
+
+    Returns None for the empty string Chronos uses for "never".
+    """
+    if not value:
+        return None
+    match = _DATETIME.match(value)
+    if match is None:
+        raise ValueError('invalid ISO8601 timestamp: %r' % (value,))
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    micros = int((fraction or '0')[:6].ljust(6, '0'))
+    dt = datetime(int(year), int(month), int(day), int(hour), int(minute), int(second or 0), micros, tzinfo=UTC)
+    if offset and offset != 'Z':
+        sign = -1 if offset[0] == '-' else 1
+        digits = offset[1:].replace(':', '')
+        delta = timedelta(hours=int(digits[:2]), minutes=int(digits[2:4] or 0))
+        dt -= sign * delta
+    return dt
+
+
+def format_datetime(dt):
+    """Format a datetime the way Chronos does, in UTC with milliseconds."""
+    if dt is None:
+        return ''
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(UTC)
+    return '%s.%03dZ' % (dt.strftime('%Y-%m-%dT%H:%M:%S'), dt.microsecond // 1000)
+
+
+def parse_duration_parts(value):
+    """Split a duration like ``P1DT12H`` into a dict of its non-zero float components."""
+    match = _DURATION.match(value or '')
+    if match is None or value in ('P', 'PT') or value.endswith('T'):
+        raise ValueError('invalid ISO8601 duration: %r' % (value,))
+    return dict((unit, float(amount)) for unit, amount in match.groupdict().items() if amount)
+
+
+def parse_duration(value):
+    """Parse a duration like ``PT60S`` into a timedelta.
+
+    Years and months have no fixed length, so they are rejected.
+    """
+    parts = parse_duration_parts(value)
+    if 'years' in parts or 'months' in parts:
+        raise ValueError('duration %r has no fixed length' % (value,))
+    return timedelta(**parts)
+
+
+def format_duration(delta):
+    """Format a timedelta as an ISO8601 duration, e.g. ``PT1H30M``."""
+    seconds = delta.total_seconds()
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    date = '%dD' % days if days else ''
+    time = ''.join('%d%s' % (amount, unit) for amount, unit in ((hours, 'H'), (minutes, 'M')) if amount)
+    if seconds:
+        time += ('%d' % seconds if seconds == int(seconds) else ('%f' % seconds).rstrip('0')) + 'S'
+    if not date and not time:
+        return 'PT0S'
+    return 'P%s%s' % (date, 'T' + time if time else '')
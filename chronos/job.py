@@ -0,0 +1,222 @@
+"""ChronosJob: required-field lists for validation, and a compact job record."""
+
+import json
+import re
+
+from chronos.iso8601 import format_datetime, format_duration, parse_datetime, parse_duration
+
+# every field of a Chronos job definition, in the order Chronos lists them
+JOB_KEYS = (
+    'name', 'command', 'shell', 'epsilon', 'executor', 'executorFlags', 'taskInfoData', 'retries', 'owner',
+    'ownerName', 'description', 'async', 'successCount', 'errorCount', 'lastSuccess', 'lastError', 'cpus', 'disk',
+    'mem', 'disabled', 'softError', 'dataProcessingJobType', 'errorsSinceLastSuccess', 'fetch', 'uris',
+    'environmentVariables', 'arguments', 'highPriority', 'runAsUser', 'concurrent', 'container', 'constraints',
+    'parents', 'schedule', 'scheduleTimeZone', 'maxCompletionTime',
+)
+TIMESTAMP_KEYS = ('lastSuccess', 'lastError')
+DURATION_KEYS = ('epsilon',)
+# nested values kept as compact JSON until first accessed
+PACKED_KEYS = ('fetch', 'uris', 'environmentVariables', 'arguments', 'container', 'constraints')
+
+_EMPTY_LIST = b'[]'
+_encode = json.JSONEncoder(separators=(',', ':')).encode
+
+
+def attribute_name(key):
+    """``errorsSinceLastSuccess`` -> ``errors_since_last_success``."""
+    if key == 'async':
+        return 'async_'
+    return re.sub(r'([A-Z])', lambda match: '_' + match.group(1).lower(), key)
+
+
+def _pack(value):
+    if value == []:
+        return _EMPTY_LIST
+    return _encode(value).encode('utf-8')
+
+
+def _unpack(data):
+    return json.loads(data.decode('utf-8'))
+
+
+class _Field(object):
+    """Descriptor for one job field, stored in a slot in its JSON form.
+
+    Timestamps, durations and packed nested values are decoded on first
+    access and the decoded value is cached in a second slot.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.attr = attribute_name(key)
+        self.slot = '_j_' + self.attr
+        self.cache = None
+        self.decode = self.encode = None
+        if key in TIMESTAMP_KEYS:
+            self.decode, self.encode = parse_datetime, format_datetime
+        elif key in DURATION_KEYS:
+            self.decode, self.encode = parse_duration, format_duration
+        elif key in PACKED_KEYS:
+            self.decode, self.encode = _unpack, _pack
+        if self.decode is not None:
+            self.cache = '_c_' + self.attr
+
+    def __get__(self, job, owner):
+        if job is None:
+            return self
+        if self.cache is not None:
+            try:
+                return getattr(job, self.cache)
+            except AttributeError:
+                pass
+        raw = getattr(job, self.slot, None)
+        if raw is None or self.cache is None:
+            return raw
+        value = self.decode(raw)
+        setattr(job, self.cache, value)
+        return value
+
+    def __set__(self, job, value):
+        if self.cache is not None:
+            setattr(job, self.cache, value)
+            if value is not None:
+                value = self.encode(value)
+        setattr(job, self.slot, value)
+
+    def __delete__(self, job):
+        for slot in (self.slot, self.cache):
+            if slot is not None and hasattr(job, slot):
+                delattr(job, slot)
+
+    def dump(self, job):
+        """The value as it should appear in JSON, or raise AttributeError if unset."""
+        if self.key in PACKED_KEYS:
+            try:
+                # the decoded value may have been changed in place
+                return getattr(job, self.cache)
+            except AttributeError:
+                return _unpack(getattr(job, self.slot))
+        return getattr(job, self.slot)
+
+
+_FIELDS = tuple(_Field(key) for key in JOB_KEYS)
+_FIELDS_BY_KEY = dict((field.key, field) for field in _FIELDS)
+
+
+class ChronosJob(object):
+    """A Chronos job definition.
+
+    The class attributes list the fields a job definition must have. An
+    instance is a compact record of one job: fields live in slots rather
+    than a dict, `last_success`/`last_error` are datetimes, `epsilon` is a
+    timedelta, and nested values such as `container` are only decoded when
+    first accessed. Fields are available as attributes (``job.owner_name``)
+    or by their JSON key (``job['ownerName']``); unset fields are None.
+    `to_dict()` gives back exactly the JSON the job was built from.
+    """
+
+    fields = [
+        "command",
+        "name",
+        "owner",
+        "disabled"
+    ]
+    legacy_fields = [
+        "async",
+    ]
+    one_of = ["schedule", "parents"]
+    container_fields = [
+        "type",
+        "image"
+    ]
+
+    __slots__ = tuple(
+        slot for field in _FIELDS for slot in (field.slot, field.cache) if slot is not None
+    ) + ('_extra',)
+
+    def __init__(self, data=None, **attrs):
+        self._extra = None
+        if data:
+            loaders = _LOADERS
+            for key, value in data.items():
+                loader = loaders.get(key)
+                if loader is None:
+                    if self._extra is None:
+                        self._extra = {}
+                    self._extra[key] = value
+                elif loader[1]:
+                    loader[0](self, _pack(value))
+                else:
+                    loader[0](self, value)
+        for attr, value in attrs.items():
+            if not isinstance(getattr(ChronosJob, attr, None), _Field):
+                raise TypeError('unknown job field %s' % attr)
+            setattr(self, attr, value)
+
+    @classmethod
+    def from_list(cls, jobs):
+        return [cls(job) for job in jobs]
+
+    def to_dict(self):
+        data = {}
+        for field in _FIELDS:
+            try:
+                data[field.key] = field.dump(self)
+            except AttributeError:
+                pass
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def __getitem__(self, key):
+        field = _FIELDS_BY_KEY.get(key)
+        try:
+            if field is not None:
+                return field.dump(self)
+            if self._extra is not None:
+                return self._extra[key]
+        except AttributeError:
+            pass
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        field = _FIELDS_BY_KEY.get(key)
+        if field is not None:
+            return hasattr(self, field.slot)
+        return self._extra is not None and key in self._extra
+
+    def __eq__(self, other):
+        if not isinstance(other, ChronosJob):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<ChronosJob %s>' % (getattr(self, '_j_name', None),)
+
+
+# JSON key -> (setter for the field's slot, whether the value is packed)
+_LOADERS = dict(
+    (field.key, (ChronosJob.__dict__[field.slot].__set__, field.key in PACKED_KEYS)) for field in _FIELDS
+)
+
+for _field in _FIELDS:
+    setattr(ChronosJob, _field.attr, _field)
+
+
+def as_dict(job_def):
+    """The JSON-ready dict for a job given either as a dict or a ChronosJob."""
+    if isinstance(job_def, ChronosJob):
+        return job_def.to_dict()
+    return job_def
@@ -0,0 +1,212 @@
+"""Flattened snapshots of the Dropwizard metrics Chronos serves on /metrics."""
+
+import math
+import threading
+import time
+from array import array
+from collections import deque
+
+SECTIONS = ('gauges', 'counters', 'histograms', 'meters', 'timers')
+
+# the field get() and rate() use when none is given
+DEFAULT_FIELDS = {'gauges': 'value'}
+
+_MISSING = float('nan')
+
+
+class MetricTable(object):
+    """Assigns every ``(section, name, field)`` a stable position.
+
+    Snapshots parsed with the same table store their values at the same
+    positions, so comparing two snapshots is a walk over two arrays.
+    The table only grows; metrics that disappear keep their position.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self._positions = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def position(self, key):
+        """The position of `key`, adding it if it is new."""
+        position = self._positions.get(key)
+        if position is None:
+            with self._lock:
+                position = self._positions.get(key)
+                if position is None:
+                    position = self._positions[key] = len(self.keys)
+                    self.keys.append(key)
+        return position
+
+    def find(self, key):
+        """The position of `key`, or None if no snapshot has had it."""
+        return self._positions.get(key)
+
+
+class MetricsSnapshot(object):
+    """The numeric values of one /metrics response, as one array.
+
+    `values[i]` is the value of `table.keys[i]` or NaN if the response
+    didn't have it. Keys are ``(section, metric name, field)``, e.g.
+    ``('counters', 'jobs.run.failure', 'count')`` or
+    ``('timers', 'api.get', 'p99')``; non-numeric fields such as
+    ``units`` are left out.
+    """
+
+    __slots__ = ('table', 'values', 'timestamp', 'version')
+
+    def __init__(self, table, values, timestamp, version=None):
+        self.table = table
+        self.values = values
+        self.timestamp = timestamp
+        self.version = version
+
+    @classmethod
+    def from_response(cls, metrics, table=None, timestamp=None):
+        """Flatten a metrics() response; pass the table of earlier snapshots to compare against them."""
+        table = MetricTable() if table is None else table
+        found = []
+        for section in SECTIONS:
+            for name, fields in (metrics.get(section) or {}).items():
+                if not isinstance(fields, dict):
+                    continue
+                for field, value in fields.items():
+                    if isinstance(value, (int, float)):
+                        found.append((table.position((section, name, field)), value))
+        values = array('d', [_MISSING]) * len(table)
+        for position, value in found:
+            values[position] = value
+        return cls(table, values, time.time() if timestamp is None else timestamp, metrics.get('version'))
+
+    def __len__(self):
+        return sum(1 for value in self.values if not math.isnan(value))
+
+    def get(self, section, name, field=None, default=None):
+        """The value of one metric field, e.g. ``get('counters', 'jobs.run.failure')``."""
+        value = self._value(self.table.find(_key(section, name, field)))
+        return default if value is None else value
+
+    def items(self):
+        """``[((section, name, field), value)]`` for every value in this snapshot."""
+        return [(key, value) for key, value in zip(self.table.keys, self.values) if not math.isnan(value)]
+
+    def delta(self, older):
+        """The change of every value since snapshot `older` (taken with the same table)."""
+        if older.table is not self.table:
+            raise ValueError('snapshots were parsed with different metric tables')
+        previous = older.values
+        values = array('d', [_MISSING]) * len(self.values)
+        for position, value in enumerate(self.values):
+            if position < len(previous):
+                values[position] = value - previous[position]
+        return MetricsDelta(self.table, values, self.timestamp - older.timestamp)
+
+    def _value(self, position):
+        if position is None or position >= len(self.values):
+            return None
+        value = self.values[position]
+        return None if math.isnan(value) else value
+
+    def __repr__(self):
+        return '<MetricsSnapshot %d values at %s>' % (len(self), self.timestamp)
+
+
+class MetricsDelta(object):
+    """The differences between two snapshots, `elapsed` seconds apart.
+
+    A value is NaN if either snapshot lacks it.
+    """
+
+    __slots__ = ('table', 'values', 'elapsed')
+
+    def __init__(self, table, values, elapsed):
+        self.table = table
+        self.values = values
+        self.elapsed = elapsed
+
+    def get(self, section, name, field=None, default=None):
+        position = self.table.find(_key(section, name, field))
+        if position is None or position >= len(self.values) or math.isnan(self.values[position]):
+            return default
+        return self.values[position]
+
+    def rate(self, section, name, field=None, default=None):
+        """The change of one value per second."""
+        change = self.get(section, name, field)
+        if change is None or not self.elapsed:
+            return default
+        return change / self.elapsed
+
+    def rates(self, field='count'):
+        """``{(section, name): change per second}`` of every `field`, e.g. the count of each counter and timer."""
+        if not self.elapsed:
+            return {}
+        return dict(
+            ((section, name), value / self.elapsed)
+            for (section, name, key_field), value in zip(self.table.keys, self.values)
+            if key_field == field and not math.isnan(value)
+        )
+
+
+class MetricsHistory(object):
+    """The last `maxlen` snapshots, all parsed with one table.
+
+    Agents can poll into a history and compute rates over any window it
+    covers without keeping or re-parsing the responses.
+    """
+
+    def __init__(self, maxlen=60):
+        self.table = MetricTable()
+        self._snapshots = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._snapshots))
+
+    def add(self, metrics, timestamp=None):
+        """Parse a metrics() response into a snapshot and keep it, dropping the oldest once full."""
+        snapshot = MetricsSnapshot.from_response(metrics, self.table, timestamp)
+        with self._lock:
+            self._snapshots.append(snapshot)
+        return snapshot
+
+    @property
+    def latest(self):
+        with self._lock:
+            return self._snapshots[-1] if self._snapshots else None
+
+    def delta(self, window=None):
+        """The delta from the oldest snapshot (or the newest one at least `window` seconds old) to the latest.
+
+        None until there are two snapshots.
+        """
+        with self._lock:
+            snapshots = list(self._snapshots)
+        if len(snapshots) < 2:
+            return None
+        latest = snapshots[-1]
+        older = snapshots[0]
+        if window is not None:
+            for snapshot in reversed(snapshots[:-1]):
+                if latest.timestamp - snapshot.timestamp >= window:
+                    older = snapshot
+                    break
+        return latest.delta(older)
+
+    def rate(self, section, name, field=None, window=None, default=None):
+        """The change per second of one value over the history, or over the last `window` seconds of it."""
+        delta = self.delta(window)
+        if delta is None:
+            return default
+        return delta.rate(section, name, field, default)
+
+
+def _key(section, name, field):
+    return section, name, field or DEFAULT_FIELDS.get(section, 'count')
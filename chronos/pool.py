@@ -0,0 +1,126 @@
+"""Thread-safe pool of keep-alive HTTP connections, kept per Chronos server."""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+def close_connection(conn):
+    """Close a pooled connection, ignoring objects that can't be closed."""
+    close = getattr(conn, 'close', None)
+    if close is not None:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+class PooledConnection(object):
+    __slots__ = ('conn', 'created', 'last_used')
+
+    def __init__(self, conn, created):
+        self.conn = conn
+        self.created = created
+        self.last_used = created
+
+
+class ConnectionPool(object):
+    """Keeps up to `maxsize` idle connections per server.
+
+    `factory(server)` is called to open a new connection whenever no idle
+    one is available. Idle connections older than `idle_timeout` seconds, or
+    opened more than `max_lifetime` seconds ago, are closed instead of being
+    handed out again. Either limit may be None to disable it.
+    """
+
+    def __init__(self, factory, maxsize=10, idle_timeout=60.0, max_lifetime=600.0, clock=time.time):
+        self.factory = factory
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self._clock = clock
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.new_connections = 0
+        self.evictions = 0
+
+    def _expired(self, entry, now):
+        if self.idle_timeout is not None and now - entry.last_used > self.idle_timeout:
+            return True
+        if self.max_lifetime is not None and now - entry.created > self.max_lifetime:
+            return True
+        return False
+
+    def acquire(self, server):
+        """Check out a connection to `server`, reusing an idle one if possible."""
+        now = self._clock()
+        expired = []
+        entry = None
+        with self._lock:
+            idle = self._idle.get(server)
+            while idle:
+                candidate = idle.pop()
+                if self._expired(candidate, now):
+                    self.evictions += 1
+                    expired.append(candidate)
+                    continue
+                self.hits += 1
+                entry = candidate
+                break
+            else:
+                self.new_connections += 1
+        for stale in expired:
+            close_connection(stale.conn)
+        if entry is None:
+            entry = PooledConnection(self.factory(server), now)
+        return entry
+
+    def release(self, server, entry):
+        """Return a healthy connection to the pool."""
+        entry.last_used = self._clock()
+        with self._lock:
+            idle = self._idle.setdefault(server, deque())
+            if self.maxsize is None or len(idle) < self.maxsize:
+                idle.append(entry)
+                return
+            self.evictions += 1
+        close_connection(entry.conn)
+
+    def discard(self, entry):
+        """Drop a connection that failed mid-request."""
+        close_connection(entry.conn)
+
+    @contextmanager
+    def connection(self, server):
+        """Context manager yielding a connection to `server`.
+
+        The connection is returned to the pool on success and closed if the
+        block raises.
+        """
+        entry = self.acquire(server)
+        try:
+            yield entry.conn
+        except BaseException:
+            self.discard(entry)
+            raise
+        self.release(server, entry)
+
+    def clear(self):
+        """Close every idle connection."""
+        with self._lock:
+            entries = [entry for idle in self._idle.values() for entry in idle]
+            self._idle = {}
+        for entry in entries:
+            close_connection(entry.conn)
+
+    def stats(self):
+        with self._lock:
+            idle = dict((server, len(entries)) for server, entries in self._idle.items())
+        return {
+            'hits': self.hits,
+            'new_connections': self.new_connections,
+            'evictions': self.evictions,
+            'idle': idle,
+        }
@@ -0,0 +1,91 @@
+"""Timeouts and retry behaviour for Chronos API calls."""
+
+import random
+import time
+
+
+class RetryPolicy(object):
+    """How long a call may take and when it is retried.
+
+    Every call tries each server once (a round): connection errors and
+    error responses move on to the next server, as in earlier releases.
+    Responses with a status in `retry_statuses` also count against the
+    server's circuit breaker. With `raise_client_errors`, any other error
+    status (e.g. a 400 for an invalid job) is raised at once instead.
+
+    Calls with a method in `idempotent_methods` can be retried: when a whole
+    round fails, the call sleeps with exponential backoff and full jitter
+    and starts another round, up to `max_attempts` rounds. Other calls get
+    a single round, and a timed-out request is never sent again, since the
+    server may have acted on it (e.g. added a job or started a run).
+
+    `connect_timeout` and `read_timeout` bound each request; transports that
+    can't tell the two apart use `read_timeout` for both. `deadline` bounds
+    the whole call, including backoff: each request times out by then, and
+    no new request is started once it has passed.
+    """
+
+    def __init__(
+        self, max_attempts=1, backoff=0.1, max_backoff=5.0, jitter=True, deadline=None,
+        connect_timeout=10.0, read_timeout=60.0, retry_statuses=(500, 502, 503, 504),
+        raise_client_errors=False, idempotent_methods=('GET', 'HEAD', 'OPTIONS'),
+        clock=time.time, sleep=time.sleep,
+    ):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retry_statuses = frozenset(retry_statuses)
+        self.raise_client_errors = raise_client_errors
+        self.idempotent_methods = frozenset(idempotent_methods)
+        self.clock = clock
+        self.sleep = sleep
+
+    def is_retryable(self, status):
+        return status in self.retry_statuses
+
+    def raises(self, status):
+        """Whether an error `status` is raised at once instead of trying the next server."""
+        return self.raise_client_errors and 400 <= status < 500
+
+    def can_resend(self, method):
+        """Whether a `method` request may be sent again after it timed out, or in another round."""
+        return method in self.idempotent_methods
+
+    def start(self):
+        """The absolute time by which a call starting now must finish, or None."""
+        if self.deadline is None:
+            return None
+        return self.clock() + self.deadline
+
+    def remaining(self, deadline):
+        if deadline is None:
+            return None
+        return max(0.0, deadline - self.clock())
+
+    def expired(self, deadline):
+        return deadline is not None and self.clock() >= deadline
+
+    def timeout(self, deadline):
+        """Per-request read timeout, shortened to fit in what's left of the deadline."""
+        remaining = self.remaining(deadline)
+        if remaining is None:
+            return self.read_timeout
+        if self.read_timeout is None:
+            return remaining
+        return min(self.read_timeout, remaining)
+
+    def delay(self, attempt, deadline):
+        """Seconds to sleep after `attempt` failed rounds, or None to give up."""
+        if attempt >= self.max_attempts:
+            return None
+        delay = min(self.max_backoff, self.backoff * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        remaining = self.remaining(deadline)
+        if remaining is not None and remaining <= delay:
+            return None
+        return delay
@@ -0,0 +1,148 @@
+"""Server selection for clients talking to several Chronos servers.
+
+ServerRouter decides the order servers are tried in: the last server that
+answered successfully goes first, servers whose circuit breaker has tripped
+go last, and, when health probing is on, the rest are ranked leader first
+and then by probe latency.
+"""
+
+import threading
+import time
+
+
+class CircuitBreaker(object):
+    """Opens after `threshold` consecutive failures.
+
+    While open the server is skipped. After `reset_timeout` seconds the
+    breaker lets requests through again (half-open) and the next outcome
+    either closes or re-opens it.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, threshold=3, reset_timeout=30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    def state(self, now):
+        if self.opened_at is None:
+            return self.CLOSED
+        if now - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self, now):
+        return self.state(now) != self.OPEN
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self, now):
+        self.failures += 1
+        if self.failures >= self.threshold or self.opened_at is not None:
+            self.opened_at = now
+
+
+class ServerRouter(object):
+    """Orders servers for each request and tracks their health."""
+
+    def __init__(self, servers, failure_threshold=3, reset_timeout=30.0, clock=time.time):
+        self.servers = list(servers)
+        self.preferred = None
+        self.breakers = dict(
+            (server, CircuitBreaker(failure_threshold, reset_timeout)) for server in self.servers
+        )
+        self.ranking = list(self.servers)
+        self.probes = {}
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._probe_thread = None
+        self._stop_probing = threading.Event()
+
+    def order(self):
+        """Servers to try for the next request, best first."""
+        now = self._clock()
+        with self._lock:
+            ranked = list(self.ranking)
+            if self.preferred in ranked:
+                ranked.remove(self.preferred)
+                ranked.insert(0, self.preferred)
+            available = [server for server in ranked if self.breakers[server].allow(now)]
+            tripped = [server for server in ranked if server not in available]
+        # servers with an open breaker are only tried once everything else has failed
+        return available + tripped
+
+    def success(self, server):
+        with self._lock:
+            self.preferred = server
+            self.breakers[server].record_success()
+
+    def failure(self, server):
+        with self._lock:
+            if self.preferred == server:
+                self.preferred = None
+            self.breakers[server].record_failure(self._clock())
+
+    def record_probes(self, results):
+        """Re-rank servers from probe results.
+
+        `results` maps each server to ``(latency, is_leader)``, or to None if
+        the probe failed. A leader found by the probes becomes the preferred
+        server.
+        """
+        results = dict(results)
+        with self._lock:
+            self.probes = results
+            now = self._clock()
+            for server, result in self.probes.items():
+                if result is None:
+                    self.breakers[server].record_failure(now)
+                else:
+                    self.breakers[server].record_success()
+                    if result[1]:
+                        self.preferred = server
+
+            def rank(server):
+                result = self.probes.get(server)
+                if result is None:
+                    return (2, 0)
+                latency, is_leader = result
+                return (0 if is_leader else 1, latency)
+            self.ranking = sorted(self.servers, key=rank)
+
+    def start_probing(self, probe, interval):
+        """Call `probe(server)` for every server each `interval` seconds in a daemon thread."""
+        if self._probe_thread is not None:
+            return
+        self._stop_probing.clear()
+
+        def run():
+            while not self._stop_probing.is_set():
+                self.record_probes((server, probe(server)) for server in self.servers)
+                self._stop_probing.wait(interval)
+
+        self._probe_thread = threading.Thread(target=run, name='chronos-health-probe')
+        self._probe_thread.daemon = True
+        self._probe_thread.start()
+
+    def stop_probing(self):
+        if self._probe_thread is None:
+            return
+        self._stop_probing.set()
+        self._probe_thread.join()
+        self._probe_thread = None
+
+    def stats(self):
+        now = self._clock()
+        with self._lock:
+            return {
+                'preferred': self.preferred,
+                'ranking': list(self.ranking),
+                'breakers': dict((server, breaker.state(now)) for server, breaker in self.breakers.items()),
+                'probes': dict(self.probes),
+            }
@@ -0,0 +1,345 @@
+"""Expected run times of scheduled jobs, computed for a whole job listing at once.
+
+A schedule is an ISO8601 repeating interval, ``R[n]/start/period``: up to
+`n` runs (unlimited without `n`), the first at `start`, each one `period`
+after the last. Chronos moves `start` on to the next run after every run,
+so a healthy job's start is at most one period ahead, and one whose start
+is well in the past has missed a run.
+
+Times are computed in UTC. Periods with years or months step through the
+calendar; every other period has a fixed length, so days are 24 hours and
+DST changes in a job's ``scheduleTimeZone`` are not applied.
+"""
+
+import calendar
+import math
+import time
+from array import array
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+
+from chronos.iso8601 import UTC, parse_datetime, parse_duration_parts
+
+# Chronos runs a job up to this long after its scheduled time if it has no epsilon
+DEFAULT_EPSILON = 60.0
+
+# the average month, for a first guess at how many months have passed
+_MONTH = 365.2425 / 12 * 86400
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_MISSING = float('nan')
+_UNLIMITED = float('inf')
+
+
+class Schedule(namedtuple('Schedule', ('repetitions', 'start', 'months', 'period'))):
+    """A parsed schedule.
+
+    `repetitions` is None for unlimited runs, `start` an aware datetime (None
+    if the schedule leaves it out) and the period is `months` calendar months
+    plus the timedelta `period`.
+    """
+
+    __slots__ = ()
+
+
+def parse_schedule(schedule):
+    """Parse ``R[n]/start/period`` into a Schedule; raises ValueError if it isn't one."""
+    parts = schedule.split('/') if schedule else ()
+    if len(parts) != 3 or not parts[0].startswith('R') or not (parts[0][1:].isdigit() or parts[0] == 'R'):
+        raise ValueError('schedule %r is not of the form R[n]/[start]/period' % (schedule,))
+    repetitions = int(parts[0][1:]) if parts[0] != 'R' else None
+    try:
+        start = parse_datetime(parts[1])
+    except ValueError:
+        raise ValueError('schedule %r has an invalid start time' % (schedule,))
+    try:
+        duration = parse_duration_parts(parts[2])
+    except ValueError:
+        raise ValueError('schedule %r has an invalid period' % (schedule,))
+    months = duration.pop('years', 0) * 12 + duration.pop('months', 0)
+    if months != int(months):
+        raise ValueError('schedule %r has a fractional number of months' % (schedule,))
+    period = timedelta(**duration)
+    if not months and period <= timedelta(0):
+        raise ValueError('schedule %r has an empty period' % (schedule,))
+    return Schedule(repetitions, start, int(months), period)
+
+
+def add_months(dt, months):
+    """`dt` moved by a number of calendar months, with the day clamped to the end of the month."""
+    month = dt.month - 1 + months
+    year = dt.year + month // 12
+    month = month % 12 + 1
+    return dt.replace(year=year, month=month, day=min(dt.day, calendar.monthrange(year, month)[1]))
+
+
+def _timestamp(dt):
+    return (dt - _EPOCH).total_seconds()
+
+
+def _seconds(value, parse):
+    try:
+        parsed = parse(value) if value else None
+    except (TypeError, ValueError):
+        return _MISSING
+    if parsed is None:
+        return _MISSING
+    return parsed if isinstance(parsed, float) else _timestamp(parsed)
+
+
+def _epsilon(value):
+    try:
+        return timedelta(**parse_duration_parts(value)).total_seconds()
+    except (TypeError, ValueError):
+        return DEFAULT_EPSILON
+
+
+class ScheduleTable(object):
+    """The schedules of many jobs, parsed once into columns.
+
+    Each column of `columns` is an ``array('d')`` in the order of `names`:
+    ``start``, ``period`` and ``last_success``/``last_error`` in seconds
+    (times since the epoch), ``repetitions`` (inf if unlimited) and
+    ``epsilon``. Jobs without a schedule, such as dependent jobs, have
+    NaN. Periods with months are kept in `months` by position and handled
+    one job at a time; everything else is computed for all jobs at once,
+    with numpy ``datetime64`` arrays if numpy is installed.
+    `errors` has the reason for every schedule that couldn't be parsed.
+    """
+
+    COLUMNS = ('start', 'period', 'repetitions', 'epsilon', 'last_success', 'last_error')
+
+    def __init__(self, use_numpy=None):
+        self.names = []
+        self.index = {}
+        self.disabled = array('b')
+        self.columns = OrderedDict((column, array('d')) for column in self.COLUMNS)
+        self.months = {}
+        self.errors = {}
+        # jobs share a handful of epsilons; parse each once
+        self._epsilons = {}
+        self.numpy = _load_numpy() if use_numpy is None or use_numpy else None
+        if use_numpy and self.numpy is None:
+            raise ImportError('numpy is not installed')
+
+    @classmethod
+    def from_jobs(cls, jobs, use_numpy=None):
+        """Parse the schedules of a job listing (dicts or ChronosJob records)."""
+        table = cls(use_numpy)
+        for job in jobs:
+            table.add(job)
+        return table
+
+    def add(self, job):
+        name = job.get('name')
+        self.index[name] = len(self.names)
+        self.names.append(name)
+        self.disabled.append(bool(job.get('disabled')))
+        columns = self.columns
+        start = period = repetitions = _MISSING
+        schedule = job.get('schedule')
+        if schedule:
+            try:
+                parsed = parse_schedule(schedule)
+            except (TypeError, ValueError) as e:
+                self.errors[name] = str(e)
+            else:
+                if parsed.start is not None:
+                    start = _timestamp(parsed.start)
+                    period = parsed.period.total_seconds()
+                    repetitions = _UNLIMITED if parsed.repetitions is None else parsed.repetitions
+                    if parsed.months:
+                        self.months[len(self.names) - 1] = parsed.months
+        columns['start'].append(start)
+        columns['period'].append(period)
+        columns['repetitions'].append(repetitions)
+        epsilon = job.get('epsilon')
+        seconds = self._epsilons.get(epsilon)
+        if seconds is None:
+            seconds = self._epsilons[epsilon] = _epsilon(epsilon)
+        columns['epsilon'].append(seconds)
+        columns['last_success'].append(_seconds(job.get('lastSuccess'), parse_datetime))
+        columns['last_error'].append(_seconds(job.get('lastError'), parse_datetime))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def runs(self, now=None):
+        """``(previous, next, due)`` columns of times in seconds for `now` (default: the current time).
+
+        `previous` is the last scheduled run at or before `now` and `next`
+        the first one after it. `due` is the run the job should have
+        finished last: `previous`, or, for a job whose start Chronos has
+        moved past `now` after a success, the run one period before it.
+        """
+        now = time.time() if now is None else now
+        if self.numpy is not None:
+            previous, following, due = self._runs_numpy(now)
+        else:
+            previous, following, due = self._runs_python(now)
+        for position, months in self.months.items():
+            runs = self._calendar_runs(position, months, now)
+            previous[position], following[position], due[position] = runs
+        return previous, following, due
+
+    def next_runs(self, now=None):
+        """The next scheduled run of every job, in seconds since the epoch; NaN if there isn't one."""
+        return self.runs(now)[1]
+
+    def previous_runs(self, now=None):
+        """The last scheduled run of every job at or before `now`; NaN if there hasn't been one."""
+        return self.runs(now)[0]
+
+    def next_run(self, name, now=None):
+        """The next scheduled run of job `name` as a datetime, or None."""
+        value = self.next_runs(now)[self.index[name]]
+        return None if math.isnan(value) else _EPOCH + timedelta(seconds=value)
+
+    def overdue(self, now=None, grace=0.0):
+        """Names of the enabled jobs that haven't succeeded since a run that was due more than epsilon + `grace` ago.
+
+        These are jobs that stalled: Chronos didn't run them, or a run
+        hangs. Jobs whose last run failed are left to failing().
+        """
+        now = time.time() if now is None else now
+        due = self.runs(now)[2]
+        columns = self.columns
+        if self.numpy is not None:
+            np = self.numpy
+            due = np.frombuffer(due, dtype=np.float64)
+            epsilon = np.frombuffer(columns['epsilon'], dtype=np.float64)
+            success = np.frombuffer(columns['last_success'], dtype=np.float64)
+            error = np.frombuffer(columns['last_error'], dtype=np.float64)
+            disabled = np.frombuffer(self.disabled, dtype=np.int8).astype(bool)
+            with np.errstate(invalid='ignore'):
+                late = (now - due > epsilon + grace) & ~(success >= due) & ~(error >= due) & ~disabled
+            return [self.names[position] for position in np.flatnonzero(late)]
+        return [
+            name for name, due_at, job_epsilon, last_success, last_error, job_disabled in zip(
+                self.names, due, columns['epsilon'], columns['last_success'], columns['last_error'], self.disabled,
+            )
+            if now - due_at > job_epsilon + grace
+            and not (last_success >= due_at or last_error >= due_at or job_disabled)
+        ]
+
+    def failing(self):
+        """Names of the jobs whose last run failed: lastError is later than lastSuccess."""
+        columns = self.columns
+        return [
+            name for name, error, success in zip(self.names, columns['last_error'], columns['last_success'])
+            if error > success or (success != success and error == error)
+        ]
+
+    def as_numpy(self, now=None):
+        """``{column: numpy.ndarray}`` with the times as ``datetime64[ms]`` (NaT if unknown). Requires numpy."""
+        import numpy
+        previous, following, due = self.runs(now)
+        columns = OrderedDict([('previous', previous), ('next', following), ('due', due)])
+        columns['last_success'] = self.columns['last_success']
+        columns['last_error'] = self.columns['last_error']
+        return OrderedDict((column, _datetime64(numpy, values)) for column, values in columns.items())
+
+    def _runs_python(self, now):
+        columns = self.columns
+        previous = array('d', [_MISSING]) * len(self)
+        following = array('d', previous)
+        due = array('d', previous)
+        rows = zip(columns['start'], columns['period'], columns['repetitions'], columns['last_success'])
+        for position, (start, period, repetitions, success) in enumerate(rows):
+            if not period > 0 or position in self.months:
+                continue
+            count = math.floor((now - start) / period)
+            previous[position], following[position], due[position] = _pick(
+                count, repetitions, success, lambda index: start + index * period,
+            )
+        return previous, following, due
+
+    def _runs_numpy(self, now):
+        np = self.numpy
+        columns = self.columns
+        nat = np.iinfo(np.int64).min
+        start = _datetime64(np, columns['start'])
+        period = _datetime64(np, columns['period']).view('timedelta64[ms]')
+        repetitions = np.frombuffer(columns['repetitions'], dtype=np.float64)
+        success = np.frombuffer(columns['last_success'], dtype=np.float64)
+        fixed = ~np.isnat(start) & (period > np.timedelta64(0, 'ms'))
+        if self.months:
+            fixed[list(self.months)] = False
+        moment = np.datetime64(int(round(now * 1000)), 'ms')
+        count = np.full(len(self), -2, dtype=np.int64)
+        count[fixed] = (moment - start[fixed]).view(np.int64) // period[fixed].view(np.int64)
+
+        def at(index):
+            times = np.full(len(self), nat, dtype=np.int64).view('datetime64[ms]')
+            known = fixed & (index > -2)
+            times[known] = start[known] + index[known] * period[known]
+            return times
+
+        # the last run, capped at the final repetition
+        with np.errstate(invalid='ignore'):
+            last = np.where(count >= repetitions, repetitions - 1, count).astype(np.int64)
+        previous = at(np.where((last >= 0) & (repetitions >= 1), last, -2))
+        following = at(np.where(count < 0, 0, np.where(count + 1 < repetitions, count + 1, -2)))
+        behind = np.where((count == -1) & ~np.isnan(success), -1, -2)
+        due = np.where(last >= 0, previous, at(behind))
+        return tuple(_seconds_array(np, times) for times in (previous, following, due))
+
+    def _calendar_runs(self, position, months, now):
+        columns = self.columns
+        start = _EPOCH + timedelta(seconds=columns['start'][position])
+        period = timedelta(seconds=columns['period'][position])
+
+        def at(index):
+            return _timestamp(add_months(start, index * months) + index * period)
+
+        count = int((now - columns['start'][position]) // (months * _MONTH + period.total_seconds()))
+        while count > -1 and at(count) > now:
+            count -= 1
+        while at(count + 1) <= now:
+            count += 1
+        return _pick(count, columns['repetitions'][position], columns['last_success'][position], at)
+
+    def __repr__(self):
+        return '<ScheduleTable %d jobs>' % len(self)
+
+
+def _pick(count, repetitions, success, at):
+    """(previous, next, due) for a job whose `count`th run (from 0) is the last one at or before now."""
+    last = repetitions - 1 if count >= repetitions else count
+    previous = at(last) if last >= 0 and repetitions >= 1 else _MISSING
+    if count < 0:
+        following = at(0)
+    else:
+        following = at(count + 1) if count + 1 < repetitions else _MISSING
+    if last >= 0:
+        due = previous
+    elif count == -1 and success == success:
+        due = at(-1)
+    else:
+        due = _MISSING
+    return previous, following, due
+
+
+def _datetime64(np, column):
+    """An array('d') of seconds as datetime64[ms], with NaT for NaN."""
+    seconds = np.frombuffer(column, dtype=np.float64)
+    millis = np.full(len(seconds), np.iinfo(np.int64).min, dtype=np.int64)
+    known = ~np.isnan(seconds)
+    millis[known] = np.round(seconds[known] * 1000)
+    return millis.view('datetime64[ms]')
+
+
+def _seconds_array(np, times):
+    seconds = times.view(np.int64) / 1000.0
+    seconds[np.isnat(times)] = np.nan
+    return array('d', seconds.tobytes())
+
+
+def _load_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
@@ -0,0 +1,115 @@
+"""Scheduler-wide job timings, merged from the /scheduler/stats endpoints."""
+
+import heapq
+import math
+from array import array
+from collections import OrderedDict, namedtuple
+
+# column name -> /scheduler/stats/<path>
+STAT_PATHS = OrderedDict([
+    ('p99', '99thPercentile'),
+    ('p98', '98thPercentile'),
+    ('p95', '95thPercentile'),
+    ('p75', '75thPercentile'),
+    ('median', 'median'),
+    ('mean', 'mean'),
+])
+
+JobTimings = namedtuple('JobTimings', ('name',) + tuple(STAT_PATHS))
+
+_MISSING = float('nan')
+
+
+class SchedulerStats(object):
+    """Run time statistics of every job, one column per statistic.
+
+    Each column of `columns` is an ``array('d')`` of durations in the
+    order of `names`, with NaN where Chronos had no value for a job, so
+    ranking and filtering thousands of jobs doesn't build a dict per job.
+    `as_numpy()` returns the columns as numpy arrays without copying.
+    `metrics` holds the /metrics response if it was fetched.
+    """
+
+    def __init__(self, names=(), columns=None, metrics=None):
+        self.names = list(names)
+        self.index = dict((name, position) for position, name in enumerate(self.names))
+        self.columns = OrderedDict((stat, array('d')) for stat in STAT_PATHS)
+        for stat, values in (columns or {}).items():
+            self.columns[stat] = array('d', values)
+        self.metrics = metrics
+
+    @classmethod
+    def from_responses(cls, responses, metrics=None):
+        """Merge ``{column: response of /scheduler/stats/<path>}`` into one table.
+
+        Each response is a list of ``{"jobNameLabel": name, "time": duration}``.
+        """
+        stats = cls(metrics=metrics)
+        index = stats.index
+        names = stats.names
+        for stat in STAT_PATHS:
+            for entry in responses.get(stat) or ():
+                name = entry.get('jobNameLabel')
+                if name is not None and name not in index:
+                    index[name] = len(names)
+                    names.append(name)
+        for stat in STAT_PATHS:
+            column = stats.columns[stat] = array('d', [_MISSING]) * len(names)
+            for entry in responses.get(stat) or ():
+                name = entry.get('jobNameLabel')
+                if name is not None and entry.get('time') is not None:
+                    column[index[name]] = float(entry['time'])
+        return stats
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __getitem__(self, name):
+        position = self.index[name]
+        return JobTimings(name, *[_value(column[position]) for column in self.columns.values()])
+
+    def get(self, name, default=None):
+        if name not in self.index:
+            return default
+        return self[name]
+
+    def column(self, stat):
+        """``{name: value}`` for one statistic, leaving out jobs without one."""
+        return OrderedDict(
+            (name, value) for name, value in zip(self.names, self.columns[stat]) if not math.isnan(value)
+        )
+
+    def top(self, n, by='p99'):
+        """The `n` slowest jobs by statistic `by`, as ``[(name, value)]``, slowest first."""
+        column = self.columns[by]
+        positions = heapq.nlargest(
+            n, (position for position in range(len(column)) if not math.isnan(column[position])),
+            key=column.__getitem__,
+        )
+        return [(self.names[position], column[position]) for position in positions]
+
+    def where(self, by='p99', minimum=None, maximum=None):
+        """Names of jobs whose statistic `by` is within [minimum, maximum]."""
+        low = -float('inf') if minimum is None else minimum
+        high = float('inf') if maximum is None else maximum
+        return [name for name, value in zip(self.names, self.columns[by]) if low <= value <= high]
+
+    def as_numpy(self):
+        """``{column: numpy.ndarray}`` sharing memory with `columns`. Requires numpy."""
+        import numpy
+        return OrderedDict(
+            (stat, numpy.frombuffer(column, dtype=numpy.float64)) for stat, column in self.columns.items()
+        )
+
+    def __repr__(self):
+        return '<SchedulerStats %d jobs>' % len(self.names)
+
+
+def _value(value):
+    return None if math.isnan(value) else value
@@ -0,0 +1,107 @@
+"""Incremental decoding of large JSON array responses such as /scheduler/jobs."""
+
+import codecs
+import json
+import re
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_START, _FIRST, _VALUE, _SEPARATOR, _DONE = range(5)
+
+
+class Response(dict):
+    """Lower-cased response headers plus the status, like httplib2.Response.
+
+    `wire_bytes` is the size of the body as received, before decompression.
+    """
+
+    def __init__(self, status, reason=''):
+        super(Response, self).__init__()
+        self.status = status
+        self.reason = reason
+        self.wire_bytes = None
+
+
+class JSONArrayParser(object):
+    """Decodes a JSON array fed to it in arbitrary byte chunks.
+
+    `feed` returns the elements completed by each chunk, so only one element
+    (plus the undecoded tail of the last chunk) is held at a time. With
+    `fields`, each object element is cut down to those keys as soon as it is
+    decoded.
+
+    The unwanted keys are still decoded and then dropped: skipping their
+    values in Python is about ten times slower than letting the C decoder
+    build the whole element, and only one element is alive at a time.
+    """
+
+    def __init__(self, fields=None):
+        self.fields = tuple(fields) if fields is not None else None
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._state = _START
+
+    def feed(self, data, final=False):
+        buf = self._buffer[self._pos:] + self._text.decode(data, final)
+        pos = 0
+        items = []
+        while True:
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos == len(buf):
+                break
+            char = buf[pos]
+            if self._state == _START:
+                if char != '[':
+                    raise ValueError('expected a JSON array, got %r' % char)
+                self._state = _FIRST
+                pos += 1
+            elif self._state == _SEPARATOR or (self._state == _FIRST and char == ']'):
+                if char == ']':
+                    self._state = _DONE
+                elif char != ',':
+                    raise ValueError('expected "," or "]" at %r' % buf[pos:pos + 20])
+                else:
+                    self._state = _VALUE
+                pos += 1
+            elif self._state == _DONE:
+                raise ValueError('unexpected data after the end of the array: %r' % buf[pos:pos + 20])
+            else:
+                try:
+                    item, end = self._decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if final:
+                        raise
+                    break
+                # a number at the end of the buffer may continue in the next chunk
+                if end == len(buf) and not final and not isinstance(item, (dict, list)):
+                    break
+                items.append(self._project(item))
+                self._state = _SEPARATOR
+                pos = end
+        self._buffer = buf
+        self._pos = pos
+        return items
+
+    def close(self):
+        """Signal the end of the input and return any remaining elements."""
+        items = self.feed(b'', final=True)
+        if self._state != _DONE:
+            raise ValueError('truncated JSON array')
+        return items
+
+    def _project(self, item):
+        if self.fields is None or not isinstance(item, dict):
+            return item
+        return dict((field, item[field]) for field in self.fields if field in item)
+
+
+def iter_json_array(chunks, fields=None):
+    """Yield the elements of a JSON array whose bytes arrive as `chunks`."""
+    parser = JSONArrayParser(fields)
+    for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
@@ -0,0 +1,332 @@
+"""Helpers for pushing local job definitions to Chronos (see chronos-sync-jobs.py)."""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+from chronos import ChronosError
+from chronos import bulk
+
+logger = logging.getLogger(__name__)
+
+
+def find_job_files(path):
+    """Yield every file under `path` whose name ends in "json", in sorted order.
+
+    Directories are listed one at a time as the paths are consumed, and the
+    order is the same as sorting the full list of paths.
+    """
+    # sorting directories as "name/" within each listing gives the global order
+    for name, is_dir in sorted(_entries(path), key=lambda entry: entry[0] + ('/' if entry[1] else '')):
+        child = path + '/' + name
+        if is_dir:
+            for job_file in find_job_files(child):
+                yield job_file
+        elif name.endswith('json'):
+            yield child
+
+
+def _entries(path):
+    """(name, is_dir) for everything in `path`, leaving out links to directories as os.walk does."""
+    entries = []
+    if scandir is not None:
+        for entry in scandir(path):
+            if not entry.is_dir():
+                entries.append((entry.name, False))
+            elif not entry.is_symlink():
+                entries.append((entry.name, True))
+    else:
+        for name in os.listdir(path):
+            child = os.path.join(path, name)
+            if not os.path.isdir(child):
+                entries.append((name, False))
+            elif not os.path.islink(child):
+                entries.append((name, True))
+    return entries
+
+
+def parse_job(data):
+    """Decode the contents of a job file; raises ValueError if it isn't a job definition."""
+    try:
+        job = json.loads(data.decode('utf-8'))
+    except ValueError as e:
+        raise ValueError('failed to decode: %s' % e)
+    if not isinstance(job, dict) or 'name' not in job:
+        raise ValueError('not a job definition: no "name"')
+    return job
+
+
+def read_job_file(path):
+    """Return ``(job, None)`` for a valid job file and ``(None, reason)`` otherwise."""
+    try:
+        with open(path, 'rb') as f:
+            return parse_job(f.read()), None
+    except (IOError, OSError, ValueError) as e:
+        return None, str(e)
+
+
+class JobFileLoader(object):
+    """Reads and decodes job files on a pool of workers.
+
+    `load` yields ``(path, job)`` in the order of the given paths while
+    later files are still being read, so callers can start on the first jobs
+    straight away. Files that can't be loaded give a job of None, with the
+    reason kept in `errors` by path. Threads suit slow (e.g. network)
+    filesystems; `processes` also spreads JSON decoding over several CPUs.
+    """
+
+    def __init__(self, max_workers=8, processes=False):
+        self.max_workers = max_workers
+        self.processes = processes
+        self.errors = {}
+
+    def load(self, paths):
+        executor_class = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+        for path, (job, error) in _ordered_map(read_job_file, paths, self.max_workers, executor_class):
+            if error is not None:
+                self.errors[path] = error
+            yield path, job
+
+
+def _ordered_map(func, items, max_workers, executor_class=ThreadPoolExecutor):
+    """Yield ``(item, func(item))`` in order, running up to twice `max_workers` calls ahead."""
+    executor = executor_class(max_workers=max_workers)
+    pending = deque()
+    try:
+        for item in items:
+            pending.append((item, executor.submit(func, item)))
+            if len(pending) >= 2 * max_workers:
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+    finally:
+        for item, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def fingerprint(job):
+    """A hash of a job definition that doesn't depend on key order or formatting."""
+    data = json.dumps(job, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class SyncState(object):
+    """What was last synced from each job file, kept in a local JSON file.
+
+    For every file the state holds its mtime and size, the hash of its
+    contents and the fingerprint of the definition that was last found in
+    sync with Chronos. `scan` uses it to pick out the files that may need
+    pushing: a file whose mtime and size are unchanged isn't read at all,
+    and one whose contents hash the same isn't parsed.
+
+    A file is only recorded by `mark_synced`, once its job is known to match
+    Chronos, so a failed push is retried on the next run.
+    """
+
+    VERSION = 1
+    # files modified this recently (in seconds) are always hashed on the next scan
+    RACY_WINDOW = 2.0
+
+    def __init__(self, path, files=None, last_full=None, clock=time.time):
+        self.path = path
+        self.files = files or {}
+        self.last_full = last_full
+        self._clock = clock
+        self._scanned = {}
+        self.errors = {}
+
+    @classmethod
+    def load(cls, path, clock=time.time):
+        """Read the state from `path`; a missing or unreadable file gives an empty state."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get('version') != cls.VERSION:
+                raise ValueError('unsupported version %r' % (data.get('version'),))
+        except IOError as e:
+            if os.path.exists(path):
+                logger.warning('Ignoring unreadable sync state %s: %s', path, e)
+            return cls(path, clock=clock)
+        except ValueError as e:
+            logger.warning('Ignoring invalid sync state %s: %s', path, e)
+            return cls(path, clock=clock)
+        return cls(path, data.get('files'), data.get('last_full'), clock=clock)
+
+    def save(self):
+        """Write the state atomically, keeping only files seen by the last `scan`."""
+        files = dict((path, entry) for path, entry in self.files.items() if path in self._scanned)
+        tmp = '%s.tmp' % self.path
+        with open(tmp, 'w') as f:
+            json.dump({'version': self.VERSION, 'last_full': self.last_full, 'files': files}, f, sort_keys=True)
+        os.rename(tmp, self.path)
+        self.files = files
+
+    def reconcile_due(self, interval):
+        """True if a full reconcile hasn't happened in the last `interval` seconds."""
+        if interval is None:
+            return False
+        return self.last_full is None or self._clock() - self.last_full >= interval
+
+    def scan(self, paths, full=False, max_workers=8):
+        """Return ``(path, job)`` for each file that may be out of sync with Chronos.
+
+        Files are checked on `max_workers` threads. `job` is None for files
+        that aren't valid job definitions; the reasons are left in `errors`.
+        With `full`, every file is parsed and returned.
+        """
+        self._scanned = {}
+        self.errors = {}
+        dirty = []
+        for path, result in _ordered_map(lambda path: self._scan_file(path, full), paths, max_workers):
+            if result is not None:
+                job, error = result
+                if error is not None:
+                    self.errors[path] = error
+                dirty.append((path, job))
+        return dirty
+
+    def _scan_file(self, path, full):
+        # a file removed or made unreadable since it was listed is reported like an invalid one,
+        # and is left out of the saved state
+        try:
+            st = os.stat(path)
+            entry = self.files.get(path)
+            if not full and entry and entry['mtime'] == st.st_mtime and entry['size'] == st.st_size:
+                self._scanned[path] = None
+                return None
+            with open(path, 'rb') as f:
+                data = f.read()
+        except (IOError, OSError) as e:
+            return None, str(e)
+        digest = hashlib.sha256(data).hexdigest()
+        self._scanned[path] = (st.st_mtime, st.st_size, digest)
+        if not full and entry and entry['sha256'] == digest:
+            self._record(path, entry['definition'])
+            return None
+        try:
+            job = parse_job(data)
+        except ValueError as e:
+            return None, str(e)
+        if not full and entry and fingerprint(job) == entry['definition']:
+            self._record(path, entry['definition'])
+            return None
+        return job, None
+
+    def mark_synced(self, path, job):
+        """Record that the job in `path`, as last scanned, matches Chronos."""
+        self._record(path, fingerprint(job))
+
+    def mark_full(self):
+        self.last_full = self._clock()
+
+    def _record(self, path, definition):
+        mtime, size, digest = self._scanned[path]
+        if self._clock() - mtime < self.RACY_WINDOW:
+            # the file could still change without its mtime moving, so hash it next time
+            mtime = None
+        self.files[path] = {'mtime': mtime, 'size': size, 'sha256': digest, 'definition': definition}
+
+
+def dependency_waves(jobs, existing=()):
+    """Split `jobs` into waves that can each be pushed concurrently.
+
+    Every job's parents are either in `existing` (names already on Chronos)
+    or in an earlier wave, so Chronos never sees a dependent job before its
+    parents. Returns ``(waves, blocked)``, where `blocked` maps the name of
+    each job that can't be scheduled to the reason why.
+    """
+    existing = set(existing)
+    by_name = dict((job['name'], job) for job in jobs)
+    waiting = {}
+    children = defaultdict(list)
+    blocked = {}
+    for job in jobs:
+        name = job['name']
+        parents = set(job.get('parents') or []) - existing
+        missing = sorted(parent for parent in parents if parent not in by_name)
+        if missing:
+            blocked[name] = 'missing parent job(s): %s' % ', '.join(missing)
+        waiting[name] = parents - set(missing)
+        for parent in waiting[name]:
+            children[parent].append(name)
+
+    waves = []
+    wave = [job['name'] for job in jobs if not waiting[job['name']] and job['name'] not in blocked]
+    while wave:
+        waves.append([by_name[ready_name] for ready_name in wave])
+        ready = []
+        for name in wave:
+            for child in children[name]:
+                waiting[child].discard(name)
+                if not waiting[child] and child not in blocked:
+                    ready.append(child)
+        wave = ready
+
+    for job in jobs:
+        name = job['name']
+        if waiting[name] and name not in blocked:
+            blocked[name] = 'waiting on blocked or cyclic parent job(s): %s' % ', '.join(sorted(waiting[name]))
+    return waves, blocked
+
+
+def push_waves(client, waves, updates=(), max_workers=8):
+    """Add or update each wave of jobs concurrently, one wave at a time.
+
+    Jobs named in `updates` are updated, the rest are added. A job whose
+    parent failed to sync is not sent and is reported as failed. Yields a
+    BulkItemResult for every job as it finishes.
+    """
+    updates = set(updates)
+    failed = set()
+
+    def push(job):
+        if job['name'] in updates:
+            return client.update(job)
+        return client.add(job)
+
+    for wave in waves:
+        ready = []
+        rejected = []
+        for job in wave:
+            failed_parents = sorted(failed.intersection(job.get('parents') or []))
+            if failed_parents:
+                error = ChronosError('parent job(s) failed to sync: %s' % ', '.join(failed_parents))
+                rejected.append((job, error))
+            else:
+                ready.append(job)
+        for item in bulk.submit(push, ready, max_workers, rejected):
+            if not item.ok:
+                failed.add(item.name)
+            yield item
+
+
+def fetch_jobs(client, names, search_limit=20):
+    """The jobs on Chronos called any of `names`, as a dict by name.
+
+    Up to `search_limit` names are looked up one by one with search();
+    beyond that, a single list() is cheaper and returns every job.
+    """
+    names = set(names)
+    if len(names) > search_limit:
+        return dict((job['name'], job) for job in client.list())
+    jobs = {}
+    for name in names:
+        for job in client.search(name=name):
+            if job['name'] == name:
+                jobs[name] = job
+    return jobs
@@ -0,0 +1,328 @@
+"""HTTP transports for ChronosClient.
+
+A transport opens connections for the connection pool. A connection has
+``request(uri, method, body=None, headers=None)`` returning ``(response,
+content)`` like ``httplib2.Http.request``: `response` has a `status` and
+lower-cased headers, and `content` is the body as bytes. Each transport
+imports its HTTP library only when it is created, so importing chronos
+stays cheap for tools that never make a request.
+"""
+
+import base64
+import socket
+import ssl
+
+from chronos.compression import ACCEPT_ENCODING, decompress
+from chronos.stream import Response
+
+try:
+    from urlparse import urlsplit
+except ImportError:
+    from urllib.parse import urlsplit
+
+try:
+    import httplib as http_client
+except ImportError:
+    import http.client as http_client
+
+
+class Transport(object):
+    """Base class of transports; subclasses implement connect() and set `errors`.
+
+    `errors` are the exceptions that mean a server couldn't be reached; the
+    client fails over to the next server on them. `timeouts` are the ones
+    among them after which the request may have reached the server.
+    """
+
+    name = None
+    errors = (socket.error,)
+    timeouts = (socket.timeout,)
+
+    def __init__(self, timeout=None, connect_timeout=None, validate_ssl_certificates=True, credentials=None):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.validate_ssl_certificates = validate_ssl_certificates
+        self.credentials = credentials
+
+    def connect(self, server):
+        """A new connection to `server` (``proto://host:port``)."""
+        raise NotImplementedError
+
+    def set_timeout(self, conn, timeout):
+        """Limit the next requests on `conn` to `timeout` seconds.
+
+        The client calls this before each request of a call with a deadline,
+        with whatever is left of it. The default does nothing.
+        """
+
+    def authorization(self):
+        """The Basic Authorization header value for `credentials`, or None."""
+        if not self.credentials:
+            return None
+        token = base64.b64encode(('%s:%s' % self.credentials).encode('utf-8'))
+        return 'Basic %s' % token.decode('ascii')
+
+    def ssl_context(self):
+        context = ssl.create_default_context()
+        if not self.validate_ssl_certificates:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        return context
+
+
+class Httplib2Transport(Transport):
+    """httplib2.Http connections; the default, as in earlier releases."""
+
+    name = 'httplib2'
+
+    def __init__(self, *args, **kwargs):
+        import httplib2
+        super(Httplib2Transport, self).__init__(*args, **kwargs)
+        self.httplib2 = httplib2
+        self.errors = (socket.error, httplib2.ServerNotFoundError)
+
+    def connect(self, server):
+        # httplib2 has a single socket timeout for connecting and reading
+        conn = self.httplib2.Http(
+            timeout=self.timeout, disable_ssl_certificate_validation=not self.validate_ssl_certificates,
+        )
+        if self.credentials:
+            conn.add_credentials(*self.credentials)
+        conn._conn_request = _measure_wire_bytes(conn._conn_request)
+        return conn
+
+    def set_timeout(self, conn, timeout):
+        # httplib2 passes its timeout to new connections only; update the open ones too
+        conn.timeout = timeout
+        for open_conn in conn.connections.values():
+            open_conn.timeout = timeout
+            if getattr(open_conn, 'sock', None) is not None:
+                open_conn.sock.settimeout(timeout)
+
+
+class HTTPClientTransport(Transport):
+    """Persistent http.client (httplib) connections, without third-party dependencies.
+
+    Responses are requested gzip- or deflate-compressed and decompressed here.
+    """
+
+    name = 'http.client'
+    errors = (socket.error, http_client.HTTPException)
+
+    def connect(self, server):
+        return HTTPClientConnection(server, self)
+
+    def set_timeout(self, conn, timeout):
+        conn.set_timeout(timeout)
+
+
+class HTTPClientConnection(object):
+    """One keep-alive http.client connection, reopened when the server has closed it."""
+
+    def __init__(self, server, transport):
+        parts = urlsplit(server)
+        self.https = parts.scheme == 'https'
+        self.netloc = parts.netloc
+        self.prefix = len(server)
+        self.transport = transport
+        self.authorization = transport.authorization()
+        self.timeout = transport.timeout
+        self._conn = None
+
+    def _connect(self):
+        transport = self.transport
+        timeout = _shorter(transport.connect_timeout or transport.timeout, self.timeout)
+        if self.https:
+            conn = http_client.HTTPSConnection(self.netloc, timeout=timeout, context=transport.ssl_context())
+        else:
+            conn = http_client.HTTPConnection(self.netloc, timeout=timeout)
+        conn.connect()
+        conn.sock.settimeout(self.timeout)
+        return conn
+
+    def set_timeout(self, timeout):
+        self.timeout = timeout
+        if self._conn is not None and self._conn.sock is not None:
+            self._conn.sock.settimeout(timeout)
+
+    def request(self, uri, method='GET', body=None, headers=None):
+        target = uri[self.prefix:] or '/'
+        hdrs = {'Accept-Encoding': ACCEPT_ENCODING}
+        hdrs.update(headers or {})
+        if self.authorization:
+            hdrs['Authorization'] = self.authorization
+        if self._conn is not None:
+            # the server may close an idle keep-alive connection at any time; then try once on a fresh one
+            try:
+                return self._request(target, method, body, hdrs, reused=True)
+            except _StaleConnection:
+                pass
+        return self._request(target, method, body, hdrs)
+
+    def _request(self, target, method, body, headers, reused=False):
+        if self._conn is None:
+            self._conn = self._connect()
+        sent = False
+        try:
+            self._conn.request(method, target, body=body, headers=headers)
+            sent = True
+            resp = self._conn.getresponse()
+            content = resp.read()
+        except Exception as e:
+            self.close()
+            if reused and _closed_while_idle(e, sent):
+                raise _StaleConnection()
+            raise
+        response = Response(resp.status, resp.reason)
+        response.update((name.lower(), value) for name, value in resp.getheaders())
+        response.wire_bytes = len(content)
+        if resp.will_close:
+            self.close()
+        return response, decompress(content, response.get('content-encoding'))
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class Urllib3Transport(Transport):
+    """urllib3 connections. Requires urllib3."""
+
+    name = 'urllib3'
+
+    def __init__(self, *args, **kwargs):
+        import urllib3
+        super(Urllib3Transport, self).__init__(*args, **kwargs)
+        self.urllib3 = urllib3
+        self.errors = (socket.error, urllib3.exceptions.HTTPError)
+        self.timeouts = (socket.timeout, urllib3.exceptions.ReadTimeoutError)
+
+    def connect(self, server):
+        return Urllib3Connection(server, self)
+
+    def set_timeout(self, conn, timeout):
+        conn.pool.timeout = self.urllib3.Timeout(
+            connect=_shorter(self.connect_timeout or self.timeout, timeout), read=timeout,
+        )
+
+
+class Urllib3Connection(object):
+    """A single-connection urllib3 pool; the client's ConnectionPool does the pooling."""
+
+    def __init__(self, server, transport):
+        urllib3 = transport.urllib3
+        options = dict(
+            maxsize=1, block=False, retries=False,
+            timeout=urllib3.Timeout(connect=transport.connect_timeout or transport.timeout, read=transport.timeout),
+        )
+        if server.startswith('https://'):
+            options['ssl_context'] = transport.ssl_context()
+            if not transport.validate_ssl_certificates:
+                options['cert_reqs'] = 'CERT_NONE'
+                options['assert_hostname'] = False
+        self.pool = urllib3.connection_from_url(server, **options)
+        self.prefix = len(server)
+        self.authorization = transport.authorization()
+
+    def request(self, uri, method='GET', body=None, headers=None):
+        hdrs = {'Accept-Encoding': ACCEPT_ENCODING}
+        hdrs.update(headers or {})
+        if self.authorization:
+            hdrs['Authorization'] = self.authorization
+        resp = self.pool.urlopen(
+            method, uri[self.prefix:] or '/', body=body, headers=hdrs, redirect=False, preload_content=False,
+        )
+        try:
+            content = resp.read(decode_content=True)
+            response = Response(resp.status, resp.reason)
+            response.update((name.lower(), value) for name, value in resp.headers.items())
+            # bytes read from the socket, before urllib3 decoded them
+            response.wire_bytes = resp.tell()
+        finally:
+            resp.release_conn()
+        return response, content
+
+    def close(self):
+        self.pool.close()
+
+
+class _CountingResponse(http_client.HTTPResponse):
+    """An HTTPResponse that counts the body bytes read from the socket."""
+
+    wire_bytes = 0
+
+    def read(self, amt=None):
+        data = http_client.HTTPResponse.read(self, amt)
+        self.wire_bytes += len(data)
+        return data
+
+
+def _measure_wire_bytes(conn_request):
+    """Wrap httplib2.Http._conn_request to set `wire_bytes` on each response.
+
+    httplib2 decompresses the body before returning it and overwrites
+    content-length with the decoded size, so the size as received is taken
+    from the response it read the body from.
+    """
+    def request(conn, request_uri, method, body, headers):
+        received = []
+
+        def response_class(*args, **kwargs):
+            received.append(_CountingResponse(*args, **kwargs))
+            return received[-1]
+
+        conn.response_class = response_class
+        response, content = conn_request(conn, request_uri, method, body, headers)
+        if received:
+            response.wire_bytes = received[-1].wire_bytes
+        return response, content
+    return request
+
+
+class _StaleConnection(Exception):
+    """A reused connection turned out to be closed before the server read the request."""
+
+
+# raised when the server closes the connection without sending a byte of the response (BadStatusLine on Python 2)
+_NO_RESPONSE = getattr(http_client, 'RemoteDisconnected', http_client.BadStatusLine)
+
+
+def _closed_while_idle(error, sent):
+    """Whether `error` on a reused connection shows the server had closed it, so the request can be sent again.
+
+    A timeout never does: the server may be acting on the request.
+    """
+    if isinstance(error, socket.timeout):
+        return False
+    if not sent:
+        return isinstance(error, (socket.error, http_client.HTTPException))
+    return isinstance(error, _NO_RESPONSE)
+
+
+def _shorter(timeout, other):
+    """The shorter of two socket timeouts, where None means no timeout."""
+    if timeout is None:
+        return other
+    if other is None:
+        return timeout
+    return min(timeout, other)
+
+
+TRANSPORTS = {
+    'httplib2': Httplib2Transport,
+    'http.client': HTTPClientTransport,
+    'urllib3': Urllib3Transport,
+}
+
+
+def make_transport(transport, **kwargs):
+    """A Transport from one, a Transport subclass or the name of one of TRANSPORTS."""
+    if isinstance(transport, Transport):
+        return transport
+    if isinstance(transport, type) and issubclass(transport, Transport):
+        return transport(**kwargs)
+    try:
+        return TRANSPORTS[transport](**kwargs)
+    except KeyError:
+        raise ValueError('unknown transport %r; use one of %s' % (transport, ', '.join(sorted(TRANSPORTS))))
@@ -0,0 +1,196 @@
+"""Job definition validation, compiled once per set of required fields.
+
+A JobValidator checks required fields, the `schedule`/`parents` one-of
+rule and `container` sub-fields in a single pass, and reports every
+problem it finds rather than only the first. A strict one also checks
+value types and the ISO8601 syntax of `schedule` and `epsilon`, which
+rejects definitions earlier releases sent on to Chronos.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+
+from chronos.iso8601 import parse_duration_parts
+from chronos.job import JOB_KEYS
+
+# Problem kinds
+MISSING = 'missing'
+ONE_OF = 'one_of'
+TYPE = 'type'
+SYNTAX = 'syntax'
+
+Problem = namedtuple('Problem', ('kind', 'field', 'message'))
+
+try:
+    _STRING = (basestring,)
+except NameError:
+    _STRING = (str,)
+_NUMBER = (int, float)
+_BOOLEAN = (bool,)
+_LIST = (list, tuple)
+_OBJECT = (dict,)
+
+# JSON key -> (accepted types, what the message calls them)
+FIELD_TYPES = {
+    'name': (_STRING, 'a string'),
+    'command': (_STRING, 'a string'),
+    'shell': (_BOOLEAN, 'a boolean'),
+    'epsilon': (_STRING, 'an ISO8601 duration'),
+    'executor': (_STRING, 'a string'),
+    'executorFlags': (_STRING, 'a string'),
+    'retries': (_NUMBER, 'a number'),
+    'owner': (_STRING, 'a string'),
+    'ownerName': (_STRING, 'a string'),
+    'description': (_STRING, 'a string'),
+    'async': (_BOOLEAN, 'a boolean'),
+    'cpus': (_NUMBER, 'a number'),
+    'disk': (_NUMBER, 'a number'),
+    'mem': (_NUMBER, 'a number'),
+    'disabled': (_BOOLEAN, 'a boolean'),
+    'softError': (_BOOLEAN, 'a boolean'),
+    'dataProcessingJobType': (_BOOLEAN, 'a boolean'),
+    'fetch': (_LIST, 'a list'),
+    'uris': (_LIST, 'a list'),
+    'environmentVariables': (_LIST, 'a list'),
+    'arguments': (_LIST, 'a list'),
+    'highPriority': (_BOOLEAN, 'a boolean'),
+    'runAsUser': (_STRING, 'a string'),
+    'concurrent': (_BOOLEAN, 'a boolean'),
+    'container': (_OBJECT, 'an object'),
+    'constraints': (_LIST, 'a list'),
+    'parents': (_LIST, 'a list of job names'),
+    'schedule': (_STRING, 'an ISO8601 repeating interval'),
+    'scheduleTimeZone': (_STRING, 'a string'),
+    'maxCompletionTime': (_NUMBER, 'a number'),
+}
+
+CONTAINER_TYPES = OrderedDict([
+    ('type', (_STRING, 'a string')),
+    ('image', (_STRING, 'a string')),
+    ('network', (_STRING, 'a string')),
+    ('volumes', (_LIST, 'a list')),
+    ('forcePullImage', (_BOOLEAN, 'a boolean')),
+])
+
+
+def schedule_problem(schedule):
+    """Why `schedule` isn't a valid Chronos schedule, or None if it is."""
+    from chronos.schedule import parse_schedule
+    try:
+        parse_schedule(schedule)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+class JobValidator(object):
+    """Checks job definitions against one set of required fields.
+
+    Build one with compile_validator(), which keeps a validator for every
+    set of field lists it has seen. Validators are plain data, so they can
+    be sent to worker processes. Only a `strict` one checks value types and
+    syntax.
+    """
+
+    def __init__(self, required, one_of, container_fields, strict=False):
+        self.required = tuple(required)
+        self.one_of = list(one_of)
+        self.container_fields = tuple(container_fields)
+        self.strict = strict
+        optional = set(FIELD_TYPES) - set(self.required)
+        # checked in JOB_KEYS order, so problems come out in the same order whatever the dict order
+        self._types = tuple(
+            (key,) + FIELD_TYPES[key] + (key in optional,) for key in JOB_KEYS if key in FIELD_TYPES
+        )
+
+    def problems(self, job):
+        """Every Problem with `job`, in the order: missing fields, one-of, container; types and syntax if strict."""
+        problems = [
+            Problem(MISSING, key, 'missing required field %s' % key) for key in self.required if key not in job
+        ]
+
+        present = [key for key in self.one_of if key in job]
+        if len(present) > 1:
+            problems.append(Problem(ONE_OF, None, 'Job must only include 1 of %s' % self.one_of))
+        elif not present:
+            problems.append(Problem(MISSING, None, 'Job must include one of %s' % self.one_of))
+
+        container = job.get('container')
+        if isinstance(container, dict):
+            problems.extend(
+                Problem(MISSING, 'container.' + key, 'missing required container field %s' % key)
+                for key in self.container_fields if key not in container
+            )
+        if not self.strict:
+            return problems
+        if isinstance(container, dict):
+            problems.extend(self._type_problems(container, CONTAINER_TYPES, 'container.'))
+
+        for key, accepted, description, optional in self._types:
+            if key not in job:
+                continue
+            value = job[key]
+            if value is None and optional:
+                continue
+            # bool is an int, but not a number in JSON
+            if not isinstance(value, accepted) or (accepted is _NUMBER and isinstance(value, bool)):
+                problems.append(Problem(TYPE, key, 'field %s must be %s, not %r' % (key, description, value)))
+            elif key == 'schedule':
+                message = schedule_problem(value)
+                if message is not None:
+                    problems.append(Problem(SYNTAX, key, message))
+            elif key == 'epsilon':
+                try:
+                    parse_duration_parts(value)
+                except ValueError:
+                    problems.append(Problem(SYNTAX, key, 'epsilon %r is not an ISO8601 duration' % (value,)))
+            elif key == 'parents' and not all(isinstance(parent, _STRING) for parent in value):
+                problems.append(Problem(TYPE, key, 'field parents must be a list of job names, not %r' % (value,)))
+        return problems
+
+    @staticmethod
+    def _type_problems(data, field_types, prefix):
+        problems = []
+        for key, (accepted, description) in field_types.items():
+            value = data.get(key)
+            if value is not None and not isinstance(value, accepted):
+                name = prefix + key
+                problems.append(Problem(TYPE, name, 'field %s must be %s, not %r' % (name, description, value)))
+        return problems
+
+    def problems_many(self, job_defs, max_workers=1, chunk_size=1000):
+        """problems() of every job definition, in order.
+
+        With `max_workers` above 1, chunks of `chunk_size` definitions are
+        checked in that many worker processes; that only pays off for
+        batches of many thousands of definitions.
+        """
+        job_defs = list(job_defs)
+        if max_workers <= 1 or len(job_defs) <= chunk_size:
+            return [self.problems(job) for job in job_defs]
+        from concurrent.futures import ProcessPoolExecutor
+        chunks = [job_defs[i:i + chunk_size] for i in range(0, len(job_defs), chunk_size)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(_problems_chunk, [(self, chunk) for chunk in chunks])
+            return [problems for chunk in results for problems in chunk]
+
+
+def _problems_chunk(args):
+    validator, job_defs = args
+    return [validator.problems(job) for job in job_defs]
+
+
+_validators = {}
+_validators_lock = threading.Lock()
+
+
+def compile_validator(required, one_of, container_fields, strict=False):
+    """The JobValidator for these field lists and strictness, built on first use."""
+    key = (tuple(required), tuple(one_of), tuple(container_fields), bool(strict))
+    validator = _validators.get(key)
+    if validator is None:
+        with _validators_lock:
+            validator = _validators.get(key)
+            if validator is None:
+                validator = _validators[key] = JobValidator(*key)
+    return validator
@@ -0,0 +1,160 @@
+"""Change events from repeated job listings, for ChronosClient.watch_jobs."""
+
+import json
+import time
+from collections import namedtuple
+
+from chronos.diff import SERVER_FIELDS
+
+ADDED = 'added'
+REMOVED = 'removed'
+CHANGED = 'changed'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+ERRORS = 'errors'
+
+# what is remembered of each job between polls
+_JobState = namedtuple('_JobState', ('definition', 'last_success', 'last_error', 'errors'))
+
+
+class JobEvent(object):
+    """Something that happened to job `name` between two polls.
+
+    `kind` is one of ADDED, REMOVED, CHANGED (its definition changed),
+    SUCCEEDED (``lastSuccess`` advanced), FAILED (``lastError`` advanced)
+    or ERRORS (``errorsSinceLastSuccess`` changed). `job` is the job as
+    last listed, or None if it was removed.
+    """
+
+    __slots__ = ('kind', 'name', 'job')
+
+    def __init__(self, kind, name, job=None):
+        self.kind = kind
+        self.name = name
+        self.job = job
+
+    def __eq__(self, other):
+        if not isinstance(other, JobEvent):
+            return NotImplemented
+        return (self.kind, self.name, self.job) == (other.kind, other.name, other.job)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '<JobEvent %s %s>' % (self.kind, self.name)
+
+
+def job_state(job):
+    """What watch_jobs compares between polls: a hash of the definition and the run status fields."""
+    definition = dict((key, value) for key, value in job.items() if key not in SERVER_FIELDS)
+    return _JobState(
+        hash(json.dumps(definition, sort_keys=True)),
+        job.get('lastSuccess') or None,
+        job.get('lastError') or None,
+        job.get('errorsSinceLastSuccess'),
+    )
+
+
+class JobWatcher(object):
+    """Turns successive job listings into JobEvents.
+
+    Only a small state tuple is kept per job, and a job dict is kept
+    only for jobs that changed. When nothing changes the polling interval
+    grows by `backoff`, up to `max_interval`, and drops back to `interval`
+    on the next change. A poll that finds changes is followed by polls
+    `coalesce` seconds apart until the listing stops changing (for at most
+    `max_interval` seconds), and the burst is reported as one set of events
+    from the first listing to the last.
+    """
+
+    def __init__(self, interval=5.0, max_interval=None, coalesce=1.0, backoff=1.5, initial=False):
+        self.interval = interval
+        self.max_interval = interval * 4 if max_interval is None else max(max_interval, interval)
+        self.coalesce = coalesce
+        self.backoff = backoff
+        self.initial = initial
+        self.delay = interval
+        self.state = {}
+
+    def observe(self, jobs):
+        """Read a listing: ``(state, {name: job})`` with the jobs that differ from the last committed state."""
+        state = {}
+        changed = {}
+        for job in jobs:
+            self.track(state, changed, job)
+        return state, changed
+
+    def track(self, state, changed, job):
+        """Add one job of a listing to `state`, and to `changed` if it differs from the committed state."""
+        name = job['name']
+        current = state[name] = job_state(job)
+        if self.state.get(name) != current:
+            changed[name] = job
+
+    def differs(self, state, changed):
+        """True if an observed listing differs from the committed state."""
+        # without changed jobs, every listed job is already known, so only removals are left
+        return bool(changed) or len(state) != len(self.state)
+
+    def commit(self, state, changed):
+        """Make `state` the current state and return the events that lead to it."""
+        events = []
+        previous = self.state
+        added = 0
+        for name, job in changed.items():
+            old = previous.get(name)
+            new = state[name]
+            if old is None:
+                events.append(JobEvent(ADDED, name, job))
+                added += 1
+                continue
+            if old.definition != new.definition:
+                events.append(JobEvent(CHANGED, name, job))
+            if new.last_success and new.last_success != old.last_success:
+                events.append(JobEvent(SUCCEEDED, name, job))
+            if new.last_error and new.last_error != old.last_error:
+                events.append(JobEvent(FAILED, name, job))
+            if new.errors != old.errors:
+                events.append(JobEvent(ERRORS, name, job))
+        # every job still listed is either in previous or added, so only scan for removals if some are missing
+        if len(previous) + added > len(state):
+            events.extend(JobEvent(REMOVED, name) for name in sorted(previous) if name not in state)
+        self.state = state
+        if events:
+            self.delay = self.interval
+        else:
+            self.delay = min(self.delay * self.backoff, self.max_interval)
+        return events
+
+    def begin(self, state, changed):
+        """Commit the first listing; its jobs are reported as ADDED only if `initial` is set."""
+        events = self.commit(state, changed)
+        self.delay = self.interval
+        return events if self.initial else []
+
+    def burst_polls(self):
+        """How many extra polls a burst of changes may be coalesced over."""
+        if not self.coalesce:
+            return 0
+        return max(1, int(self.max_interval // self.coalesce))
+
+    def watch(self, fetch, sleep=None):
+        """Yield events forever, calling fetch() for each listing and sleep(seconds) between them."""
+        sleep = sleep or time.sleep
+        for event in self.begin(*self.observe(fetch())):
+            yield event
+        while True:
+            sleep(self.delay)
+            state, changed = self.observe(fetch())
+            for _ in range(self.burst_polls() if self.differs(state, changed) else 0):
+                sleep(self.coalesce)
+                later, later_changed = self.observe(fetch())
+                if later == state:
+                    break
+                state, changed = later, later_changed
+            for event in self.commit(state, changed):
+                yield event
@@ -22,7 +22,14 @@ setup(
         "Programming Language :: Python :: 3.6",
     ],
     install_requires=[
-        'httplib2 >= 0.9'
+        'httplib2 >= 0.9',
+        'futures; python_version < "3.0"',
     ],
+    extras_require={
+        'urllib3': ['urllib3'],
+        'orjson': ['orjson'],
+        'ujson': ['ujson'],
+        'numpy': ['numpy'],
+    },
     url='https://github.com/asher/chronos-python',
 )
@@ -0,0 +1,49 @@
+import os
+import sys
+
+import pytest
+
+collect_ignore = []
+if sys.version_info < (3, 5):
+    collect_ignore.append('test_aio.py')
+
+BIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bin')
+
+
+class FakeClock(object):
+    """A clock for the `clock=` arguments that only moves when a test sets `now`."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def load_script(filename, name):
+    """Import bin/`filename`, whose name isn't a valid module name, as module `name`."""
+    path = os.path.join(BIN, filename)
+    try:
+        from importlib.util import module_from_spec, spec_from_file_location
+    except ImportError:
+        import imp
+        return imp.load_source(name, path)
+    spec = spec_from_file_location(name, path)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope='session')
+def nagios():
+    return load_script('chronos-nagios.py', 'chronos_nagios')
+
+
+@pytest.fixture(scope='session')
+def sync_jobs():
+    return load_script('chronos-sync-jobs.py', 'chronos_sync_jobs')
@@ -0,0 +1,256 @@
+import asyncio
+import json
+
+import mock
+import pytest
+
+import chronos
+from chronos.aio import AsyncChronosClient
+from chronos.compression import gzip_body
+
+
+class FakeChronos(object):
+    """Tiny HTTP/1.1 server answering every request with the next canned response."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.connections = 0
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            method, target, _ = line.decode('latin-1').split(' ', 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line == b'\r\n':
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            self.requests.append((method, target, headers, body))
+            writer.write(self.responses.pop(0))
+            await writer.drain()
+        writer.close()
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        self.address = '127.0.0.1:%d' % self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+def json_response(payload, status=200):
+    body = json.dumps(payload).encode('utf-8')
+    return (
+        'HTTP/1.1 %d OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n' % (status, len(body))
+    ).encode('latin-1') + body
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_list_reuses_connection():
+    async def scenario():
+        async with FakeChronos([json_response([{'name': 'a'}]), json_response([{'name': 'b'}])]) as server:
+            async with AsyncChronosClient(server.address) as client:
+                first = await client.list()
+                second = await client.list()
+            return server, first, second
+
+    server, first, second = run(scenario())
+    assert first == [{'name': 'a'}]
+    assert second == [{'name': 'b'}]
+    assert server.connections == 1
+    assert [r[:2] for r in server.requests] == [('GET', '/v1/scheduler/jobs')] * 2
+
+
+def test_chunked_response():
+    chunked = (
+        b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n'
+        b'5\r\n[{"na\r\na\r\nme": "a"}]\r\n0\r\n\r\n'
+    )
+
+    async def scenario():
+        async with FakeChronos([chunked]) as server:
+            async with AsyncChronosClient(server.address) as client:
+                return await client.list()
+
+    assert run(scenario()) == [{'name': 'a'}]
+
+
+def test_add_posts_json_and_validates():
+    job = {'name': 'foo', 'command': 'true', 'owner': 'me', 'disabled': False, 'parents': ['bar']}
+
+    async def scenario():
+        async with FakeChronos([b'HTTP/1.1 204 No Content\r\n\r\n']) as server:
+            async with AsyncChronosClient(server.address) as client:
+                with pytest.raises(chronos.MissingFieldError):
+                    client.add({'name': 'foo'})
+                await client.add(job)
+            return server
+
+    server = run(scenario())
+    method, target, headers, body = server.requests[0]
+    assert (method, target) == ('POST', '/v1/scheduler/dependency')
+    assert headers['content-type'] == 'application/json'
+    assert json.loads(body.decode('utf-8')) == job
+
+
+def test_fails_over_to_next_server():
+    async def scenario():
+        async with FakeChronos([json_response({'message': 'boom'}, status=500)]) as bad:
+            async with FakeChronos([json_response({'ok': True})]) as good:
+                async with AsyncChronosClient([bad.address, good.address]) as client:
+                    return await client.metrics()
+
+    assert run(scenario()) == {'ok': True}
+
+
+def test_instrumentation_records_failover():
+    collector = chronos.MetricsCollector()
+
+    async def scenario():
+        async with FakeChronos([json_response({'message': 'boom'}, status=500)]) as bad:
+            async with FakeChronos([json_response({'ok': True})]) as good:
+                async with AsyncChronosClient([bad.address, good.address], instrumentation=collector) as client:
+                    await client.metrics()
+                return 'http://%s' % bad.address
+
+    bad_server = run(scenario())
+    snapshot = collector.snapshot()
+    assert snapshot['responses'] == {'GET /metrics': {'500': 1, '200': 1}}
+    assert snapshot['failovers'] == {bad_server: 1}
+
+
+def test_raises_when_no_server_answers():
+    async def scenario():
+        async with AsyncChronosClient(['127.0.0.1:1']) as client:
+            await client.job_stat('foo')
+
+    with pytest.raises(chronos.ChronosAPIError):
+        run(scenario())
+
+
+def test_search_sends_query_string():
+    async def scenario():
+        async with FakeChronos([json_response([])]) as server:
+            async with AsyncChronosClient(server.address) as client:
+                await client.search(name='foo')
+            return server
+
+    server = run(scenario())
+    assert server.requests[0][1] == '/v1/scheduler/jobs/search?name=foo'
+
+
+def test_leader():
+    async def scenario():
+        async with FakeChronos([json_response({'leader': 'chronos-2:4400'})]) as server:
+            async with AsyncChronosClient(server.address) as client:
+                return server, await client.leader()
+
+    server, leader = run(scenario())
+    assert leader == 'chronos-2:4400'
+    assert server.requests[0][:2] == ('GET', '/v1/scheduler/leader')
+
+
+def test_bulk_results():
+    async def scenario():
+        responses = [b'HTTP/1.1 204 No Content\r\n\r\n', json_response({'message': 'nope'}, status=400)]
+        async with FakeChronos(responses) as server:
+            async with AsyncChronosClient(server.address) as client:
+                result = client.delete_many(['a', 'b'], max_workers=1)
+                streamed = [item async for item in result]
+                await result
+            return streamed, result
+
+    streamed, result = run(scenario())
+    assert [item.name for item in streamed] == ['a', 'b']
+    assert [item.name for item in result.succeeded] == ['a']
+    assert isinstance(result.exceptions['b'], chronos.ChronosAPIError)
+
+
+def test_iter_jobs_streams():
+    jobs = [{'name': 'job%d' % i, 'disabled': False} for i in range(20)]
+    body = json.dumps(jobs).encode('utf-8')
+    response = b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n' + b''.join(
+        ('%x\r\n' % len(body[i:i + 7])).encode('ascii') + body[i:i + 7] + b'\r\n' for i in range(0, len(body), 7)
+    ) + b'0\r\n\r\n'
+
+    async def scenario():
+        async with FakeChronos([response]) as server:
+            async with AsyncChronosClient(server.address) as client:
+                return [job async for job in client.iter_jobs(fields=['name'])]
+
+    assert run(scenario()) == [{'name': job['name']} for job in jobs]
+
+
+def test_scheduler_stats_gathers_concurrently():
+    timings = [{'jobNameLabel': 'a', 'time': 2.0}]
+
+    async def scenario():
+        async with FakeChronos([json_response(timings)] * 6) as server:
+            async with AsyncChronosClient(server.address) as client:
+                stats = await client.scheduler_stats(metrics=False)
+            return stats, server
+
+    stats, server = run(scenario())
+    assert sorted(target for _, target, _, _ in server.requests) == sorted(
+        '/v1/scheduler/stats/%s' % path for path in chronos.STAT_PATHS.values()
+    )
+    assert stats['a'] == chronos.JobTimings('a', 2.0, 2.0, 2.0, 2.0, 2.0, 2.0)
+
+
+def test_watch_jobs_async():
+    listings = iter([[{'name': 'a', 'lastError': ''}], [{'name': 'a', 'lastError': '2017-01-01T00:00:00.000Z'}]])
+
+    async def iter_jobs():
+        for job in next(listings):
+            yield job
+
+    async def no_sleep(seconds):
+        pass
+
+    async def scenario():
+        client = AsyncChronosClient('localhost')
+        client.iter_jobs = iter_jobs
+        events = client.watch_jobs(interval=3, coalesce=0)
+        event = await events.__anext__()
+        await events.aclose()
+        return event
+
+    with mock.patch('chronos.aio.asyncio.sleep', no_sleep):
+        event = run(scenario())
+    assert (event.kind, event.name) == (chronos.watch.FAILED, 'a')
+
+
+def test_gzip_response_and_request_fallback():
+    body = gzip_body(json.dumps([{'name': 'a'}]))
+    gzipped = (
+        'HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\nContent-Length: %d\r\n\r\n' % len(body)
+    ).encode('latin-1') + body
+    rejected = b'HTTP/1.1 415 Unsupported Media Type\r\nContent-Length: 0\r\n\r\n'
+    no_content = b'HTTP/1.1 204 No Content\r\n\r\n'
+    job = {'name': 'foo', 'command': 'x' * 300, 'owner': 'me', 'disabled': False, 'parents': ['bar']}
+
+    async def scenario():
+        async with FakeChronos([gzipped, rejected, no_content, no_content]) as server:
+            async with AsyncChronosClient(server.address, compress_requests=100) as client:
+                jobs = await client.list()
+                await client.add(job)
+                await client.add(job)
+            return server, jobs
+
+    server, jobs = run(scenario())
+    assert jobs == [{'name': 'a'}]
+    assert server.requests[0][2]['accept-encoding'] == 'gzip, deflate'
+    assert [r[2].get('content-encoding') for r in server.requests[1:]] == ['gzip', None, None]
+    assert json.loads(server.requests[2][3].decode('utf-8')) == job
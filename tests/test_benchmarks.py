@@ -0,0 +1,35 @@
+import json
+
+import chronos
+from benchmarks import run
+from benchmarks.fake_chronos import FakeChronos
+
+
+def test_fake_chronos_round_trip():
+    with FakeChronos(jobs=10) as server:
+        client = chronos.connect(server.address)
+        jobs = client.list()
+        assert len(jobs) == 10
+        job = dict(jobs[1], name='added', command='true')
+        client.add(job)
+        client.delete('bench-job-000000')
+        assert server.job_count() == 10
+        assert 'added' in [j['name'] for j in client.list()]
+        client.close()
+
+
+def test_fake_chronos_injected_failures():
+    with FakeChronos(jobs=1, failure_rate=1.0) as server:
+        status, _, payload = server.respond('GET', '/v1/scheduler/jobs', b'')
+    assert status == 503
+    assert json.loads(payload.decode('utf-8')) == {'message': 'injected failure'}
+
+
+def test_run_writes_json_line(tmpdir, capsys):
+    output = tmpdir.join('bench.jsonl')
+    report = run.main(['--jobs', '20', '--bulk-jobs', '10', '--repeat', '1', '--only', 'list', '--only', 'bulk',
+                       '--output', str(output)])
+    assert set(report['results']) == {'list', 'bulk'}
+    assert report['results']['bulk']['add_failures'] == 0
+    assert json.loads(output.read())['results']['list']['jobs'] == 20
+    assert json.loads(capsys.readouterr().out)['options']['jobs'] == 20
@@ -0,0 +1,100 @@
+import threading
+
+import mock
+import pytest
+
+import chronos
+from chronos.bulk import BulkItemResult
+
+
+def job(name, **extra):
+    job_def = {
+        'name': name, 'command': 'true', 'owner': 'me', 'disabled': False, 'schedule': 'R/2014-01-01T00:00:00Z/PT1H',
+    }
+    job_def.update(extra)
+    return job_def
+
+
+def test_add_many_reports_successes_and_failures():
+    client = chronos.ChronosClient('localhost')
+
+    def fake_call(url, method, body):
+        if '"bad"' in body:
+            raise chronos.ChronosAPIError('nope')
+        return None
+
+    with mock.patch.object(client, '_call', side_effect=fake_call) as mock_call:
+        result = client.add_many([job('good'), job('bad'), job('other')]).wait()
+    assert mock_call.call_count == 3
+    assert sorted(item.name for item in result.succeeded) == ['good', 'other']
+    assert [item.name for item in result.failed] == ['bad']
+    assert isinstance(result.exceptions['bad'], chronos.ChronosAPIError)
+    assert not result.ok
+    assert len(result) == 3
+
+
+def test_add_many_validates_before_sending():
+    client = chronos.ChronosClient('localhost')
+    invalid = {'name': 'invalid'}
+    with mock.patch.object(client, '_call', side_effect=AssertionError('no network')):
+        with mock.patch.object(client, '_check_fields', side_effect=[True, chronos.MissingFieldError('x')]) as check:
+            with mock.patch.object(client, '_send_job') as send:
+                result = client.add_many([job('good'), invalid]).wait()
+    assert check.call_count == 2
+    send.assert_called_once_with(job('good'), False)
+    assert isinstance(result.exceptions['invalid'], chronos.MissingFieldError)
+
+
+def test_update_many_uses_put_on_legacy_api():
+    client = chronos.ChronosClient('localhost', scheduler_api_version=None)
+    with mock.patch.object(client, '_call') as mock_call:
+        assert client.update_many([job('foo', **{'async': False})]).ok
+    assert mock_call.call_args[0][:2] == ('/scheduler/iso8601', 'PUT')
+
+
+def test_delete_and_run_many():
+    client = chronos.ChronosClient('localhost')
+    with mock.patch.object(client, '_call') as mock_call:
+        client.delete_many(['a', 'b']).wait()
+        client.run_many(['c']).wait()
+    calls = sorted(c[0] for c in mock_call.call_args_list)
+    assert calls == [('/scheduler/job/a', 'DELETE'), ('/scheduler/job/b', 'DELETE'), ('/scheduler/job/c', 'PUT')]
+
+
+def test_results_stream_as_they_finish():
+    client = chronos.ChronosClient('localhost')
+    release = threading.Event()
+
+    def fake_call(url, method):
+        if url.endswith('/slow'):
+            assert release.wait(5)
+
+    with mock.patch.object(client, '_call', side_effect=fake_call):
+        result = client.run_many(['slow', 'fast'], max_workers=2)
+        first = next(iter(result))
+        assert first.name == 'fast'
+        release.set()
+        assert [item.name for item in result] == ['fast', 'slow']
+
+
+def test_concurrency_is_bounded():
+    client = chronos.ChronosClient('localhost')
+    lock = threading.Lock()
+    running = [0, 0]
+
+    def fake_call(url, method):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        threading.Event().wait(0.01)
+        with lock:
+            running[0] -= 1
+
+    with mock.patch.object(client, '_call', side_effect=fake_call):
+        assert client.run_many(['job%d' % i for i in range(20)], max_workers=3).ok
+    assert running[1] <= 3
+
+
+@pytest.mark.parametrize('item,name', [(job('foo'), 'foo'), ('bar', 'bar')])
+def test_item_result_name(item, name):
+    assert BulkItemResult(item).name == name
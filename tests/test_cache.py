@@ -0,0 +1,83 @@
+import mock
+import pytest
+
+import chronos
+from chronos.cache import ResponseCache
+
+
+def make_client(clock, **kwargs):
+    cache = ResponseCache(clock=clock, **kwargs)
+    return chronos.ChronosClient('localhost', cache=cache), cache
+
+
+def test_list_is_cached_until_ttl_expires(clock):
+    client, cache = make_client(clock, ttl=10)
+    with mock.patch.object(client, '_call', side_effect=[[{'name': 'a'}], [{'name': 'b'}]]) as mock_call:
+        assert client.list() == [{'name': 'a'}]
+        assert client.list() == [{'name': 'a'}]
+        clock.now = 11
+        assert client.list() == [{'name': 'b'}]
+    assert mock_call.call_count == 2
+    assert cache.stats()['list'] == {'hits': 1, 'misses': 2}
+
+
+def test_per_endpoint_ttls(clock):
+    client, cache = make_client(clock, ttl=10, ttls={'job_stat': 0})
+    with mock.patch.object(client, '_call', return_value={}) as mock_call:
+        client.job_stat('a')
+        client.job_stat('a')
+        client.search(name='a')
+        client.search(name='a')
+        client.search(name='b')
+    assert mock_call.call_count == 4
+
+
+def test_add_invalidates_listings(clock):
+    client, cache = make_client(clock)
+    job = {'name': 'a', 'command': 'true', 'owner': 'me', 'disabled': False, 'schedule': 'R/2014-01-01T00:00:00Z/PT1H'}
+    with mock.patch.object(client, '_call', side_effect=[[], {}, None, [{'name': 'a'}], {}]) as mock_call:
+        client.list()
+        client.job_stat('a')
+        client.add(job)
+        assert client.list() == [{'name': 'a'}]
+        client.job_stat('a')
+    assert mock_call.call_count == 5
+
+
+def test_delete_patches_cached_listing(clock):
+    client, cache = make_client(clock)
+    with mock.patch.object(client, '_call', side_effect=[[{'name': 'a'}, {'name': 'b'}], None]) as mock_call:
+        client.list()
+        client.delete('a')
+        assert client.list() == [{'name': 'b'}]
+    assert mock_call.call_count == 2
+
+
+def test_failed_mutation_invalidates(clock):
+    client, cache = make_client(clock)
+    with mock.patch.object(client, '_call', side_effect=[[{'name': 'a'}], chronos.ChronosAPIError(), []]):
+        client.list()
+        with pytest.raises(chronos.ChronosAPIError):
+            client.delete('a')
+        assert client.list() == []
+
+
+def test_lru_eviction(clock):
+    client, cache = make_client(clock, maxsize=2)
+    with mock.patch.object(client, '_call', return_value={}) as mock_call:
+        client.job_stat('a')
+        client.job_stat('b')
+        client.job_stat('a')
+        client.job_stat('c')
+        client.job_stat('a')
+        client.job_stat('b')
+    assert mock_call.call_count == 4
+    assert cache.stats()['evictions'] == 2
+
+
+def test_no_cache_by_default():
+    client = chronos.ChronosClient('localhost')
+    with mock.patch.object(client, '_call', return_value=[]) as mock_call:
+        client.list()
+        client.list()
+    assert mock_call.call_count == 2
@@ -0,0 +1,103 @@
+import mock
+
+import chronos
+from chronos.catalog import JobCatalog
+
+
+def make_job(name, owner='me@foo.com', image=None, parents=None):
+    job = {'name': name, 'owner': owner, 'command': 'true', 'disabled': False}
+    if image:
+        job['container'] = {'type': 'docker', 'image': image}
+    if parents:
+        job['parents'] = parents
+    else:
+        job['schedule'] = 'R/2015-01-01T00:00:00Z/PT1H'
+    return job
+
+
+JOBS = [
+    make_job('etl-daily', owner='data@foo.com, oncall@foo.com', image='etl:1'),
+    make_job('etl-daily-report', owner='data@foo.com', image='etl:1', parents=['etl-daily']),
+    make_job('etl-hourly', image='etl:2'),
+    make_job('backup', owner='oncall@foo.com', parents=['etl-daily']),
+]
+
+
+def names(jobs):
+    return [job['name'] for job in jobs]
+
+
+def test_lookups():
+    catalog = JobCatalog(JOBS)
+    assert len(catalog) == 4
+    assert catalog['backup'] is JOBS[3]
+    assert 'etl' not in catalog
+    assert catalog.get('etl') is None
+    assert catalog.names_with_prefix('etl-daily') == ['etl-daily', 'etl-daily-report']
+    assert catalog.names_with_prefix('') == ['backup', 'etl-daily', 'etl-daily-report', 'etl-hourly']
+    assert catalog.names_with_prefix('nope') == []
+    assert names(catalog.with_prefix('etl-h')) == ['etl-hourly']
+    assert names(catalog.owned_by('oncall@foo.com')) == ['backup', 'etl-daily']
+    assert names(catalog.using_image('etl:1')) == ['etl-daily', 'etl-daily-report']
+    assert names(catalog.children('etl-daily')) == ['backup', 'etl-daily-report']
+    assert catalog.children('backup') == []
+
+
+def test_find_intersects_criteria():
+    catalog = JobCatalog(JOBS)
+    assert names(catalog.find(prefix='etl', owner='data@foo.com')) == ['etl-daily', 'etl-daily-report']
+    assert names(catalog.find(owner='oncall@foo.com', parent='etl-daily')) == ['backup']
+    assert catalog.find(prefix='backup', image='etl:1') == []
+    assert len(catalog.find()) == 4
+
+
+def test_updates_and_removals_keep_indexes_in_step():
+    catalog = JobCatalog(JOBS)
+    catalog.add(make_job('etl-daily-report', owner='bi@foo.com', image='etl:2'))
+    assert names(catalog.owned_by('data@foo.com')) == ['etl-daily']
+    assert names(catalog.using_image('etl:2')) == ['etl-daily-report', 'etl-hourly']
+    assert names(catalog.children('etl-daily')) == ['backup']
+
+    assert catalog.remove('etl-daily')['name'] == 'etl-daily'
+    assert catalog.remove('etl-daily') is None
+    assert catalog.names_with_prefix('etl-d') == ['etl-daily-report']
+    assert catalog.owned_by('oncall@foo.com') == JOBS[3:]
+    catalog.remove('etl-daily-report')
+    catalog.remove('etl-hourly')
+    assert catalog.names_with_prefix('e') == []
+    assert list(catalog._trie) == ['b']
+
+
+def test_client_catalog_follows_changes():
+    client = chronos.ChronosClient('localhost')
+    with mock.patch.object(client, '_call', return_value=JOBS):
+        catalog = client.catalog()
+    with mock.patch.object(client, '_call'):
+        client.add(make_job('etl-weekly', image='etl:1'))
+        client.update(make_job('backup', owner='ops@foo.com'))
+        client.delete('etl-hourly')
+    assert catalog.names_with_prefix('etl') == ['etl-daily', 'etl-daily-report', 'etl-weekly']
+    assert names(catalog.owned_by('ops@foo.com')) == ['backup']
+    assert catalog.children('etl-daily') == [JOBS[1]]
+
+
+def test_client_catalog_of_records():
+    client = chronos.ChronosClient('localhost')
+    with mock.patch.object(client, '_call', return_value=JOBS):
+        catalog = client.catalog(as_records=True)
+    with mock.patch.object(client, '_call'):
+        client.add(make_job('etl-weekly', image='etl:1'))
+    assert all(isinstance(job, chronos.ChronosJob) for job in catalog.jobs())
+    assert names(catalog.using_image('etl:1')) == ['etl-daily', 'etl-daily-report', 'etl-weekly']
+
+
+def test_client_catalog_ignores_failed_changes():
+    client = chronos.ChronosClient('localhost')
+    with mock.patch.object(client, '_call', return_value=JOBS):
+        catalog = client.catalog()
+    with mock.patch.object(client, '_call', side_effect=chronos.ChronosAPIError('boom')):
+        try:
+            client.delete('backup')
+        except chronos.ChronosAPIError:
+            pass
+    assert 'backup' in catalog
@@ -2,6 +2,7 @@ import json
 import mock
 import pytest
 import httplib2
+import socket
 
 import chronos
 
@@ -201,3 +202,149 @@ def test_call_retries_on_http_error(mock_http):
     mock_call.assert_any_call('http://1.2.3.4%s/foo' % client._prefix, 'GET', body=None, headers={})
     mock_call.assert_any_call('http://1.2.3.5%s/foo' % client._prefix, 'GET', body=None, headers={})
     mock_call.assert_any_call('http://1.2.3.6%s/foo' % client._prefix, 'GET', body=None, headers={})
+
+
+@mock.patch('chronos.httplib2.Http')
+def test_call_reuses_pooled_connection(mock_http):
+    mock_http.return_value = mock.Mock(
+        request=mock.Mock(return_value=(mock.Mock(status=200), '{"foo": "bar"}'.encode('utf-8')))
+    )
+    client = chronos.ChronosClient(servers=['1.2.3.4'])
+    client._call("/foo")
+    client._call("/foo")
+    assert mock_http.call_count == 1
+    stats = client.pool_stats()
+    assert stats['hits'] == 1
+    assert stats['new_connections'] == 1
+
+
+def test_connect_passes_pool_options():
+    client = chronos.connect('localhost', pool_size=2, pool_idle_timeout=5)
+    assert client.pool.maxsize == 2
+    assert client.pool.idle_timeout == 5
+
+
+@mock.patch('chronos.httplib2.Http')
+def test_call_sticks_to_last_good_server(mock_http):
+    good = (mock.Mock(status=200), '{"foo": "bar"}'.encode('utf-8'))
+    mock_call = mock.Mock(side_effect=[httplib2.socket.error, good, good])
+    mock_http.return_value = mock.Mock(request=mock_call)
+    client = chronos.ChronosClient(servers=['1.2.3.4', '1.2.3.5'])
+    client._call("/foo")
+    client._call("/foo")
+    assert [c[0][0] for c in mock_call.call_args_list] == [
+        'http://1.2.3.4%s/foo' % client._prefix,
+        'http://1.2.3.5%s/foo' % client._prefix,
+        'http://1.2.3.5%s/foo' % client._prefix,
+    ]
+
+
+@mock.patch('chronos.httplib2.Http')
+def test_call_trips_breaker_on_server_errors(mock_http):
+    bad = (mock.Mock(status=503), '{"message": "down"}'.encode('utf-8'))
+    good = (mock.Mock(status=200), '{"foo": "bar"}'.encode('utf-8'))
+    mock_call = mock.Mock(side_effect=[bad, good, bad, good, good])
+    mock_http.return_value = mock.Mock(request=mock_call)
+    client = chronos.ChronosClient(servers=['1.2.3.4', '1.2.3.5'], breaker_threshold=2)
+    client._call("/foo")
+    client.router.preferred = None
+    client._call("/foo")
+    client.router.preferred = None
+    client._call("/foo")
+    assert mock_call.call_args_list[-1][0][0] == 'http://1.2.3.5%s/foo' % client._prefix
+    assert client.router.stats()['breakers']['http://1.2.3.4'] == 'open'
+
+
+@mock.patch('chronos.httplib2.Http')
+def test_probe_detects_leader(mock_http):
+    mock_http.return_value = mock.Mock(request=mock.Mock(
+        return_value=(mock.Mock(status=200), '{"leader": "1.2.3.5:4400"}'.encode('utf-8'))
+    ))
+    client = chronos.ChronosClient(servers=['1.2.3.4:4400', '1.2.3.5:4400'])
+    assert client._probe('http://1.2.3.4:4400')[1] is False
+    assert client._probe('http://1.2.3.5:4400')[1] is True
+    assert client.leader() == '1.2.3.5:4400'
+
+
+@mock.patch('chronos.httplib2.Http')
+def test_call_fails_over_on_client_errors_by_default(mock_http):
+    bad = (mock.Mock(status=400), '{"message": "invalid job"}'.encode('utf-8'))
+    mock_call = mock.Mock(return_value=bad)
+    mock_http.return_value = mock.Mock(request=mock_call)
+    client = chronos.ChronosClient(servers=['1.2.3.4', '1.2.3.5'])
+    with pytest.raises(chronos.ChronosAPIError) as excinfo:
+        client._call("/foo", "POST", body='{}')
+    assert 'No remaining' in str(excinfo.value)
+    assert mock_call.call_count == 2
+
+
+@mock.patch('chronos.httplib2.Http')
+def test_call_can_raise_client_errors_at_once(mock_http):
+    bad = (mock.Mock(status=400), '{"message": "invalid job"}'.encode('utf-8'))
+    mock_call = mock.Mock(return_value=bad)
+    mock_http.return_value = mock.Mock(request=mock_call)
+    policy = chronos.RetryPolicy(raise_client_errors=True)
+    client = chronos.ChronosClient(servers=['1.2.3.4', '1.2.3.5'], retry_policy=policy)
+    with pytest.raises(chronos.ChronosAPIError) as excinfo:
+        client._call("/foo")
+    assert 'invalid job' in str(excinfo.value)
+    assert mock_call.call_count == 1
+
+
+@mock.patch('chronos.httplib2.Http')
+def test_timed_out_post_is_not_sent_again(mock_http):
+    mock_call = mock.Mock(side_effect=socket.timeout('timed out'))
+    mock_http.return_value = mock.Mock(request=mock_call)
+    policy = chronos.RetryPolicy(max_attempts=3, sleep=mock.Mock())
+    client = chronos.ChronosClient(servers=['1.2.3.4', '1.2.3.5'], retry_policy=policy)
+    with pytest.raises(chronos.ChronosAPIError) as excinfo:
+        client._call("/scheduler/iso8601", "POST", body='{}')
+    assert 'timed out' in str(excinfo.value)
+    assert mock_call.call_count == 1
+    assert not policy.sleep.called
+
+
+@mock.patch('chronos.httplib2.Http')
+def test_only_idempotent_calls_get_more_rounds(mock_http):
+    bad = (mock.Mock(status=503), '{"message": "unavailable"}'.encode('utf-8'))
+    mock_call = mock.Mock(return_value=bad)
+    mock_http.return_value = mock.Mock(request=mock_call)
+    policy = chronos.RetryPolicy(max_attempts=3, sleep=mock.Mock())
+    client = chronos.ChronosClient(servers=['1.2.3.4', '1.2.3.5'], retry_policy=policy)
+    with pytest.raises(chronos.ChronosAPIError):
+        client._call("/scheduler/job/foo", "PUT")
+    assert mock_call.call_count == 2
+    with pytest.raises(chronos.ChronosAPIError):
+        client._call("/foo")
+    assert mock_call.call_count == 2 + 6
+    # a GET that timed out is sent again
+    mock_call.side_effect = [socket.timeout('timed out'), (mock.Mock(status=200), b'{"foo": "bar"}')]
+    assert client._call("/foo") == {'foo': 'bar'}
+
+
+@mock.patch('chronos.httplib2.Http')
+def test_call_backs_off_between_rounds(mock_http):
+    bad = (mock.Mock(status=503), '{"message": "unavailable"}'.encode('utf-8'))
+    good = (mock.Mock(status=200), '{"foo": "bar"}'.encode('utf-8'))
+    mock_http.return_value = mock.Mock(request=mock.Mock(side_effect=[bad, httplib2.socket.error, good]))
+    sleep = mock.Mock()
+    policy = chronos.RetryPolicy(max_attempts=3, backoff=1, jitter=False, sleep=sleep)
+    client = chronos.ChronosClient(servers=['1.2.3.4', '1.2.3.5'], retry_policy=policy)
+    assert client._call("/foo") == {'foo': 'bar'}
+    sleep.assert_called_once_with(1)
+
+
+@mock.patch('chronos.httplib2.Http')
+def test_call_gives_up_after_max_attempts(mock_http):
+    mock_call = mock.Mock(side_effect=httplib2.socket.error)
+    mock_http.return_value = mock.Mock(request=mock_call)
+    policy = chronos.RetryPolicy(max_attempts=2, sleep=mock.Mock())
+    client = chronos.ChronosClient(servers=['1.2.3.4', '1.2.3.5'], retry_policy=policy)
+    with pytest.raises(chronos.ChronosAPIError):
+        client._call("/foo")
+    assert mock_call.call_count == 4
+
+
+def test_client_sets_socket_timeout():
+    client = chronos.ChronosClient('localhost', retry_policy=chronos.RetryPolicy(read_timeout=7))
+    assert client._new_connection('http://localhost').timeout == 7
@@ -0,0 +1,65 @@
+import json
+
+import mock
+import pytest
+
+import chronos
+from chronos.codec import JSONCodec, OrjsonCodec, make_codec
+
+JOB = {'name': u'caf\xe9', 'command': 'echo /tmp', 'cpus': 0.5, 'uris': []}
+
+
+def test_stdlib_codec_decodes_bytes_and_memoryviews():
+    codec = JSONCodec()
+    data = json.dumps(JOB).encode('utf-8')
+    assert codec.loads(data) == JOB
+    assert codec.loads(memoryview(data)) == JOB
+    assert codec.loads(bytearray(data)) == JOB
+    assert codec.loads(data.decode('utf-8')) == JOB
+    assert codec.dumps(JOB) == json.dumps(JOB)
+
+
+@pytest.mark.skipif(not chronos.codec.LOADS_BYTES, reason='json.loads takes bytes from Python 3.6 on')
+def test_stdlib_codec_passes_bytes_to_json():
+    data = b'[{"name": "a"}]'
+    with mock.patch('json.loads', return_value=[]) as loads:
+        JSONCodec().loads(data)
+    loads.assert_called_once_with(data)
+
+
+@pytest.mark.parametrize('name', ['orjson', 'ujson'])
+def test_optional_codecs_round_trip(name):
+    pytest.importorskip(name)
+    codec = make_codec(name)
+    body = codec.dumps(JOB)
+    assert isinstance(body, bytes)
+    assert json.loads(body.decode('utf-8')) == JOB
+    assert codec.loads(memoryview(body)) == JOB
+    with pytest.raises(ValueError):
+        codec.loads(b'foo bar')
+
+
+def test_make_codec():
+    codec = JSONCodec()
+    assert make_codec(codec) is codec
+    assert make_codec().name == 'json'
+    with pytest.raises(ValueError):
+        make_codec('yaml')
+
+
+def test_auto_falls_back_to_stdlib():
+    with mock.patch.object(OrjsonCodec, '__init__', side_effect=ImportError), \
+            mock.patch.dict(chronos.CODECS, {'ujson': mock.Mock(side_effect=ImportError)}):
+        assert make_codec('auto').name == 'json'
+
+
+def test_client_encodes_and_decodes_with_its_codec():
+    pytest.importorskip('orjson')
+    client = chronos.ChronosClient('localhost', codec='orjson')
+    response = mock.Mock(status=200)
+    assert client._check(response, b'[{"name": "a"}]') == [{'name': 'a'}]
+    job = dict(JOB, schedule='R/2017-01-01T00:00:00Z/PT1H', owner='me', disabled=False)
+    with mock.patch.object(client, '_call') as mock_call:
+        client.add(job)
+    body = mock_call.call_args[0][2]
+    assert isinstance(body, bytes) and json.loads(body.decode('utf-8')) == job
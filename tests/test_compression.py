@@ -0,0 +1,114 @@
+import gzip
+import io
+import zlib
+
+import httplib2
+import mock
+import pytest
+
+import chronos
+from benchmarks.fake_chronos import FakeChronos
+from chronos.compression import decompress, gzip_body, iter_decompressed, rejects_gzip, wire_bytes
+from chronos.instrumentation import MetricsCollector
+from chronos.stream import Response
+
+JOB = {'name': 'bench-job-000001', 'owner': 'me', 'disabled': False, 'schedule': 'R/2017-01-01T00:00:00Z/PT1H'}
+BODY = b'[' + b', '.join([b'{"name": "job-%d", "command": "true"}' % i for i in range(200)]) + b']'
+
+
+def raw_deflate(data):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+@pytest.mark.parametrize('encoding, packed', [
+    ('gzip', gzip_body(BODY)),
+    ('x-gzip', gzip_body(BODY)),
+    ('deflate', zlib.compress(BODY)),
+    ('deflate', raw_deflate(BODY)),
+    (None, BODY),
+    ('identity', BODY),
+])
+def test_decompress(encoding, packed):
+    assert decompress(packed, encoding) == BODY
+    chunks = [packed[i:i + 7] for i in range(0, len(packed), 7)]
+    assert b''.join(iter_decompressed(chunks, encoding)) == BODY
+
+
+def test_gzip_body_is_deterministic():
+    assert gzip_body(BODY.decode('ascii')) == gzip_body(BODY)
+    assert gzip.GzipFile(fileobj=io.BytesIO(gzip_body(BODY))).read() == BODY
+
+
+def test_wire_bytes():
+    resp = Response(200, 'OK')
+    assert wire_bytes(resp, BODY) == len(BODY)
+    resp.wire_bytes = 42
+    assert wire_bytes(resp, BODY) == 42
+    # httplib2 removes content-encoding after decompressing and keeps it as -content-encoding
+    assert wire_bytes(httplib2.Response({'status': '200', '-content-encoding': 'gzip'}), BODY) is None
+
+
+@pytest.mark.parametrize('transport', ['http.client', 'httplib2'])
+def test_compressed_responses_against_fake_server(transport):
+    collector = MetricsCollector()
+    with FakeChronos(jobs=50, compress=True) as server:
+        client = chronos.connect(server.address, transport=transport, instrumentation=collector)
+        assert len(client.list()) == 50
+        assert b''.join(client._stream('/scheduler/jobs')).startswith(b'[')
+        client.close()
+    snapshot = collector.snapshot()
+    wire = snapshot['wire_bytes']['GET /scheduler/jobs']
+    assert 0 < wire < snapshot['decoded_bytes']['GET /scheduler/jobs'] / 3
+
+
+def test_gzipped_request_bodies():
+    job = dict(JOB, command='echo ' + 'x' * 500)
+    with FakeChronos(jobs=2) as server:
+        client = chronos.connect(server.address, transport='http.client', compress_requests=256)
+        client.update(job)
+        client.update(dict(JOB, command='true'))
+        assert server.gzipped_requests == 1
+        client.close()
+
+
+def test_gzipped_request_falls_back_to_plain_body():
+    job = dict(JOB, command='echo ' + 'x' * 500)
+    with FakeChronos(jobs=2, gzip_requests=False) as server:
+        client = chronos.connect(server.address, transport='http.client', compress_requests=256)
+        client.update(job)
+        assert client._plain_servers == set(['http://%s' % server.address])
+        requests = server.requests
+        client.update(job)
+        assert server.requests == requests + 1
+        client.close()
+
+
+def test_rejects_gzip():
+    assert rejects_gzip(415, b'')
+    assert rejects_gzip(400, b'Unsupported Content-Encoding: gzip')
+    assert rejects_gzip(400, u'Not in GZIP format')
+    assert not rejects_gzip(400, b'{"message": "job name is missing"}')
+    assert not rejects_gzip(500, b'gzip')
+
+
+def test_invalid_job_is_not_resent_uncompressed():
+    client = chronos.ChronosClient('localhost', compress_requests=1)
+    conn = mock.Mock()
+    conn.request.return_value = (Response(400, 'Bad Request'), b'{"message": "invalid schedule"}')
+    resp, content = client._request(conn, 'http://localhost', 'http://localhost/v1/scheduler/iso8601', 'POST',
+                                    '{}', {}, gzip_body('{}'))
+    assert resp.status == 400
+    assert conn.request.call_count == 1
+    assert not client._plain_servers
+
+
+def test_transfer_is_recorded_only_when_wire_size_is_known():
+    inst = mock.Mock()
+    client = chronos.ChronosClient('localhost', instrumentation=inst)
+    client._record_response(inst, 'GET /metrics', 'http://localhost', Response(200, 'OK'), b'{}', 0.1, 0)
+    inst.transfer.assert_called_once_with('GET /metrics', 'http://localhost', 2, 2)
+    inst.reset_mock()
+    resp = httplib2.Response({'status': '200', '-content-encoding': 'gzip'})
+    client._record_response(inst, 'GET /metrics', 'http://localhost', resp, b'{}', 0.1, 0)
+    assert not inst.transfer.called
@@ -0,0 +1,57 @@
+import pytest
+
+from chronos.diff import FieldChange, diff_job, format_changes, same_value
+
+REMOTE = {
+    'name': 'etl', 'command': 'run.sh', 'owner': 'a@foo.com,b@foo.com', 'disabled': False, 'async': False,
+    'schedule': 'R/2015-12-18T10:00:00.000Z/PT1H', 'epsilon': 'PT60S', 'cpus': 0.5, 'mem': 1024.0,
+    'scheduleTimeZone': 'null', 'successCount': 702, 'lastSuccess': '2015-12-18T09:00:09.755Z', 'lastError': '',
+    'environmentVariables': [{'name': 'A', 'value': '1'}, {'name': 'B', 'value': '2'}],
+    'constraints': [['rack', 'EQUALS', 'a'], ['host', 'UNIQUE']], 'parents': [],
+    'uris': ['file:///a', 'file:///b'], 'arguments': ['-x', '-y'],
+    'container': {'type': 'docker', 'image': 'etl:1', 'network': 'BRIDGE', 'volumes': [], 'forcePullImage': False},
+}
+
+
+def test_server_normalisations_are_not_changes():
+    local = {
+        'name': 'etl', 'command': 'run.sh', 'owner': 'b@foo.com, a@foo.com', 'disabled': False, 'async': False,
+        'schedule': 'R/2015-01-01T00:00:00Z/PT60M', 'epsilon': 'PT1M', 'cpus': '0.5', 'mem': 1024,
+        'scheduleTimeZone': '', 'successCount': 0, 'lastError': 'ignored',
+        'environmentVariables': [{'name': 'B', 'value': '2'}, {'name': 'A', 'value': '1'}],
+        'constraints': [['host', 'UNIQUE'], ['rack', 'EQUALS', 'a']], 'uris': ['file:///b', 'file:///a'],
+        'container': {'type': 'docker', 'image': 'etl:1', 'network': 'bridge'},
+        'shell': True, 'retries': 2, 'highPriority': False,
+    }
+    assert diff_job(local, REMOTE) == []
+
+
+def test_real_changes_are_reported():
+    local = {
+        'name': 'etl', 'cpus': 1, 'arguments': ['-y', '-x'], 'retries': 5, 'mem': 2048,
+        'container': {'type': 'docker', 'image': 'etl:2'}, 'maxCompletionTime': 60,
+    }
+    changes = diff_job(local, REMOTE)
+    keys = [change.key for change in changes]
+    assert keys == ['arguments', 'container', 'cpus', 'maxCompletionTime', 'mem', 'retries']
+    assert changes[2] == FieldChange('cpus', 1, 0.5)
+    assert changes[3] == FieldChange('maxCompletionTime', 60, None)
+    assert changes[5] == FieldChange('retries', 5, None)
+    assert format_changes(changes[2:4]) == '  cpus: 0.5 -> 1\n  maxCompletionTime: (unset) -> 60'
+
+
+@pytest.mark.parametrize('local,remote,same', [
+    ('R/2015-12-18T10:00:00Z/PT1H', 'R/2015-12-18T10:00:00.000Z/PT60M', True),
+    ('R/2015-12-18T10:00:00Z/PT1H', 'R/2015-12-18T13:00:00.000Z/PT1H', True),
+    ('R/2015-12-18T10:00:00Z/PT1H', 'R/2015-12-18T13:30:00.000Z/PT1H', False),
+    ('R/2015-12-18T10:00:00Z/PT1H', 'R/2015-12-18T09:00:00.000Z/PT1H', False),
+    ('R10/2015-12-18T10:00:00Z/PT1H', 'R7/2015-12-18T13:00:00.000Z/PT1H', True),
+    ('R10/2015-12-18T10:00:00Z/PT1H', 'R10/2015-12-18T13:00:00.000Z/PT1H', False),
+    ('R/2015-12-18T10:00:00Z/PT1H', 'R/2015-12-18T10:00:00.000Z/PT2H', False),
+    ('R/2015-12-18T10:00:00Z/P1M', 'R/2015-12-18T10:00:00.000Z/P1M', True),
+    ('R/2015-12-18T10:00:00+01:00/P1D', 'R/2015-12-18T09:00:00.000Z/P1D', True),
+    ('not a schedule', 'not a schedule', True),
+    ('not a schedule', 'R/2015-12-18T09:00:00.000Z/P1D', False),
+])
+def test_schedules(local, remote, same):
+    assert same_value('schedule', local, remote) is same
@@ -0,0 +1,88 @@
+import mock
+import pytest
+
+import chronos
+from chronos.graph import JobGraph
+
+CSV = '''node,extract,success,idle
+node,transform,failure,idle
+node,load,fresh,queued
+node,report,fresh,idle
+node,"backup, nightly",success,running
+link,extract,transform
+link,transform,load
+link,extract,load
+link,load,report
+'''
+
+
+def test_from_csv():
+    graph = JobGraph.from_csv(CSV)
+    assert len(graph) == 5
+    assert graph.status('transform') == ('failure', 'idle')
+    assert graph.parents('load') == {'transform', 'extract'}
+    assert graph.children('extract') == {'transform', 'load'}
+    assert graph.roots() == {'extract', 'backup, nightly'}
+    assert graph.ancestors('report') == {'extract', 'transform', 'load'}
+    assert graph.descendants('transform') == {'load', 'report'}
+    assert graph.impact(['transform', 'backup, nightly']) == {'load', 'report'}
+    order = graph.topological_order()
+    assert sorted(order) == sorted(graph)
+    assert order.index('extract') < order.index('transform') < order.index('load') < order.index('report')
+    assert graph.cycles() == []
+    assert JobGraph.from_csv(CSV.encode('utf-8')).descendants('extract') == {'transform', 'load', 'report'}
+
+
+def test_from_jobs_keeps_missing_parents():
+    graph = JobGraph.from_jobs([
+        {'name': 'a'}, {'name': 'b', 'parents': ['a', 'gone']}, {'name': 'c', 'parents': ['b']},
+    ])
+    assert 'gone' in graph
+    assert graph.impact(['gone']) == {'b', 'c'}
+    assert graph.status('a') == ()
+
+
+def test_changes_invalidate_cached_closures():
+    graph = JobGraph.from_csv(CSV)
+    assert graph.descendants('load') == {'report'}
+    graph.add_job('archive', ['report'])
+    assert graph.descendants('load') == {'report', 'archive'}
+    graph.add_job('report', ['extract'])
+    assert graph.descendants('load') == set()
+    assert graph.descendants('extract') == {'transform', 'load', 'report', 'archive'}
+    graph.remove_job('archive')
+    assert 'archive' not in graph
+    assert graph.descendants('extract') == {'transform', 'load', 'report'}
+    graph.remove_job('extract')
+    assert 'extract' in graph
+    assert graph.roots() == {'extract', 'backup, nightly'}
+    assert graph.parents('report') == {'extract'}
+
+
+def test_cycles():
+    graph = JobGraph.from_jobs([
+        {'name': 'a', 'parents': ['c']}, {'name': 'b', 'parents': ['a']}, {'name': 'c', 'parents': ['b']},
+        {'name': 'd', 'parents': ['c']}, {'name': 'self', 'parents': ['self']}, {'name': 'ok'},
+    ])
+    assert sorted(graph.cycles()) == [['a', 'b', 'c'], ['self']]
+    with pytest.raises(ValueError) as e:
+        graph.topological_order()
+    assert 'a, b, c, self' in str(e.value)
+    assert graph.descendants('a') == {'a', 'b', 'c', 'd'}
+
+
+def test_deep_graphs_dont_recurse():
+    graph = JobGraph.from_jobs({'name': str(i), 'parents': [str(i - 1)] if i else []} for i in range(5000))
+    assert len(graph.ancestors('4999')) == 4999
+    assert graph.topological_order()[:3] == ['0', '1', '2']
+    assert graph.cycles() == []
+
+
+def test_client_job_graph():
+    client = chronos.ChronosClient('localhost')
+    with mock.patch.object(client, '_call', return_value=CSV) as mock_call:
+        graph = client.job_graph()
+    mock_call.assert_called_once_with('/scheduler/graph/csv', 'GET')
+    assert graph.descendants('load') == {'report'}
+    with mock.patch.object(client, '_call', return_value=[{'name': 'a'}, {'name': 'b', 'parents': ['a']}]):
+        assert client.job_graph(from_jobs=True).children('a') == {'b'}
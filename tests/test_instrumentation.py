@@ -0,0 +1,72 @@
+import httplib2
+import mock
+
+import chronos
+from chronos.instrumentation import Histogram, MetricsCollector, endpoint_label
+
+
+def test_endpoint_label_hides_job_names():
+    assert endpoint_label('GET', '/scheduler/jobs') == 'GET /scheduler/jobs'
+    assert endpoint_label('PUT', '/scheduler/job/my job') == 'PUT /scheduler/job/{name}'
+    assert endpoint_label('GET', '/scheduler/job/stat/foo') == 'GET /scheduler/job/stat/{name}'
+    assert endpoint_label('DELETE', '/scheduler/task/kill/foo') == 'DELETE /scheduler/task/kill/{name}'
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(value)
+    assert hist.cumulative() == [(0.1, 2), (1.0, 3), (float('inf'), 4)]
+    assert hist.snapshot() == {'count': 4, 'sum': 3.65, 'buckets': {'0.1': 2, '1.0': 3, '+Inf': 4}}
+
+
+@mock.patch('chronos.httplib2.Http')
+def test_client_records_requests_failovers_and_retries(mock_http):
+    bad = (mock.Mock(status=503), b'{"message": "unavailable"}')
+    good = (mock.Mock(status=200), b'[]')
+    mock_http.return_value = mock.Mock(request=mock.Mock(side_effect=[httplib2.socket.error, bad, good]))
+    collector = MetricsCollector()
+    policy = chronos.RetryPolicy(max_attempts=3, jitter=False, sleep=mock.Mock())
+    client = chronos.ChronosClient(['a:4400', 'b:4400'], instrumentation=collector, retry_policy=policy)
+    client.list()
+
+    snapshot = collector.snapshot()
+    assert snapshot['responses'] == {'GET /scheduler/jobs': {'error': 1, '503': 1, '200': 1}}
+    assert snapshot['failovers'] == {'http://a:4400': 1, 'http://b:4400': 1}
+    assert snapshot['retries'] == {'GET /scheduler/jobs': 1}
+    assert snapshot['endpoints']['GET /scheduler/jobs']['count'] == 3
+    assert sum(hist['count'] for hist in snapshot['servers'].values()) == 3
+    assert sum(snapshot['bytes_received'].values()) == len(bad[1]) + len(good[1])
+
+
+@mock.patch('chronos.httplib2.Http')
+def test_client_records_bytes_sent(mock_http):
+    mock_http.return_value = mock.Mock(request=mock.Mock(return_value=(mock.Mock(status=204), b'')))
+    collector = MetricsCollector()
+    client = chronos.ChronosClient('localhost', instrumentation=collector)
+    job = {'name': 'foo', 'command': 'true', 'owner': 'me', 'disabled': False}
+    job['schedule'] = 'R/2015-01-01T00:00:00Z/PT1H'
+    client.add(job)
+    client.run('foo')
+    body = mock_http.return_value.request.call_args_list[0][1]['body']
+    snapshot = collector.snapshot()
+    assert snapshot['bytes_sent'] == {'http://localhost': len(body)}
+    assert snapshot['responses']['PUT /scheduler/job/{name}'] == {'204': 1}
+
+
+def test_prometheus_text():
+    collector = MetricsCollector(buckets=(0.5,))
+    collector.request('GET /scheduler/jobs', 'http://a:4400', 200, 0.25, 0, 10)
+    collector.request('GET /scheduler/jobs', 'http://a:4400', None, 1.0, 0, 0)
+    collector.failover('GET /scheduler/jobs', 'http://a:4400')
+    text = collector.prometheus()
+    labels = '{method="GET",endpoint="/scheduler/jobs"'
+    assert '# TYPE chronos_client_request_duration_seconds histogram' in text
+    assert 'chronos_client_request_duration_seconds_bucket%s,le="0.5"} 1' % labels in text
+    assert 'chronos_client_request_duration_seconds_bucket%s,le="+Inf"} 2' % labels in text
+    assert 'chronos_client_request_duration_seconds_sum%s} 1.25' % labels in text
+    assert 'chronos_client_server_request_duration_seconds_count{server="http://a:4400"} 2' in text
+    assert 'chronos_client_responses_total%s,status="error"} 1' % labels in text
+    assert 'chronos_client_failovers_total{server="http://a:4400"} 1' in text
+    assert 'chronos_client_received_bytes_total{server="http://a:4400"} 10' in text
+    assert text.endswith('\n')
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import mock
+import pytest
+
+import chronos
+from chronos.iso8601 import UTC, format_duration, parse_datetime, parse_duration
+from chronos.job import ChronosJob, attribute_name
+
+JOB = {
+    'name': 'my job 1', 'command': 'sensu-scheduled-canary.sh', 'owner': 'noop', 'ownerName': '',
+    'disabled': False, 'async': False, 'schedule': 'R/2015-12-18T10:40:00.000Z/PT10M', 'epsilon': 'PT60S',
+    'lastSuccess': '2015-12-18T10:30:09.755Z', 'lastError': '', 'errorsSinceLastSuccess': 0, 'cpus': 0.25,
+    'mem': 1024.0, 'container': {'image': 'my-docker-registry:443/myimage', 'type': 'docker', 'volumes': []},
+    'environmentVariables': [{'name': 'FOO', 'value': 'bar'}], 'arguments': [], 'uris': ['file:///root/.dockercfg'],
+    'someNewField': {'nested': True},
+}
+
+
+def test_round_trips_losslessly():
+    job = ChronosJob(JOB)
+    assert job.to_dict() == JOB
+    job.container
+    job.last_success
+    assert job.to_dict() == JOB
+
+
+def test_decodes_native_types():
+    job = ChronosJob(JOB)
+    assert job.last_success == datetime(2015, 12, 18, 10, 30, 9, 755000, tzinfo=UTC)
+    assert job.last_error is None
+    assert job.epsilon == timedelta(seconds=60)
+    assert job.errors_since_last_success == 0
+    assert job.container['image'] == 'my-docker-registry:443/myimage'
+    assert job.async_ is False
+    assert job.parents is None
+
+
+def test_nested_values_are_decoded_once():
+    job = ChronosJob(JOB)
+    assert not hasattr(job, '_c_container')
+    assert job.container is job.container
+    assert job._c_container is job.container
+
+
+def test_mapping_access():
+    job = ChronosJob(JOB)
+    assert job['ownerName'] == ''
+    assert job['lastSuccess'] == '2015-12-18T10:30:09.755Z'
+    assert job['someNewField'] == {'nested': True}
+    assert 'schedule' in job
+    assert 'parents' not in job
+    assert job.get('parents', []) == []
+    with pytest.raises(KeyError):
+        job['parents']
+
+
+def test_setting_fields():
+    job = ChronosJob(name='foo', command='true', owner='me', disabled=False, parents=['bar'])
+    job.epsilon = timedelta(minutes=5)
+    job.container = {'type': 'docker', 'image': 'foo'}
+    job.container['image'] = 'bar'
+    assert job.to_dict() == {
+        'name': 'foo', 'command': 'true', 'owner': 'me', 'disabled': False, 'parents': ['bar'],
+        'epsilon': 'PT5M', 'container': {'type': 'docker', 'image': 'bar'},
+    }
+    with pytest.raises(TypeError):
+        ChronosJob(bogus=1)
+
+
+def test_records_have_no_dict():
+    job = ChronosJob(JOB)
+    assert not hasattr(job, '__dict__')
+    with pytest.raises(AttributeError):
+        job.bogus = 1
+
+
+def test_list_as_records_and_add_accepts_records():
+    client = chronos.ChronosClient('localhost')
+    with mock.patch.object(client, '_call', return_value=[JOB]):
+        jobs = client.list(as_records=True)
+    assert jobs == [ChronosJob(JOB)]
+    with mock.patch.object(client, '_call') as mock_call:
+        client.add(jobs[0])
+    assert mock_call.call_args[0][:2] == ('/scheduler/iso8601', 'POST')
+
+
+@pytest.mark.parametrize('key,attr', [('name', 'name'), ('errorsSinceLastSuccess', 'errors_since_last_success')])
+def test_attribute_name(key, attr):
+    assert attribute_name(key) == attr
+
+
+def test_iso8601_helpers():
+    assert parse_datetime('2015-12-18T10:30:09+02:00') == datetime(2015, 12, 18, 8, 30, 9, tzinfo=UTC)
+    assert parse_duration('P1DT1H30M') == timedelta(days=1, hours=1, minutes=30)
+    assert format_duration(timedelta(days=1, hours=1, minutes=30)) == 'P1DT1H30M'
+    assert format_duration(timedelta(0)) == 'PT0S'
+    for invalid in ('P1M', 'PT', '10M'):
+        with pytest.raises(ValueError):
+            parse_duration(invalid)
+    with pytest.raises(ValueError):
+        parse_datetime('yesterday')
@@ -0,0 +1,85 @@
+import mock
+import pytest
+
+import chronos
+from chronos.metrics import MetricsHistory, MetricsSnapshot, MetricTable
+
+
+def metrics(runs, failures, heap=100, extra=None):
+    response = {
+        'version': '3.0.0',
+        'gauges': {'jvm.memory.heap.used': {'value': heap}, 'jvm.name': {'value': 'OpenJDK'}},
+        'counters': {'jobs.run.failure': {'count': failures}},
+        'meters': {'jobs.run': {'count': runs, 'm1_rate': 0.5, 'units': 'events/second'}},
+        'timers': {'api.get': {'count': runs * 2, 'p99': 0.25, 'duration_units': 'seconds'}},
+    }
+    response.update(extra or {})
+    return response
+
+
+def test_snapshot_flattens_numeric_fields():
+    snapshot = MetricsSnapshot.from_response(metrics(10, 1), timestamp=5.0)
+    assert snapshot.version == '3.0.0'
+    assert snapshot.get('gauges', 'jvm.memory.heap.used') == 100
+    assert snapshot.get('counters', 'jobs.run.failure') == 1
+    assert snapshot.get('meters', 'jobs.run', 'm1_rate') == 0.5
+    assert snapshot.get('timers', 'api.get', 'p99') == 0.25
+    assert snapshot.get('gauges', 'jvm.name') is None
+    assert snapshot.get('meters', 'jobs.run', 'units', default='n/a') == 'n/a'
+    assert len(snapshot) == 6
+    assert (('counters', 'jobs.run.failure', 'count'), 1) in snapshot.items()
+
+
+def test_shared_table_keeps_positions():
+    table = MetricTable()
+    first = MetricsSnapshot.from_response(metrics(10, 1), table)
+    second = MetricsSnapshot.from_response(
+        metrics(12, 1, extra={'counters': {'jobs.run.failure': {'count': 1}, 'jobs.new': {'count': 3}}}), table,
+    )
+    assert len(table) == 7
+    assert len(first.values) == 6
+    assert second.get('counters', 'jobs.new') == 3
+    assert second.get('counters', 'jobs.run.failure') == 1
+    assert first.get('counters', 'jobs.new') is None
+
+
+def test_delta_and_rates():
+    table = MetricTable()
+    older = MetricsSnapshot.from_response(metrics(10, 1, heap=100), table, timestamp=0.0)
+    newer = MetricsSnapshot.from_response(metrics(30, 4, heap=80), table, timestamp=10.0)
+    delta = newer.delta(older)
+    assert delta.elapsed == 10.0
+    assert delta.get('meters', 'jobs.run') == 20
+    assert delta.get('gauges', 'jvm.memory.heap.used') == -20
+    assert delta.rate('counters', 'jobs.run.failure') == 0.3
+    assert delta.rates() == {
+        ('counters', 'jobs.run.failure'): 0.3, ('meters', 'jobs.run'): 2.0, ('timers', 'api.get'): 4.0,
+    }
+
+
+def test_delta_needs_the_same_table():
+    with pytest.raises(ValueError):
+        MetricsSnapshot.from_response(metrics(1, 0)).delta(MetricsSnapshot.from_response(metrics(1, 0)))
+
+
+def test_history_is_bounded_and_computes_windows():
+    history = MetricsHistory(maxlen=3)
+    assert history.rate('meters', 'jobs.run') is None
+    for second, runs in enumerate([0, 10, 30, 60]):
+        history.add(metrics(runs, 0), timestamp=float(second))
+    assert len(history) == 3
+    assert [snapshot.timestamp for snapshot in history] == [1.0, 2.0, 3.0]
+    assert history.latest.get('meters', 'jobs.run') == 60
+    assert history.rate('meters', 'jobs.run') == 25.0
+    assert history.rate('meters', 'jobs.run', window=1) == 30.0
+
+
+def test_client_snapshots_share_a_table():
+    client = chronos.ChronosClient('localhost')
+    history = MetricsHistory()
+    with mock.patch.object(client, '_call', side_effect=[metrics(1, 0), metrics(5, 0), metrics(9, 0)]):
+        first = client.metrics_snapshot()
+        second = client.metrics_snapshot()
+        client.metrics_snapshot(history=history)
+    assert second.delta(first).get('meters', 'jobs.run') == 4
+    assert history.latest.get('meters', 'jobs.run') == 9
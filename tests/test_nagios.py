@@ -0,0 +1,151 @@
+import os
+import socket
+import sys
+import threading
+
+import mock
+import pytest
+
+import chronos
+
+# a single run, long past, so the job is stalled whatever the time is now
+ONCE = 'R1/2020-01-01T01:00:00Z/PT1H'
+
+JOBS = [
+    {'name': 'etl-load', 'disabled': False, 'lastSuccess': '2020-01-01T01:00:00.000Z', 'lastError': ''},
+    {
+        'name': 'etl-fail', 'disabled': False,
+        'lastSuccess': '2020-01-01T01:00:00.000Z', 'lastError': '2020-01-01T02:00:00.000Z',
+    },
+    # hasn't succeeded since its run at 01:00
+    {
+        'name': 'data-stalled', 'disabled': False, 'schedule': ONCE,
+        'lastSuccess': '2020-01-01T00:00:30.000Z', 'lastError': '',
+    },
+    {'name': 'data-off', 'disabled': True, 'lastSuccess': '', 'lastError': '2020-01-01T02:00:00.000Z'},
+]
+
+
+@pytest.fixture
+def daemon(nagios, tmpdir):
+    client = mock.Mock()
+    client.list.return_value = JOBS
+    daemon = nagios.CheckDaemon(client, refresh=3600)
+    daemon.start()
+    address = str(tmpdir.join('check.sock'))
+    server = nagios.check_server(address, daemon)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01})
+    thread.daemon = True
+    thread.start()
+    yield address, daemon
+    server.shutdown()
+    server.server_close()
+    daemon.stop()
+
+
+def run_main(nagios, *argv):
+    with mock.patch.object(sys, 'argv', ['chronos-nagios.py'] + list(argv)):
+        with pytest.raises(SystemExit) as raised:
+            nagios.main()
+    return raised.value.code
+
+
+def test_names_matching_uses_the_index_for_plain_prefixes(nagios):
+    catalog = chronos.JobCatalog(JOBS)
+    with mock.patch.object(catalog, 'names_with_prefix', wraps=catalog.names_with_prefix) as lookup:
+        assert nagios.names_matching(catalog, ['etl']) == set(['etl-load', 'etl-fail'])
+        lookup.assert_called_once_with('etl')
+        lookup.reset_mock()
+        assert nagios.names_matching(catalog, ['etl-l.*', '(data)-o']) == set(['etl-load', 'data-off'])
+        assert not lookup.called
+
+
+def test_check_thresholds(nagios):
+    snapshot = nagios.JobSnapshot(JOBS)
+    assert snapshot.check(prefix=['data'])[0] == 0
+    assert snapshot.check(prefix=['etl'], warn=1, crit=2)[0] == 1
+    code, output = snapshot.check(exclude=['data'])
+    assert code == 2 and output.startswith('CRITICAL: 1 failed jobs:') and 'etl-fail' in output
+
+
+def test_check_counts_stalled_jobs_as_failed(nagios):
+    snapshot = nagios.JobSnapshot(JOBS)
+    code, output = snapshot.check(prefix=['data'], stalled=900)
+    assert code == 2
+    assert output.startswith('CRITICAL: 1 failed jobs:') and 'data-stalled' in output and '(1 stalled)' in output
+
+
+def test_one_shot_check_scans_the_listing(nagios):
+    client = mock.Mock()
+    client.list.return_value = JOBS
+    with mock.patch('chronos.JobCatalog') as catalog:
+        snapshot = nagios.fetch_snapshot(client, index=False)
+    assert not catalog.called
+    indexed = nagios.JobSnapshot(JOBS)
+    for prefix, exclude in ((None, None), (['etl'], None), (['etl-l.*', '(data)-o'], None), (None, ['data'])):
+        assert snapshot.select(prefix, exclude) == indexed.select(prefix, exclude)
+        assert snapshot.check(prefix, exclude, stalled=900) == indexed.check(prefix, exclude, stalled=900)
+
+
+def test_main_one_shot(nagios, capsys):
+    client = mock.Mock()
+    client.list.return_value = JOBS
+    with mock.patch('chronos.connect', return_value=client), mock.patch('chronos.JobCatalog') as catalog:
+        assert run_main(nagios, '--hostname', 'localhost:4400', '--prefix', 'etl') == 2
+    assert not catalog.called
+    assert 'etl-fail' in capsys.readouterr()[0]
+
+
+def test_check_server_replaces_only_sockets(nagios, tmpdir):
+    stale = str(tmpdir.join('stale.sock'))
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(stale)
+    sock.close()
+    server = nagios.check_server(stale, None)
+    server.server_close()
+    assert nagios.remove_socket(stale) and not os.path.exists(stale)
+
+    config = tmpdir.join('nagios.cfg')
+    config.write('keep me')
+    with pytest.raises(ValueError):
+        nagios.check_server(str(config), None)
+    assert not nagios.remove_socket(str(config))
+    assert config.read() == 'keep me'
+
+
+def test_daemon_answers_checks(nagios, daemon):
+    address, _ = daemon
+    code, output = nagios.query_daemon(address, [('prefix', 'etl-load')])
+    assert (code, output.strip()) == (0, 'OK: 1 jobs succeeded on last run')
+    code, output = nagios.query_daemon(address, [('prefix', 'etl'), ('crit', 1)])
+    assert code == 2 and output.startswith('CRITICAL: 1 failed jobs:') and 'etl-fail' in output
+    code, output = nagios.query_daemon(address, [('exclude', 'etl'), ('stalled', 900)])
+    assert code == 2 and 'data-stalled' in output and '(1 stalled)' in output
+
+
+def test_daemon_reports_a_stale_listing_as_unknown(nagios, daemon):
+    address, check_daemon = daemon
+    check_daemon.client.list.side_effect = ValueError('connection refused')
+    check_daemon.update()
+    # the failed refresh keeps the last listing until it is max_age old
+    assert nagios.query_daemon(address, [])[0] == 2
+    check_daemon.snapshot.taken -= check_daemon.max_age + 1
+    assert nagios.query_daemon(address, []) == (nagios.UNKNOWN, 'UNKNOWN: error querying chronos')
+
+
+def test_main_asks_the_daemon(nagios, daemon, capsys):
+    address, check_daemon = daemon
+    assert run_main(nagios, '--daemon', address, '--prefix', 'etl-load') == 0
+    assert capsys.readouterr()[0].startswith('OK: 1 jobs succeeded')
+    assert run_main(nagios, '--daemon', address, '--prefix', 'etl') == 2
+    assert 'etl-fail' in capsys.readouterr()[0]
+    assert run_main(nagios, '--daemon', address, '--prefix', 'data', '--stalled', '900') == 2
+    assert '(1 stalled)' in capsys.readouterr()[0]
+    check_daemon.snapshot = None
+    assert run_main(nagios, '--daemon', address) == nagios.UNKNOWN
+    assert capsys.readouterr()[0] == 'UNKNOWN: error querying chronos\n'
+
+
+def test_main_without_a_daemon(nagios, tmpdir, capsys):
+    assert run_main(nagios, '--daemon', str(tmpdir.join('missing.sock'))) == nagios.UNKNOWN
+    assert capsys.readouterr()[0].startswith('UNKNOWN: error querying chronos-nagios daemon:')
@@ -0,0 +1,88 @@
+import mock
+import pytest
+
+from chronos.pool import ConnectionPool
+
+
+def make_pool(clock, **kwargs):
+    factory = mock.Mock(side_effect=lambda server: mock.Mock(server=server))
+    return ConnectionPool(factory, clock=clock, **kwargs), factory
+
+
+def test_reuses_released_connection(clock):
+    pool, factory = make_pool(clock)
+    with pool.connection('http://host1') as first:
+        pass
+    with pool.connection('http://host1') as second:
+        pass
+    assert first is second
+    assert factory.call_count == 1
+    stats = pool.stats()
+    assert stats['hits'] == 1
+    assert stats['new_connections'] == 1
+    assert stats['idle'] == {'http://host1': 1}
+
+
+def test_connections_are_kept_per_server(clock):
+    pool, factory = make_pool(clock)
+    with pool.connection('http://host1') as first:
+        pass
+    with pool.connection('http://host2') as second:
+        pass
+    assert first is not second
+    assert [c[0][0] for c in factory.call_args_list] == ['http://host1', 'http://host2']
+
+
+def test_failed_connection_is_closed_and_not_reused(clock):
+    pool, factory = make_pool(clock)
+    with pytest.raises(ValueError):
+        with pool.connection('http://host1') as conn:
+            raise ValueError()
+    conn.close.assert_called_once_with()
+    assert pool.stats()['idle'] == {}
+
+
+def test_idle_timeout_evicts(clock):
+    pool, factory = make_pool(clock, idle_timeout=10, max_lifetime=None)
+    with pool.connection('http://host1') as first:
+        pass
+    clock.now = 11
+    with pool.connection('http://host1') as second:
+        pass
+    assert first is not second
+    first.close.assert_called_once_with()
+    assert pool.stats()['evictions'] == 1
+
+
+def test_max_lifetime_evicts_busy_connection(clock):
+    pool, factory = make_pool(clock, idle_timeout=10, max_lifetime=30)
+    for now in (0, 9, 18, 27):
+        clock.now = now
+        with pool.connection('http://host1'):
+            pass
+    assert factory.call_count == 1
+    clock.now = 36
+    with pool.connection('http://host1'):
+        pass
+    assert factory.call_count == 2
+    assert pool.stats()['evictions'] == 1
+
+
+def test_release_beyond_maxsize_closes(clock):
+    pool, factory = make_pool(clock, maxsize=1)
+    first = pool.acquire('http://host1')
+    second = pool.acquire('http://host1')
+    pool.release('http://host1', first)
+    pool.release('http://host1', second)
+    second.conn.close.assert_called_once_with()
+    assert pool.stats()['idle'] == {'http://host1': 1}
+    assert pool.stats()['evictions'] == 1
+
+
+def test_clear_closes_idle(clock):
+    pool, factory = make_pool(clock)
+    with pool.connection('http://host1') as conn:
+        pass
+    pool.clear()
+    conn.close.assert_called_once_with()
+    assert pool.stats()['idle'] == {}
@@ -0,0 +1,41 @@
+import mock
+
+from chronos.retry import RetryPolicy
+
+
+def test_backoff_grows_exponentially_up_to_max():
+    policy = RetryPolicy(max_attempts=10, backoff=0.5, max_backoff=3, jitter=False)
+    assert [policy.delay(attempt, None) for attempt in range(1, 6)] == [0.5, 1.0, 2.0, 3, 3]
+
+
+def test_gives_up_after_max_attempts():
+    policy = RetryPolicy(max_attempts=2, jitter=False)
+    assert policy.delay(1, None) is not None
+    assert policy.delay(2, None) is None
+
+
+def test_jitter_stays_within_backoff():
+    policy = RetryPolicy(max_attempts=10, backoff=1, max_backoff=4)
+    with mock.patch('random.uniform', return_value=0.25) as uniform:
+        assert policy.delay(3, None) == 0.25
+    uniform.assert_called_once_with(0, 4)
+
+
+def test_deadline_limits_timeout_and_backoff(clock):
+    policy = RetryPolicy(backoff=2, jitter=False, deadline=5, read_timeout=30, clock=clock)
+    deadline = policy.start()
+    assert policy.timeout(deadline) == 5
+    clock.now = 4
+    assert policy.timeout(deadline) == 1
+    assert policy.delay(1, deadline) is None
+    assert not policy.expired(deadline)
+    clock.now = 5
+    assert policy.expired(deadline)
+
+
+def test_retryable_statuses():
+    policy = RetryPolicy()
+    assert policy.is_retryable(502)
+    assert policy.is_retryable(503)
+    assert not policy.is_retryable(400)
+    assert not policy.is_retryable(404)
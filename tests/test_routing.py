@@ -0,0 +1,63 @@
+import threading
+
+import mock
+
+from chronos.routing import CircuitBreaker, ServerRouter
+
+
+SERVERS = ['http://host1', 'http://host2', 'http://host3']
+
+
+def test_breaker_opens_after_threshold_and_half_opens():
+    breaker = CircuitBreaker(threshold=2, reset_timeout=10)
+    breaker.record_failure(0)
+    assert breaker.state(0) == CircuitBreaker.CLOSED
+    breaker.record_failure(1)
+    assert breaker.state(1) == CircuitBreaker.OPEN
+    assert not breaker.allow(5)
+    assert breaker.state(11) == CircuitBreaker.HALF_OPEN
+    breaker.record_failure(11)
+    assert breaker.state(12) == CircuitBreaker.OPEN
+    breaker.record_success()
+    assert breaker.state(12) == CircuitBreaker.CLOSED
+
+
+def test_router_prefers_last_successful_server():
+    router = ServerRouter(SERVERS)
+    assert router.order() == SERVERS
+    router.success('http://host3')
+    assert router.order() == ['http://host3', 'http://host1', 'http://host2']
+    router.failure('http://host3')
+    assert router.order()[0] == 'http://host1'
+
+
+def test_router_tries_tripped_servers_last(clock):
+    router = ServerRouter(SERVERS, failure_threshold=2, reset_timeout=30, clock=clock)
+    router.failure('http://host1')
+    router.failure('http://host1')
+    assert router.order() == ['http://host2', 'http://host3', 'http://host1']
+    clock.now = 31
+    assert router.order() == SERVERS
+    assert router.stats()['breakers']['http://host1'] == 'half-open'
+
+
+def test_probes_rank_leader_then_latency():
+    router = ServerRouter(SERVERS)
+    router.record_probes({'http://host1': None, 'http://host2': (0.5, False), 'http://host3': (0.9, True)})
+    assert router.order() == ['http://host3', 'http://host2', 'http://host1']
+    assert router.preferred == 'http://host3'
+
+
+def test_background_probing():
+    router = ServerRouter(SERVERS)
+    probed = threading.Event()
+
+    def probe(server):
+        if server == SERVERS[-1]:
+            probed.set()
+        return (0.1, server == 'http://host2')
+
+    router.start_probing(mock.Mock(side_effect=probe), interval=60)
+    assert probed.wait(5)
+    router.stop_probing()
+    assert router.order()[0] == 'http://host2'
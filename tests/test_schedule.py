@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+import mock
+import pytest
+
+import chronos
+from chronos.iso8601 import UTC
+from chronos.schedule import ScheduleTable, add_months, parse_schedule
+
+NOW = datetime(2020, 1, 1, 12, 30, tzinfo=UTC)
+HOUR = 3600.0
+
+JOBS = [
+    {'name': 'hourly', 'schedule': 'R/2020-01-01T00:00:00Z/PT1H', 'lastSuccess': '2020-01-01T12:00:30.000Z'},
+    {'name': 'stalled', 'schedule': 'R/2020-01-01T00:00:00Z/PT1H', 'lastSuccess': '2020-01-01T10:00:30.000Z'},
+    # Chronos moved the start on after the 12:00 run
+    {'name': 'advanced', 'schedule': 'R/2020-01-01T13:00:00Z/PT1H', 'lastSuccess': '2020-01-01T12:00:30.000Z'},
+    {'name': 'advanced-stale', 'schedule': 'R/2020-01-01T13:00:00Z/PT1H', 'lastSuccess': '2020-01-01T09:00:00Z'},
+    {'name': 'not-started', 'schedule': 'R/2021-01-01T00:00:00Z/PT1H'},
+    {'name': 'never-ran', 'schedule': 'R/2020-01-01T12:00:00Z/PT1H', 'epsilon': 'PT10M'},
+    {'name': 'finished', 'schedule': 'R3/2020-01-01T00:00:00Z/PT1H', 'lastSuccess': '2020-01-01T02:00:30.000Z'},
+    {'name': 'monthly', 'schedule': 'R/2019-10-31T00:00:00Z/P1M', 'lastSuccess': '2019-10-31T00:01:00.000Z'},
+    {'name': 'dependent', 'parents': ['hourly']},
+    {'name': 'broken', 'schedule': 'R/yesterday/PT1H'},
+    {'name': 'disabled', 'disabled': True, 'schedule': 'R/2020-01-01T00:00:00Z/PT1H'},
+    {
+        'name': 'failed', 'schedule': 'R/2020-01-01T00:00:00Z/PT1H',
+        'lastSuccess': '2020-01-01T10:00:30.000Z', 'lastError': '2020-01-01T12:00:30.000Z',
+    },
+]
+
+
+@pytest.fixture(params=[False, True], ids=['python', 'numpy'])
+def use_numpy(request):
+    if request.param:
+        pytest.importorskip('numpy')
+    return request.param
+
+
+def hours(column, table, name):
+    value = column[table.index[name]]
+    return None if value != value else (value - (NOW - datetime(1970, 1, 1, tzinfo=UTC)).total_seconds()) / HOUR
+
+
+def test_parse_schedule():
+    schedule = parse_schedule('R5/2015-12-18T10:40:00.000Z/P1Y2M3DT4H')
+    assert schedule.repetitions == 5
+    assert schedule.start == datetime(2015, 12, 18, 10, 40, tzinfo=UTC)
+    assert (schedule.months, schedule.period) == (14, timedelta(days=3, hours=4))
+    assert parse_schedule('R//PT10M') == (None, None, 0, timedelta(minutes=10))
+    for invalid in ('2015-12-18T10:40:00Z/PT1H', 'R/2015-12-18T10:40:00Z/PT0S', 'R/2015-12-18/PT1H', 'R/x/P0.5M'):
+        with pytest.raises(ValueError):
+            parse_schedule(invalid)
+
+
+def test_add_months_clamps_the_day():
+    assert add_months(datetime(2020, 1, 31), 1) == datetime(2020, 2, 29)
+    assert add_months(datetime(2020, 1, 31), -2) == datetime(2019, 11, 30)
+    assert add_months(datetime(2020, 11, 15), 14) == datetime(2022, 1, 15)
+
+
+def test_runs(use_numpy):
+    table = ScheduleTable.from_jobs(JOBS, use_numpy=use_numpy)
+    now = (NOW - datetime(1970, 1, 1, tzinfo=UTC)).total_seconds()
+    previous, following, due = table.runs(now)
+    expected = {
+        'hourly': (-0.5, 0.5, -0.5),
+        'advanced': (None, 0.5, -0.5),
+        'not-started': (None, 8771.5, None),
+        'never-ran': (-0.5, 0.5, -0.5),
+        'finished': (-10.5, None, -10.5),
+        # Dec 31 and Jan 31, stepping from Oct 31 through Nov 30
+        'monthly': (-36.5, 707.5, -36.5),
+        'dependent': (None, None, None),
+        'broken': (None, None, None),
+    }
+    for name, runs in expected.items():
+        assert tuple(hours(column, table, name) for column in (previous, following, due)) == runs, name
+    assert table.errors == {'broken': "schedule 'R/yesterday/PT1H' has an invalid start time"}
+    assert table.next_run('hourly', now) == datetime(2020, 1, 1, 13, 0, tzinfo=UTC)
+    assert table.next_run('dependent', now) is None
+
+
+def test_overdue(use_numpy):
+    table = ScheduleTable.from_jobs(JOBS, use_numpy=use_numpy)
+    now = (NOW - datetime(1970, 1, 1, tzinfo=UTC)).total_seconds()
+    assert table.overdue(now) == ['stalled', 'advanced-stale', 'never-ran', 'monthly']
+    # never-ran was due at 12:00 with 10 minutes of epsilon
+    assert table.overdue(now, grace=25 * 60) == ['stalled', 'advanced-stale', 'monthly']
+    assert table.failing() == ['failed']
+
+
+def test_as_numpy():
+    numpy = pytest.importorskip('numpy')
+    table = ScheduleTable.from_jobs(JOBS)
+    columns = table.as_numpy(now=(NOW - datetime(1970, 1, 1, tzinfo=UTC)).total_seconds())
+    assert columns['next'].dtype == numpy.dtype('datetime64[ms]')
+    assert columns['next'][table.index['hourly']] == numpy.datetime64('2020-01-01T13:00:00', 'ms')
+    assert numpy.isnat(columns['next'][table.index['dependent']])
+
+
+def test_without_numpy():
+    with mock.patch('chronos.schedule._load_numpy', return_value=None):
+        assert ScheduleTable().numpy is None
+        with pytest.raises(ImportError):
+            ScheduleTable(use_numpy=True)
+
+
+def test_client_job_schedules():
+    client = chronos.ChronosClient('localhost')
+    with mock.patch.object(client, 'list', return_value=JOBS):
+        table = client.job_schedules(use_numpy=False)
+    assert len(table) == len(JOBS) and 'stalled' in table
@@ -0,0 +1,75 @@
+import math
+
+import mock
+import pytest
+
+import chronos
+from chronos.cache import ResponseCache
+from chronos.stats import SchedulerStats
+
+RESPONSES = {
+    'p99': [{'jobNameLabel': 'a', 'time': 9.0}, {'jobNameLabel': 'b', 'time': 3.0}],
+    'p98': [{'jobNameLabel': 'a', 'time': 8.0}, {'jobNameLabel': 'b', 'time': 2.5}],
+    'p95': [{'jobNameLabel': 'a', 'time': 7.0}],
+    'p75': [{'jobNameLabel': 'a', 'time': 5.0}, {'jobNameLabel': 'c', 'time': 1}],
+    'median': [{'jobNameLabel': 'a', 'time': 4.0}, {'jobNameLabel': 'b', 'time': 1.0}],
+    'mean': [],
+}
+
+
+def test_from_responses_merges_by_job():
+    stats = SchedulerStats.from_responses(RESPONSES, metrics={'version': '3.0.0'})
+    assert stats.names == ['a', 'b', 'c']
+    assert len(stats) == 3 and 'c' in stats and 'd' not in stats
+    assert stats['a'] == chronos.JobTimings('a', 9.0, 8.0, 7.0, 5.0, 4.0, None)
+    assert stats['c'].p75 == 1.0 and stats['c'].p99 is None
+    assert stats.get('d') is None
+    assert math.isnan(stats.columns['p95'][1])
+    assert stats.metrics == {'version': '3.0.0'}
+
+
+def test_rank_and_filter():
+    stats = SchedulerStats.from_responses(RESPONSES)
+    assert stats.top(1) == [('a', 9.0)]
+    assert stats.top(5, by='p75') == [('a', 5.0), ('c', 1.0)]
+    assert stats.where('p99', minimum=4) == ['a']
+    assert stats.where('median', maximum=2) == ['b']
+    assert stats.column('p98') == {'a': 8.0, 'b': 2.5}
+
+
+def test_as_numpy_shares_columns():
+    numpy = pytest.importorskip('numpy')
+    arrays = SchedulerStats.from_responses(RESPONSES).as_numpy()
+    assert numpy.nanmax(arrays['p99']) == 9.0
+
+
+def fake_call(url, method='GET', prefix=True, **kwargs):
+    if url == '/metrics':
+        return {'version': '3.0.0'}
+    path = url.rsplit('/', 1)[1]
+    stat = dict((value, key) for key, value in chronos.STAT_PATHS.items())[path]
+    return RESPONSES[stat]
+
+
+def test_scheduler_stats_fetches_every_endpoint():
+    client = chronos.ChronosClient('localhost')
+    with mock.patch.object(client, '_call', side_effect=fake_call) as mock_call:
+        stats = client.scheduler_stats()
+    assert mock_call.call_count == 7
+    assert stats['b'].median == 1.0
+    assert stats.metrics == {'version': '3.0.0'}
+    with mock.patch.object(client, '_call', side_effect=fake_call) as mock_call:
+        assert client.scheduler_stats(metrics=False).metrics is None
+    assert mock_call.call_count == 6
+
+
+def test_scheduler_stats_ttl():
+    clock = [0.0]
+    cache = ResponseCache(ttls={'scheduler_stats': 5}, clock=lambda: clock[0])
+    client = chronos.ChronosClient('localhost', cache=cache)
+    with mock.patch.object(client, '_call', side_effect=fake_call) as mock_call:
+        first = client.scheduler_stats()
+        assert client.scheduler_stats() is first
+        clock[0] = 6
+        assert client.scheduler_stats() is not first
+    assert mock_call.call_count == 14
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+
+import pytest
+
+import chronos
+from chronos.stream import JSONArrayParser, iter_json_array
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+JOBS = [
+    {'name': u'job é %d' % i, 'lastError': '', 'lastSuccess': '2015-12-18T10:30:09.755Z', 'retries': i * 1000,
+     'container': {'type': 'docker', 'image': 'foo'}}
+    for i in range(50)
+]
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('size', [1, 2, 7, 64, 100000])
+def test_parses_across_chunk_boundaries(size):
+    data = json.dumps(JOBS, indent=1).encode('utf-8')
+    assert list(iter_json_array(chunked(data, size))) == JOBS
+
+
+def test_empty_array():
+    assert list(iter_json_array([b' [ ', b' ] '])) == []
+
+
+def test_projection():
+    data = json.dumps(JOBS).encode('utf-8')
+    jobs = list(iter_json_array(chunked(data, 13), fields=['name', 'missing']))
+    assert jobs == [{'name': job['name']} for job in JOBS]
+
+
+def test_numbers_split_across_chunks():
+    assert list(iter_json_array([b'[12', b'34, 5', b'6]'])) == [1234, 56]
+
+
+def test_yields_items_before_the_end():
+    parser = JSONArrayParser()
+    assert parser.feed(b'[{"name": "a"}, {"na') == [{'name': 'a'}]
+    assert parser.feed(b'me": "b"}') == [{'name': 'b'}]
+    assert parser.feed(b']') == []
+    assert parser.close() == []
+
+
+@pytest.mark.parametrize('data', [b'[{"name": "a"}', b'{"name": "a"}', b'[1 2]', b'[1] 2'])
+def test_invalid_input(data):
+    with pytest.raises(ValueError):
+        list(iter_json_array([data]))
+
+
+class JobsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    status = 200
+
+    def do_GET(self):
+        body = json.dumps(JOBS).encode('utf-8')
+        self.send_response(self.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for chunk in chunked(body, 1000):
+            self.wfile.write(('%x\r\n' % len(chunk)).encode('ascii') + chunk + b'\r\n')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = HTTPServer(('127.0.0.1', 0), JobsHandler)
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={'poll_interval': 0.01})
+    thread.daemon = True
+    thread.start()
+    yield '127.0.0.1:%d' % httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_iter_jobs(server):
+    client = chronos.ChronosClient(server)
+    assert list(client.iter_jobs()) == JOBS
+    assert [job['name'] for job in client.iter_jobs(fields=['name'])] == [job['name'] for job in JOBS]
+
+
+def test_iter_jobs_fails_over(server):
+    client = chronos.ChronosClient(['127.0.0.1:1', server])
+    assert len(list(client.iter_jobs(chunk_size=10))) == len(JOBS)
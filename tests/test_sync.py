@@ -0,0 +1,215 @@
+import json
+import os
+import sys
+
+import mock
+import pytest
+
+import chronos
+from chronos.sync import (
+    JobFileLoader, SyncState, dependency_waves, fetch_jobs, find_job_files, parse_job, push_waves,
+)
+
+
+def job(name, parents=None):
+    job_def = {'name': name, 'command': 'true', 'owner': 'me', 'disabled': False}
+    if parents is None:
+        job_def['schedule'] = 'R/2014-01-01T00:00:00Z/PT1H'
+    else:
+        job_def['parents'] = parents
+    return job_def
+
+
+def names(waves):
+    return [sorted(j['name'] for j in wave) for wave in waves]
+
+
+def test_waves_follow_parents():
+    jobs = [job('c', ['b']), job('b', ['a']), job('a'), job('d'), job('e', ['a', 'd'])]
+    waves, blocked = dependency_waves(jobs)
+    assert names(waves) == [['a', 'd'], ['b', 'e'], ['c']]
+    assert blocked == {}
+
+
+def test_existing_parents_are_satisfied():
+    waves, blocked = dependency_waves([job('child', ['parent'])], existing=['parent'])
+    assert names(waves) == [['child']]
+    assert blocked == {}
+
+
+def test_missing_parents_and_cycles_are_blocked():
+    jobs = [job('orphan', ['nowhere']), job('grandchild', ['orphan']), job('x', ['y']), job('y', ['x']), job('ok')]
+    waves, blocked = dependency_waves(jobs)
+    assert names(waves) == [['ok']]
+    assert sorted(blocked) == ['grandchild', 'orphan', 'x', 'y']
+    assert 'nowhere' in blocked['orphan']
+    assert 'orphan' in blocked['grandchild']
+
+
+def test_push_waves_skips_children_of_failed_jobs():
+    client = chronos.ChronosClient('localhost')
+
+    def fake_call(url, method, body):
+        if '"parent"' in body and '"parents"' not in body:
+            raise chronos.ChronosAPIError('nope')
+
+    waves, _ = dependency_waves([job('parent'), job('child', ['parent']), job('other')])
+    with mock.patch.object(client, '_call', side_effect=fake_call) as mock_call:
+        results = dict((item.name, item) for item in push_waves(client, waves, updates=['other']))
+    assert results['other'].ok
+    assert isinstance(results['parent'].exception, chronos.ChronosAPIError)
+    assert 'parent' in str(results['child'].exception)
+    assert mock_call.call_count == 2
+
+
+def write(tmpdir, name, job_def, indent=None):
+    path = tmpdir.join(name)
+    path.write(json.dumps(job_def, indent=indent))
+    return str(path)
+
+
+def test_sync_state_skips_unchanged_files(tmpdir):
+    a = write(tmpdir, 'a.json', job('a'))
+    b = write(tmpdir, 'b.json', job('b'))
+    state_file = str(tmpdir.join('state.json'))
+
+    state = SyncState.load(state_file)
+    dirty = state.scan([a, b])
+    assert [path for path, _ in dirty] == [a, b]
+    state.mark_synced(a, job('a'))
+    state.save()
+
+    state = SyncState.load(state_file)
+    with mock.patch('chronos.sync.parse_job', wraps=parse_job) as parse:
+        assert [path for path, _ in state.scan([a, b])] == [b]
+    assert parse.call_count == 1
+
+
+def test_sync_state_compares_contents_then_definitions(tmpdir):
+    a = write(tmpdir, 'a.json', job('a'))
+    state = SyncState(str(tmpdir.join('state.json')))
+    state.scan([a])
+    state.mark_synced(a, job('a'))
+
+    os.utime(a, (0, 0))
+    with mock.patch('chronos.sync.parse_job') as parse:
+        assert state.scan([a]) == []
+    assert not parse.called
+
+    write(tmpdir, 'a.json', job('a'), indent=4)
+    assert state.scan([a]) == []
+
+    changed = dict(job('a'), command='false')
+    write(tmpdir, 'a.json', changed)
+    assert state.scan([a]) == [(a, changed)]
+    assert state.scan([a], full=True) == [(a, changed)]
+
+    tmpdir.join('a.json').write('{')
+    assert state.scan([a]) == [(a, None)]
+    assert state.errors[a].startswith('failed to decode')
+
+
+def test_sync_state_forgets_removed_files_and_tracks_reconciles(tmpdir):
+    clock = mock.Mock(return_value=1000.0)
+    a = write(tmpdir, 'a.json', job('a'))
+    b = write(tmpdir, 'b.json', job('b'))
+    state_file = str(tmpdir.join('state.json'))
+    state = SyncState(state_file, clock=clock)
+    assert state.reconcile_due(3600)
+    assert not state.reconcile_due(None)
+    for path, job_def in state.scan([a, b], full=True):
+        state.mark_synced(path, job_def)
+    state.mark_full()
+    state.scan([a])
+    state.save()
+
+    state = SyncState.load(state_file, clock=clock)
+    assert list(state.files) == [a]
+    assert not state.reconcile_due(3600)
+    clock.return_value = 5000.0
+    assert state.reconcile_due(3600)
+
+
+def test_sync_state_reports_files_that_disappear(tmpdir):
+    a = write(tmpdir, 'a.json', job('a'))
+    b = write(tmpdir, 'b.json', job('b'))
+    state_file = str(tmpdir.join('state.json'))
+    state = SyncState(state_file)
+    for path, job_def in state.scan([a, b]):
+        state.mark_synced(path, job_def)
+    state.save()
+
+    os.remove(a)
+    write(tmpdir, 'b.json', dict(job('b'), command='false'))
+    missing = str(tmpdir.join('missing.json'))
+    assert state.scan([a, b, missing]) == [(a, None), (b, dict(job('b'), command='false')), (missing, None)]
+    assert sorted(state.errors) == sorted([a, missing])
+    state.save()
+    assert a not in SyncState.load(state_file).files
+
+
+def test_sync_state_ignores_invalid_state_files(tmpdir):
+    state_file = tmpdir.join('state.json')
+    state_file.write('{"version": 1, "files": ')
+    assert SyncState.load(str(state_file)).files == {}
+    assert SyncState.load(str(tmpdir.join('missing.json'))).files == {}
+
+
+def test_fetch_jobs_searches_few_names():
+    client = mock.Mock()
+    client.search.side_effect = lambda name: [job(name), job(name + '-2')] if name != 'gone' else []
+    assert fetch_jobs(client, ['a', 'gone']) == {'a': job('a')}
+    assert not client.list.called
+
+    client.list.return_value = [job('a'), job('b')]
+    assert sorted(fetch_jobs(client, ['a', 'b', 'c'], search_limit=2)) == ['a', 'b']
+
+
+def test_find_job_files_matches_sorted_walk(tmpdir):
+    for path in ['b.json', 'a.json', 'a/z.json', 'a/sub/x.json', 'ab.json', 'a-b/c.json', 'notes.txt', 'xjson']:
+        tmpdir.join(path).ensure()
+    os.symlink(str(tmpdir.join('a')), str(tmpdir.join('link')))
+    root = str(tmpdir)
+    walked = sorted(
+        os.path.join(top, name) for top, dirs, files in os.walk(root) for name in files if name.endswith('json')
+    )
+    assert list(find_job_files(root)) == walked
+    assert len(walked) == 7
+
+
+def test_loader_keeps_order_and_collects_errors(tmpdir):
+    paths = [write(tmpdir, '%02d.json' % i, job('job%d' % i)) for i in range(40)]
+    tmpdir.join('05.json').write('{"name": ')
+    tmpdir.join('07.json').write('{"command": "true"}')
+    paths.append(str(tmpdir.join('missing.json')))
+    loader = JobFileLoader(max_workers=4)
+    loaded = list(loader.load(iter(paths)))
+    assert [path for path, _ in loaded] == paths
+    assert loaded[0][1] == job('job0')
+    assert loaded[5][1] is None and loaded[7][1] is None
+    assert sorted(loader.errors) == [paths[5], paths[7], paths[-1]]
+    assert loader.errors[paths[5]].startswith('failed to decode')
+    assert loader.errors[paths[7]] == 'not a job definition: no "name"'
+
+
+@pytest.mark.parametrize('mode', [[], ['--parallel', '2']], ids=['serial', 'parallel'])
+def test_sync_jobs_exit_status(sync_jobs, tmpdir, mode):
+    write(tmpdir, 'a.json', job('a'))
+    client = mock.Mock()
+    client.list.return_value = []
+    argv = ['chronos-sync-jobs.py', '--hostname', 'localhost', '--sync', str(tmpdir)] + mode
+
+    def exit_status():
+        with mock.patch.object(sys, 'argv', argv), mock.patch('chronos.connect', return_value=client):
+            try:
+                sync_jobs.main()
+            except SystemExit as e:
+                return e.code
+        return 0
+
+    assert exit_status() == 0
+    client.add.side_effect = chronos.ChronosAPIError('nope')
+    assert exit_status() == 1
+    client.add.side_effect = None
+    tmpdir.join('broken.json').write('{')
+    assert exit_status() == 1
@@ -0,0 +1,185 @@
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import mock
+import pytest
+
+import chronos
+from benchmarks.fake_chronos import FakeChronos
+from chronos.transport import HTTPClientConnection, HTTPClientTransport, Httplib2Transport, make_transport
+
+
+def test_make_transport():
+    assert isinstance(make_transport('http.client'), HTTPClientTransport)
+    assert isinstance(make_transport(Httplib2Transport, timeout=3), Httplib2Transport)
+    transport = HTTPClientTransport()
+    assert make_transport(transport) is transport
+    with pytest.raises(ValueError):
+        make_transport('curl')
+
+
+def test_client_uses_transport_settings():
+    client = chronos.ChronosClient(
+        'localhost', username='user', password='secret', transport='http.client',
+        retry_policy=chronos.RetryPolicy(connect_timeout=1, read_timeout=7),
+    )
+    conn = client._new_connection('http://localhost')
+    assert isinstance(conn, HTTPClientConnection)
+    assert (conn.timeout, client.transport.connect_timeout) == (7, 1)
+    assert conn.authorization == 'Basic dXNlcjpzZWNyZXQ='
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='module __getattr__ needs Python 3.7')
+def test_httplib2_is_imported_lazily():
+    code = "import sys, chronos; assert 'httplib2' not in sys.modules; chronos.httplib2.Http"
+    assert subprocess.call([sys.executable, '-c', code]) == 0
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='module __getattr__ needs Python 3.7')
+def test_optional_subsystems_are_imported_lazily():
+    code = (
+        "import sys, chronos\n"
+        "lazy = ('chronos.transport', 'chronos.schedule', 'chronos.graph', 'concurrent.futures', 'http.client')\n"
+        "assert not [name for name in lazy if name in sys.modules]\n"
+        "assert chronos.JobCatalog and chronos.ScheduleTable and 'httplib2' in chronos.TRANSPORTS\n"
+        "assert not hasattr(chronos, 'NoSuchThing')\n"
+    )
+    assert subprocess.call([sys.executable, '-c', code]) == 0
+
+
+@pytest.mark.parametrize('transport', ['httplib2', 'http.client'])
+def test_transports_against_fake_server(transport):
+    with FakeChronos(jobs=3) as server:
+        client = chronos.connect(server.address, transport=transport)
+        assert len(client.list()) == 3
+        client.delete('bench-job-000001')
+        assert client.leader() == server.address
+        with pytest.raises(chronos.ChronosAPIError):
+            client.run('no-such-job')
+        assert server.job_count() == 2
+        assert client.pool_stats()['hits'] >= 2
+        client.close()
+
+
+def test_http_client_reconnects_stale_keep_alive():
+    with FakeChronos(jobs=1) as server:
+        conn = HTTPClientTransport(timeout=5).connect('http://%s' % server.address)
+        conn.request('http://%s/metrics' % server.address)
+        conn._conn.sock.close()
+        response, content = conn.request('http://%s/metrics' % server.address)
+        assert response.status == 200 and b'version' in content
+        conn.close()
+
+
+def serve_requests(listener, replies):
+    """Answer one request per reply on `listener`; a None reply closes the connection unanswered."""
+    received = []
+
+    def run():
+        conn = None
+        for reply in replies:
+            if conn is None:
+                conn = listener.accept()[0]
+            data = b''
+            while b'\r\n\r\n' not in data:
+                data += conn.recv(4096)
+            received.append(data)
+            if reply is None:
+                conn.close()
+                conn = None
+            else:
+                conn.sendall(reply)
+        if conn is not None:
+            conn.close()
+
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    return thread, received
+
+
+def test_http_client_resends_when_idle_connection_was_closed_unanswered():
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(2)
+    address = 'http://127.0.0.1:%d' % listener.getsockname()[1]
+    ok = b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 2\r\n\r\n{}'
+    thread, received = serve_requests(listener, [ok, None, ok])
+    conn = HTTPClientTransport(timeout=5).connect(address)
+    assert conn.request(address + '/metrics')[0].status == 200
+    assert conn.request(address + '/metrics')[0].status == 200
+    thread.join(5)
+    assert len(received) == 3
+    conn.close()
+    listener.close()
+
+
+def test_http_client_does_not_resend_timed_out_request():
+    with FakeChronos(jobs=1, latency=0.3) as server:
+        conn = HTTPClientTransport(timeout=5).connect('http://%s' % server.address)
+        conn.request('http://%s/metrics' % server.address)
+        conn.set_timeout(0.1)
+        with pytest.raises(socket.timeout):
+            conn.request('http://%s/metrics' % server.address)
+        assert server.requests == 2
+        conn.close()
+
+
+def test_unreachable_server_fails_over():
+    client = chronos.connect(['127.0.0.1:1', '127.0.0.1:2'], transport='http.client',
+                             retry_policy=chronos.RetryPolicy(max_attempts=1))
+    with mock.patch.object(client.router, 'failure') as failure:
+        with pytest.raises(chronos.ChronosAPIError):
+            client.metrics()
+    assert failure.call_count == 2
+
+
+@pytest.mark.parametrize('transport', ['httplib2', 'http.client'])
+def test_deadline_limits_each_request(transport):
+    with FakeChronos(jobs=1, latency=1.0) as server:
+        policy = chronos.RetryPolicy(max_attempts=1, read_timeout=30, deadline=0.2)
+        client = chronos.connect(server.address, transport=transport, retry_policy=policy)
+        start = time.time()
+        with pytest.raises(chronos.ChronosAPIError):
+            client.leader()
+        assert time.time() - start < 0.9
+        client.close()
+
+
+@pytest.mark.parametrize('transport', ['httplib2', 'http.client'])
+def test_timed_out_post_is_not_sent_again(transport):
+    job = {'name': 'new-job', 'command': 'true', 'owner': 'me', 'disabled': False, 'schedule': 'R//PT1H'}
+    with FakeChronos(jobs=1, latency=0.5) as first, FakeChronos(jobs=1) as second:
+        policy = chronos.RetryPolicy(max_attempts=3, read_timeout=0.1, sleep=mock.Mock())
+        client = chronos.connect([first.address, second.address], transport=transport, retry_policy=policy)
+        with pytest.raises(chronos.ChronosAPIError):
+            client.add(job)
+        assert (first.requests, second.requests) == (1, 0)
+        client.close()
+
+
+@pytest.mark.parametrize('transport', ['httplib2', 'http.client'])
+def test_deadline_shortens_pooled_connection_timeouts(transport):
+    with FakeChronos(jobs=1) as server:
+        policy = chronos.RetryPolicy(read_timeout=30, deadline=5)
+        client = chronos.connect(server.address, transport=transport, retry_policy=policy)
+        client.leader()
+        with client.pool.connection('http://%s' % server.address) as conn:
+            if transport == 'httplib2':
+                socks = [open_conn.sock for open_conn in conn.connections.values()]
+            else:
+                socks = [conn._conn.sock]
+            assert 0 < conn.timeout <= 5
+            assert socks and all(0 < sock.gettimeout() <= 5 for sock in socks)
+        client.close()
+
+
+def test_urllib3_transport():
+    pytest.importorskip('urllib3')
+    with FakeChronos(jobs=2) as server:
+        client = chronos.connect(server.address, transport='urllib3')
+        assert len(client.list()) == 2
+        client.close()
@@ -0,0 +1,94 @@
+import pytest
+
+import chronos
+from chronos.validation import MISSING, ONE_OF, SYNTAX, TYPE, compile_validator, schedule_problem
+
+JOB = {
+    'name': 'foo', 'command': 'true', 'owner': 'me', 'disabled': False, 'schedule': 'R/2014-01-01T00:00:00Z/PT1H',
+    'epsilon': 'PT60S', 'cpus': 0.5, 'container': {'type': 'DOCKER', 'image': 'busybox', 'volumes': []},
+}
+
+
+def strict_client(**kwargs):
+    return chronos.ChronosClient('localhost', strict_validation=True, **kwargs)
+
+
+def test_valid_job_has_no_problems():
+    assert strict_client()._check_fields(JOB)
+    assert strict_client()._check_fields(dict(JOB, schedule='R5//P1D', ownerName=None))
+
+
+@pytest.mark.parametrize('field, value', [
+    ('cpus', '0.5'), ('disabled', None), ('schedule', 'R-1//PT1H'), ('epsilon', '60s'),
+    ('container', dict(JOB['container'], type=1)),
+])
+def test_types_and_syntax_are_checked_only_when_strict(field, value):
+    job = dict(JOB, **{field: value})
+    assert chronos.ChronosClient('localhost')._check_fields(job)
+    with pytest.raises(chronos.InvalidFieldError) as excinfo:
+        strict_client()._check_fields(job)
+    assert excinfo.value.problems[0].kind in (TYPE, SYNTAX)
+
+
+def test_every_problem_is_reported():
+    job = {
+        'name': 'foo', 'command': ['true'], 'disabled': 'no', 'cpus': True, 'epsilon': '60s',
+        'schedule': 'R/2014-01-01T00:00:00Z/PT1H', 'parents': ['bar', 1], 'container': {'image': 3},
+    }
+    with pytest.raises(chronos.MissingFieldError) as excinfo:
+        strict_client()._check_fields(job)
+    problems = excinfo.value.problems
+    assert [(p.kind, p.field) for p in problems] == [
+        (MISSING, 'owner'), (ONE_OF, None), (MISSING, 'container.type'), (TYPE, 'container.image'),
+        (TYPE, 'command'), (SYNTAX, 'epsilon'), (TYPE, 'cpus'), (TYPE, 'disabled'), (TYPE, 'parents'),
+    ]
+    assert str(excinfo.value).split('; ') == [p.message for p in problems]
+    with pytest.raises(chronos.MissingFieldError) as excinfo:
+        chronos.ChronosClient('localhost')._check_fields(job)
+    assert [(p.kind, p.field) for p in excinfo.value.problems] == [
+        (MISSING, 'owner'), (ONE_OF, None), (MISSING, 'container.type'),
+    ]
+
+
+@pytest.mark.parametrize('schedule, valid', [
+    ('R/2014-01-01T00:00:00Z/PT1H', True),
+    ('R10/2014-01-01T00:00:00.000+01:00/P1M', True),
+    ('R//PT10M', True),
+    ('2014-01-01T00:00:00Z/PT1H', False),
+    ('R/2014-13-01/PT1H', False),
+    ('R/2014-01-01T00:00:00Z/1H', False),
+])
+def test_schedule_syntax(schedule, valid):
+    assert (schedule_problem(schedule) is None) == valid
+    if not valid:
+        with pytest.raises(chronos.InvalidFieldError):
+            strict_client()._check_fields(dict(JOB, schedule=schedule))
+
+
+def test_validators_are_compiled_once_per_api_version():
+    current = chronos.ChronosClient('localhost')
+    legacy = chronos.ChronosClient('localhost', scheduler_api_version=None)
+    assert current._validator() is current._validator()
+    assert legacy._validator() is not current._validator()
+    assert strict_client()._validator() is not current._validator()
+    fields = list(chronos.ChronosJob.fields)
+    for _ in range(3):
+        with pytest.raises(chronos.MissingFieldError, match='async'):
+            legacy._check_fields(JOB)
+    # the legacy fields used to be appended to ChronosJob.fields on every check
+    assert chronos.ChronosJob.fields == fields
+    assert current._check_fields(JOB)
+
+
+def test_validate_many():
+    client = strict_client()
+    jobs = [dict(JOB, name='job-%d' % i) for i in range(2500)]
+    jobs[7] = dict(jobs[7], cpus='lots')
+    del jobs[2000]['owner']
+    invalid = client.validate_many(jobs)
+    assert [(job['name'], type(error)) for job, error in invalid] == [
+        ('job-7', chronos.InvalidFieldError), ('job-2000', chronos.MissingFieldError),
+    ]
+    job_class = chronos.ChronosJob
+    validator = compile_validator(job_class.fields, job_class.one_of, job_class.container_fields, strict=True)
+    assert validator.problems_many(jobs, max_workers=2) == validator.problems_many(jobs)
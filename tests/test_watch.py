@@ -0,0 +1,87 @@
+import mock
+
+import chronos
+from chronos.watch import ADDED, CHANGED, ERRORS, FAILED, REMOVED, SUCCEEDED, JobEvent, JobWatcher
+
+
+def job(name, command='true', last_error='', errors=0, last_success='', success_count=0):
+    return {
+        'name': name, 'command': command, 'lastError': last_error, 'lastSuccess': last_success,
+        'errorsSinceLastSuccess': errors, 'successCount': success_count,
+    }
+
+
+def kinds(events):
+    return [(event.kind, event.name) for event in events]
+
+
+def test_commit_reports_each_kind_of_change():
+    watcher = JobWatcher()
+    assert watcher.begin(*watcher.observe([job('a'), job('b'), job('c')])) == []
+    listing = [
+        job('a', command='false'),
+        job('b', last_error='2017-01-01T00:00:00.000Z', errors=1),
+        job('d'),
+    ]
+    events = watcher.commit(*watcher.observe(listing))
+    assert kinds(events) == [(CHANGED, 'a'), (FAILED, 'b'), (ERRORS, 'b'), (ADDED, 'd'), (REMOVED, 'c')]
+    assert events[0] == JobEvent(CHANGED, 'a', listing[0])
+    assert events[-1].job is None
+    events = watcher.commit(*watcher.observe([
+        job('a', command='false'), job('b', last_success='2017-01-02T00:00:00.000Z', errors=0), job('d'),
+    ]))
+    assert kinds(events) == [(SUCCEEDED, 'b'), (ERRORS, 'b')]
+
+
+def test_status_counters_alone_are_not_changes():
+    watcher = JobWatcher()
+    watcher.begin(*watcher.observe([job('a')]))
+    state, changed = watcher.observe([job('a', success_count=5)])
+    assert changed == {}
+    assert not watcher.differs(state, changed)
+    assert watcher.commit(state, changed) == []
+
+
+def test_initial_listing_can_be_reported():
+    watcher = JobWatcher(initial=True)
+    assert kinds(watcher.begin(*watcher.observe([job('a')]))) == [(ADDED, 'a')]
+
+
+def test_interval_backs_off_while_quiet():
+    watcher = JobWatcher(interval=2, max_interval=5, backoff=2)
+    watcher.begin(*watcher.observe([job('a')]))
+    delays = []
+    for _ in range(3):
+        watcher.commit(*watcher.observe([job('a')]))
+        delays.append(watcher.delay)
+    watcher.commit(*watcher.observe([job('a', command='false')]))
+    assert delays + [watcher.delay] == [4, 5, 5, 2]
+
+
+def test_watch_coalesces_bursts():
+    listings = iter([
+        [job('a'), job('b')],
+        [job('a', command='v2'), job('b')],
+        [job('a', command='v3')],
+        [job('a', command='v3')],
+        [job('a', command='v3'), job('c')],
+        [job('a', command='v3'), job('c')],
+    ])
+    sleeps = []
+    watcher = JobWatcher(interval=10, coalesce=1)
+    events = watcher.watch(lambda: next(listings), sleep=sleeps.append)
+    first_burst = [next(events), next(events)]
+    assert kinds(first_burst) == [(CHANGED, 'a'), (REMOVED, 'b')]
+    assert first_burst[0].job['command'] == 'v3'
+    assert kinds([next(events)]) == [(ADDED, 'c')]
+    assert sleeps == [10, 1, 1, 10, 1]
+
+
+def test_client_watch_streams_listings():
+    client = chronos.ChronosClient('localhost')
+    listings = iter([[job('a')], [job('a', errors=2)]])
+    with mock.patch.object(client, 'iter_jobs', side_effect=lambda: iter(next(listings))), \
+            mock.patch('chronos.watch.time.sleep') as mock_sleep:
+        events = client.watch_jobs(interval=3, coalesce=0)
+        assert kinds([next(events)]) == [(ERRORS, 'a')]
+    mock_sleep.assert_called_once_with(3)